@@ -4,9 +4,19 @@ import json
 import time
 import pygame
 
-# Initialize pygame for audio
-pygame.mixer.init()
-alert_sound = pygame.mixer.Sound('alert.wav')  # Keep this very short (0.5s)
+# Alert sound, loaded by run() so the detector itself works without an audio device
+alert_sound = None
+
+def load_alert_sound():
+    """Initialize pygame audio and load the alert (keep alert.wav very short, ~0.5s)"""
+    global alert_sound
+    if alert_sound is None:
+        try:
+            pygame.mixer.init()
+            alert_sound = pygame.mixer.Sound('alert.wav')
+        except pygame.error as e:
+            print(f"Audio alerts disabled: {e}")
+    return alert_sound
 
 # Strict Ambulance Detection Parameters
 MIN_RED_AREA = 1500       # Increase minimum size to avoid small red objects
@@ -24,17 +34,69 @@ RED_UPPER2 = np.array([180, 255, 255])
 WHITE_LOWER = np.array([0, 0, 200])
 WHITE_UPPER = np.array([180, 30, 255])
 
+# Multi-resolution screening
+SCREEN_SCALE = 0.25        # Red regions are first searched at this fraction of the frame size
+SCREEN_AREA_SLACK = 0.5    # Screened blobs may be this much smaller than MIN_RED_AREA (scaled)
+ROI_PADDING = 8            # Full-resolution pixels added around each candidate
+
+MORPH_KERNEL = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5,5))
+SCREEN_KERNEL = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3,3))
+
+def red_mask_from_hsv(hsv):
+    """Union of both red hue ranges"""
+    return cv2.bitwise_or(cv2.inRange(hsv, RED_LOWER1, RED_UPPER1),
+                          cv2.inRange(hsv, RED_LOWER2, RED_UPPER2))
+
+def clean_mask(mask, kernel=MORPH_KERNEL):
+    """Morphological open then close to remove speckles and fill holes"""
+    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
+    return cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
+
+def merge_boxes(boxes):
+    """Merge overlapping (x1, y1, x2, y2) boxes until none overlap"""
+    boxes = list(boxes)
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(boxes)):
+            for j in range(i + 1, len(boxes)):
+                a, b = boxes[i], boxes[j]
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    boxes[i] = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+                    del boxes[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return boxes
+
 class StrictAmbulanceDetector:
-    def __init__(self, source=0):
-        self.cap = cv2.VideoCapture(source)
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+    def __init__(self, source=0, screen_scale=SCREEN_SCALE):
+        """
+        Args:
+            source: Camera index or video path for run(); None to only use detect()
+            screen_scale: Resolution factor of the red pre-screen; 1 disables
+                screening and processes every frame at full resolution
+        """
+        self.cap = cv2.VideoCapture(source) if source is not None else None
+        if self.cap is not None:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+        self.screen_scale = screen_scale
         self.detection_window = None
         self.last_alert_time = 0
         
-    def detect_white_cross(self, roi):
-        """Detect white cross pattern in the red region"""
-        hsv = cv2.cvtColor(roi, cv2.COLOR_BGR2HSV)
+    def detect_white_cross(self, roi, hsv=None):
+        """
+        Detect white cross pattern in the red region
+
+        Args:
+            roi: BGR region to search
+            hsv: Optional HSV version of the region (e.g. a slice of one
+                computed earlier), saves the conversion
+        """
+        if hsv is None:
+            hsv = cv2.cvtColor(roi, cv2.COLOR_BGR2HSV)
         white_mask = cv2.inRange(hsv, WHITE_LOWER, WHITE_UPPER)
         
         # Look for cross patterns using line detection
@@ -47,8 +109,16 @@ class StrictAmbulanceDetector:
             return len(lines) >= 2
         return False
     
-    def verify_ambulance(self, frame, x, y, w, h):
-        """Apply multiple verification steps"""
+    def verify_ambulance(self, frame, x, y, w, h, hsv=None, red_mask=None):
+        """
+        Apply multiple verification steps
+
+        Args:
+            frame: BGR frame
+            x, y, w, h: Candidate box in frame coordinates
+            hsv: Optional HSV version of exactly this box
+            red_mask: Optional raw (uncleaned) red mask of exactly this box
+        """
         # 1. Check aspect ratio (ambulances are longer than wide)
         aspect_ratio = w / float(h)
         if not (ASPECT_RATIO_RANGE[0] <= aspect_ratio <= ASPECT_RATIO_RANGE[1]):
@@ -56,33 +126,98 @@ class StrictAmbulanceDetector:
             
         # 2. Extract the ROI and check for white cross
         roi = frame[y:y+h, x:x+w]
-        has_cross = self.detect_white_cross(roi)
+        if hsv is None:
+            hsv = cv2.cvtColor(roi, cv2.COLOR_BGR2HSV)
+        has_cross = self.detect_white_cross(roi, hsv)
         
         # 3. Verify red color dominance
-        hsv_roi = cv2.cvtColor(roi, cv2.COLOR_BGR2HSV)
-        red_mask1 = cv2.inRange(hsv_roi, RED_LOWER1, RED_UPPER1)
-        red_mask2 = cv2.inRange(hsv_roi, RED_LOWER2, RED_UPPER2)
-        red_pixels = cv2.countNonZero(cv2.bitwise_or(red_mask1, red_mask2))
+        if red_mask is None:
+            red_mask = red_mask_from_hsv(hsv)
+        red_pixels = cv2.countNonZero(red_mask)
         red_ratio = red_pixels / float(w * h)
         
         return has_cross and (red_ratio >= RED_PIXEL_RATIO)
     
     def detect(self, frame):
-        """Main detection pipeline"""
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+        """
+        Main detection pipeline
+
+        Red regions are first searched in a downscaled copy of the frame; only
+        the regions that could be an ambulance are processed at full resolution.
+        """
+        if self.screen_scale >= 1:
+            return self._detect_region(frame, 0, 0, frame.shape[1], frame.shape[0])
         
-        # Get red regions (both hue ranges)
-        red_mask1 = cv2.inRange(hsv, RED_LOWER1, RED_UPPER1)
-        red_mask2 = cv2.inRange(hsv, RED_LOWER2, RED_UPPER2)
-        red_mask = cv2.bitwise_or(red_mask1, red_mask2)
+        for x, y, w, h in self.screen_candidates(frame):
+            if self._detect_region(frame, x, y, w, h):
+                return True
+        return False
+    
+    def screen_candidates(self, frame):
+        """
+        Find red blobs that could be an ambulance at low resolution
+
+        Returns:
+            List of padded (x, y, w, h) regions in full-resolution coordinates
+        """
+        scale = self.screen_scale
+        small = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        # Dilate rather than clean: every red blob of the full-resolution pass, including
+        # parts joined by thin bridges, must end up inside one screened region
+        red_mask = cv2.dilate(red_mask_from_hsv(cv2.cvtColor(small, cv2.COLOR_BGR2HSV)), SCREEN_KERNEL)
+        contours, _ = cv2.findContours(red_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         
-        # Morphological operations to clean up
-        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5,5))
-        red_mask = cv2.morphologyEx(red_mask, cv2.MORPH_OPEN, kernel)
-        red_mask = cv2.morphologyEx(red_mask, cv2.MORPH_CLOSE, kernel)
+        frame_h, frame_w = frame.shape[:2]
+        min_area = MIN_RED_AREA * scale * scale * SCREEN_AREA_SLACK
         
-        # Find contours
-        contours, _ = cv2.findContours(red_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        candidates = []
+        for cnt in contours:
+            # Box area rather than contour area: thin red shapes lose pixels when shrunk.
+            # The aspect ratio is left to the full-resolution check
+            x, y, w, h = cv2.boundingRect(cnt)
+            if w * h < min_area:
+                continue
+            
+            # Back to full resolution, padded for the blurring of the small image
+            x1 = max(int(x / scale) - ROI_PADDING, 0)
+            y1 = max(int(y / scale) - ROI_PADDING, 0)
+            x2 = min(int((x + w) / scale) + ROI_PADDING, frame_w)
+            y2 = min(int((y + h) / scale) + ROI_PADDING, frame_h)
+            candidates.append((x1, y1, x2, y2))
+        return [(x1, y1, x2 - x1, y2 - y1) for x1, y1, x2, y2 in merge_boxes(candidates)]
+    
+    def _detect_region(self, frame, rx, ry, rw, rh):
+        """
+        Full-resolution detection inside one region of the frame
+
+        HSV and the red mask are computed once for the region; every contour
+        is verified on slices of them. A red blob cut off by the region edge
+        grows the region until the whole blob is inside, so the contours match
+        those of a full-frame pass.
+        """
+        frame_h, frame_w = frame.shape[:2]
+        while True:
+            region = frame[ry:ry+rh, rx:rx+rw]
+            hsv = cv2.cvtColor(region, cv2.COLOR_BGR2HSV)
+            
+            # Get red regions (both hue ranges) and clean them up
+            raw_red_mask = red_mask_from_hsv(hsv)
+            red_mask = clean_mask(raw_red_mask)
+            
+            # Find contours
+            contours, _ = cv2.findContours(red_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            
+            cut_off = any(
+                (x == 0 and rx > 0) or (y == 0 and ry > 0)
+                or (x + w == rw and rx + rw < frame_w) or (y + h == rh and ry + rh < frame_h)
+                for x, y, w, h in map(cv2.boundingRect, contours)
+            )
+            if not cut_off:
+                break
+            # Grow by half the region size on every side
+            x1, y1 = max(rx - rw // 2, 0), max(ry - rh // 2, 0)
+            x2, y2 = min(rx + rw + rw // 2, frame_w), min(ry + rh + rh // 2, frame_h)
+            rx, ry, rw, rh = x1, y1, x2 - x1, y2 - y1
         
         for cnt in contours:
             area = cv2.contourArea(cnt)
@@ -92,8 +227,9 @@ class StrictAmbulanceDetector:
             x, y, w, h = cv2.boundingRect(cnt)
             
             # Strict ambulance verification
-            if self.verify_ambulance(frame, x, y, w, h):
-                self.detection_window = (x, y, w, h)
+            if self.verify_ambulance(frame, rx + x, ry + y, w, h,
+                                     hsv[y:y+h, x:x+w], raw_red_mask[y:y+h, x:x+w]):
+                self.detection_window = (rx + x, ry + y, w, h)
                 return True
                 
         return False
@@ -109,6 +245,7 @@ class StrictAmbulanceDetector:
     def run(self):
         print("STRICT Ambulance Detection Active - Only red ambulances with crosses will trigger")
         print("Press 'q' to quit")
+        load_alert_sound()
         
         while True:
             ret, frame = self.cap.read()
@@ -126,7 +263,8 @@ class StrictAmbulanceDetector:
                 
                 # Throttle alerts to avoid spamming
                 if time.time() - self.last_alert_time > 2:  # 2 second cooldown
-                    alert_sound.play()
+                    if alert_sound is not None:
+                        alert_sound.play()
                     self.last_alert_time = time.time()
                     print(self.generate_response())
             
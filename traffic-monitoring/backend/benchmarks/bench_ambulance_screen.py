@@ -0,0 +1,124 @@
+"""
+FPS benchmark of StrictAmbulanceDetector.detect with and without the low-resolution pre-screen
+
+Frames come from recorded clips, resized to the detector's 1280x720 camera
+resolution. A red "ambulance" with a white cross is pasted into every
+--plant-every'th frame so the verification path gets exercised as well.
+Three pipelines are compared:
+
+    legacy    - the previous detect(): full-frame HSV, masks and morphology,
+                HSV converted again per ROI in verify_ambulance
+    full-res  - detect() with screen_scale=1 (full frame, HSV/masks reused)
+    screened  - detect() with the default downscaled pre-screen
+
+Reported per pipeline: frames per second and the number of frames detected.
+
+Usage:
+    python benchmarks/bench_ambulance_screen.py [--videos data/test_video.mp4 data/video4.mp4]
+                                                [--plant-every 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from ambulance_detection import (StrictAmbulanceDetector, MIN_RED_AREA, RED_LOWER1, RED_UPPER1,
+                                 RED_LOWER2, RED_UPPER2)
+
+DEFAULT_VIDEOS = [os.path.join(BACKEND_DIR, "data", "test_video.mp4"),
+                  os.path.join(BACKEND_DIR, "data", "video4.mp4")]
+FRAME_SIZE = (1280, 720)
+
+
+def legacy_detect(detector, frame):
+    """The previous detect(), verbatim apart from calling the old verification"""
+    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+    red_mask1 = cv2.inRange(hsv, RED_LOWER1, RED_UPPER1)
+    red_mask2 = cv2.inRange(hsv, RED_LOWER2, RED_UPPER2)
+    red_mask = cv2.bitwise_or(red_mask1, red_mask2)
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5,5))
+    red_mask = cv2.morphologyEx(red_mask, cv2.MORPH_OPEN, kernel)
+    red_mask = cv2.morphologyEx(red_mask, cv2.MORPH_CLOSE, kernel)
+    contours, _ = cv2.findContours(red_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    for cnt in contours:
+        if cv2.contourArea(cnt) < MIN_RED_AREA:
+            continue
+        x, y, w, h = cv2.boundingRect(cnt)
+        # Without hsv/red_mask verify_ambulance converts the ROI again, as before
+        if detector.verify_ambulance(frame, x, y, w, h):
+            return True
+    return False
+
+
+def plant_ambulance(frame, rng):
+    """Paste a red box with a white cross at a random position"""
+    w, h = 220, 110
+    x = int(rng.integers(0, frame.shape[1] - w))
+    y = int(rng.integers(0, frame.shape[0] - h))
+    cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 0, 230), -1)
+    cx, cy = x + w // 2, y + h // 2
+    cv2.rectangle(frame, (cx - 30, cy - 8), (cx + 30, cy + 8), (255, 255, 255), -1)
+    cv2.rectangle(frame, (cx - 8, cy - 30), (cx + 8, cy + 30), (255, 255, 255), -1)
+
+
+def load_frames(video_paths, plant_every):
+    rng = np.random.default_rng(0)
+    frames = []
+    for video_path in video_paths:
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            print(f"Error opening video file {video_path}")
+            continue
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frame = cv2.resize(frame, FRAME_SIZE)
+            if plant_every and len(frames) % plant_every == 0:
+                plant_ambulance(frame, rng)
+            frames.append(frame)
+        cap.release()
+    return frames
+
+
+def time_pipeline(detect, frames):
+    detected = 0
+    start = time.perf_counter()
+    for frame in frames:
+        detected += bool(detect(frame))
+    return len(frames) / (time.perf_counter() - start), detected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--videos", nargs="+", default=DEFAULT_VIDEOS)
+    parser.add_argument("--plant-every", type=int, default=5, help="0 to use the clips unmodified")
+    args = parser.parse_args()
+
+    frames = load_frames(args.videos, args.plant_every)
+    if not frames:
+        return
+    print(f"{len(frames)} frames at {FRAME_SIZE[0]}x{FRAME_SIZE[1]}")
+
+    full_res = StrictAmbulanceDetector(source=None, screen_scale=1)
+    screened = StrictAmbulanceDetector(source=None)
+    pipelines = [
+        ("legacy", lambda frame: legacy_detect(full_res, frame)),
+        ("full-res", full_res.detect),
+        ("screened", screened.detect),
+    ]
+
+    print(f"\n{'pipeline':<10} {'FPS':>8} {'detected':>9}")
+    for name, detect in pipelines:
+        fps, detected = time_pipeline(detect, frames)
+        print(f"{name:<10} {fps:>8.1f} {detected:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Emergency arbitration throughput: per-frame linear min() vs EmergencyArbiter heaps
+
+Emergency requests arrive as a Poisson stream at random approaches of many
+four-way junctions, each vehicle stays until it is cleared (exponential
+dwell time), and every junction is re-arbitrated at --tick-rate Hz. Both
+variants process the same event stream:
+
+    linear   - determine_priority() from edge-cases/emergency_priority_demo.py:
+               min() over every active vehicle of a junction on every tick,
+               list.remove() on clear
+    arbiter  - EmergencyArbiter: heap insert/clear, decide() only on junctions
+               that changed or hold a grant
+
+Reported: wall time for the simulated period and the arrival rate each
+variant sustains (arrivals processed per wall-clock second).
+
+Usage:
+    python benchmarks/bench_arbitration.py [--rates 1000 5000 20000] [--junctions 1000] [--seconds 10]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from emergency_arbitration import EmergencyArbiter
+
+APPROACHES = 'ABCD'
+CONFLICTS = {'A': 'CD', 'B': 'CD', 'C': 'AB', 'D': 'AB'}
+
+
+class Vehicle:
+    __slots__ = ("lane", "priority", "arrival_time")
+
+    def __init__(self, lane, priority, arrival_time):
+        self.lane = lane
+        self.priority = priority
+        self.arrival_time = arrival_time
+
+
+def determine_priority(vehicles):
+    """The demo's per-frame selection"""
+    if not vehicles:
+        return None
+    return min(vehicles, key=lambda x: (x.priority, x.arrival_time))
+
+
+def make_events(rate, seconds, junctions, mean_dwell, seed=0):
+    """Arrival time, junction, approach, priority and clear time of every request"""
+    rng = np.random.default_rng(seed)
+    count = rng.poisson(rate * seconds)
+    arrivals = np.sort(rng.uniform(0, seconds, count))
+    return {
+        'arrival': arrivals,
+        'junction': rng.integers(junctions, size=count),
+        'approach': rng.integers(len(APPROACHES), size=count),
+        'priority': rng.integers(1, 6, size=count),
+        'clear': arrivals + rng.exponential(mean_dwell, count),
+    }
+
+
+def run_linear(events, junctions, seconds, tick):
+    vehicles = [[] for _ in range(junctions)]
+    handles = [None] * len(events['arrival'])
+    clear_order = np.argsort(events['clear'])
+    arrival = events['arrival'].tolist()
+    junction = events['junction'].tolist()
+    approach = events['approach'].tolist()
+    priority = events['priority'].tolist()
+    clear = events['clear'][clear_order].tolist()
+    clear_order = clear_order.tolist()
+
+    start = time.perf_counter()
+    next_arrival = next_clear = 0
+    for step in range(1, int(seconds / tick) + 1):
+        now = step * tick
+        while next_arrival < len(arrival) and arrival[next_arrival] <= now:
+            i = next_arrival
+            handles[i] = Vehicle(APPROACHES[approach[i]], priority[i], arrival[i])
+            vehicles[junction[i]].append(handles[i])
+            next_arrival += 1
+        while next_clear < len(clear) and clear[next_clear] <= now:
+            i = clear_order[next_clear]
+            if handles[i] is not None:
+                vehicles[junction[i]].remove(handles[i])
+            next_clear += 1
+        for junction_vehicles in vehicles:
+            if junction_vehicles:
+                determine_priority(junction_vehicles)
+    return time.perf_counter() - start, next_arrival
+
+
+def run_arbiter(events, junctions, seconds, tick):
+    arbiter = EmergencyArbiter(request_ttl=3600)
+    names = list(range(junctions))
+    for name in names:
+        arbiter.add_junction(name, APPROACHES, conflicts=CONFLICTS, now=0.0)
+    handles = [None] * len(events['arrival'])
+    clear_order = np.argsort(events['clear'])
+    arrival = events['arrival'].tolist()
+    junction = events['junction'].tolist()
+    approach = events['approach'].tolist()
+    priority = events['priority'].tolist()
+    clear = events['clear'][clear_order].tolist()
+    clear_order = clear_order.tolist()
+
+    start = time.perf_counter()
+    next_arrival = next_clear = 0
+    for step in range(1, int(seconds / tick) + 1):
+        now = step * tick
+        while next_arrival < len(arrival) and arrival[next_arrival] <= now:
+            i = next_arrival
+            handles[i] = arbiter.request(junction[i], APPROACHES[approach[i]], priority[i], arrival_time=arrival[i])
+            next_arrival += 1
+        while next_clear < len(clear) and clear[next_clear] <= now:
+            i = clear_order[next_clear]
+            if handles[i] is not None:
+                arbiter.clear(handles[i])
+            next_clear += 1
+        arbiter.decide(now)
+    return time.perf_counter() - start, next_arrival
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rates", type=float, nargs='+', default=[1000, 5000, 20000], help="Arrivals per second")
+    parser.add_argument("--junctions", type=int, default=1000)
+    parser.add_argument("--seconds", type=float, default=10.0, help="Simulated seconds per run")
+    parser.add_argument("--tick-rate", type=float, default=10.0, help="Arbitration rounds per second")
+    parser.add_argument("--dwell", type=float, default=20.0, help="Mean seconds a vehicle stays active")
+    args = parser.parse_args()
+
+    tick = 1 / args.tick_rate
+    print(f"{args.junctions} junctions, {args.tick_rate:g} Hz, mean dwell {args.dwell:g}s, "
+          f"{args.seconds:g}s simulated\n")
+    print(f"{'arrivals/s':>10} {'variant':<8} {'wall s':>8} {'sustained arrivals/s':>21} {'real time':>10}")
+    for rate in args.rates:
+        events = make_events(rate, args.seconds, args.junctions, args.dwell)
+        for name, run in (('linear', run_linear), ('arbiter', run_arbiter)):
+            wall, arrivals = run(events, args.junctions, args.seconds, tick)
+            print(f"{rate:>10g} {name:<8} {wall:>8.2f} {arrivals / wall:>21.0f} "
+                  f"{'yes' if wall <= args.seconds else 'no':>10}")
+
+
+if __name__ == "__main__":
+    main()
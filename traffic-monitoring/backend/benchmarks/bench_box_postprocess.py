@@ -0,0 +1,90 @@
+"""
+Microbenchmark box post-processing on dense frames
+
+Compares the per-box Python loop the detectors used to run over
+results.boxes.data.tolist() (class filter, auto-rickshaw size gating and
+per-class counting) with the vectorized box_postprocess.postprocess_boxes,
+on synthetic frames with 200+ boxes. Both paths must agree on the counts.
+
+Usage:
+    python benchmarks/bench_box_postprocess.py [--boxes 200 500 1000] [--repeats 2000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from box_postprocess import postprocess_boxes
+
+# Same classes and auto-rickshaw gate as VideoTrafficDetector
+VEHICLE_CLASSES = {2: "car", 3: "motorcycle", 5: "bus", 7: "truck",
+                   0: "person", 1: "bicycle", 6: "train", 8: "auto_rickshaw"}
+AUTO_GATE = (5000, 15000, 1.2)
+
+
+def make_boxes(num_boxes, rng, width=1920, height=1080):
+    """Random (N, 6) box tensor over the first 20 COCO classes"""
+    x1 = rng.uniform(0, width - 200, num_boxes)
+    y1 = rng.uniform(0, height - 200, num_boxes)
+    w = rng.uniform(10, 250, num_boxes)
+    h = rng.uniform(10, 200, num_boxes)
+    conf = rng.uniform(0.25, 1.0, num_boxes)
+    cls = rng.integers(0, 20, num_boxes)
+    return np.stack([x1, y1, x1 + w, y1 + h, conf, cls], axis=1).astype(np.float32)
+
+
+def legacy_postprocess(data):
+    """The old per-box loop (without drawing)"""
+    frame_counts = {vtype: 0 for vtype in VEHICLE_CLASSES.values()}
+    min_area, max_area, min_ratio = AUTO_GATE
+    for detection in data.tolist():
+        x1, y1, x2, y2, conf, class_id = detection
+        x1, y1, x2, y2, class_id = map(int, [x1, y1, x2, y2, class_id])
+        vehicle_type = VEHICLE_CLASSES.get(class_id)
+        if vehicle_type:
+            if class_id == 8:
+                width, height = x2 - x1, y2 - y1
+                area = width * height
+                ratio = width / height if height > 0 else 0
+                if not (min_area <= area <= max_area and ratio >= min_ratio):
+                    continue
+            frame_counts[vehicle_type] += 1
+    return frame_counts
+
+
+def vectorized_postprocess(data):
+    detections = postprocess_boxes(data, VEHICLE_CLASSES.keys(), size_gates={8: AUTO_GATE})
+    return detections.counts_by_name(VEHICLE_CLASSES)
+
+
+def time_it(fn, data, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn(data)
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--boxes", type=int, nargs="+", default=[200, 500, 1000])
+    parser.add_argument("--repeats", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"\n{'boxes':>6} {'loop us':>10} {'numpy us':>10} {'speedup':>8}")
+    for num_boxes in args.boxes:
+        data = make_boxes(num_boxes, rng)
+        assert legacy_postprocess(data) == vectorized_postprocess(data), "Counts differ"
+
+        loop_time = time_it(legacy_postprocess, data, args.repeats)
+        numpy_time = time_it(vectorized_postprocess, data, args.repeats)
+        print(f"{num_boxes:>6} {loop_time * 1e6:>10.1f} {numpy_time * 1e6:>10.1f} {loop_time / numpy_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
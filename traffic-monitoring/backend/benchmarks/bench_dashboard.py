@@ -0,0 +1,128 @@
+"""
+Dashboard FPS of TrafficSystem.render: matplotlib chart, cached pygame chart, dirty-rect rendering
+
+The dashboard is rendered off-screen (SDL dummy video driver), scrolled to
+the bottom so the traffic chart is visible, for four simulated lanes. Every
+--update-every frames a lane gets a new result, which invalidates the cached
+chart the way a phase switch does. Variants:
+
+    matplotlib  - full redraw every frame with the previous render_traffic_chart
+                  (a new figure drawn through FigureCanvasAgg per frame)
+    cached      - full redraw every frame, chart surface cached
+    dirty       - only changed panels redrawn and pushed to the display
+
+Usage:
+    python benchmarks/bench_dashboard.py [--frames 300] [--update-every 30]
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import pygame
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import traffic_detectionn as td
+
+
+def matplotlib_render_traffic_chart(self, surface, x, y, width=500, height=240):
+    """The previous render_traffic_chart, re-plotting through matplotlib on every call"""
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    y = y - td.scroll_y
+    if y + height < 0 or y > td.SCREEN_HEIGHT:
+        return
+
+    fig, ax = plt.subplots(figsize=(width/100, height/100), dpi=100)
+    fig.patch.set_alpha(0.0)
+    ax.set_facecolor((0.2, 0.2, 0.2, 0.7))
+
+    lanes, counts, times = [], [], []
+    for lane_idx in range(len(self.lanes)):
+        latest = self.lane_history[lane_idx].last()
+        if latest is not None:
+            lanes.append(f"Lane {lane_idx+1}")
+            counts.append(latest['vehicle_count'])
+            times.append(latest['green_time'])
+    if not lanes:
+        return
+
+    x_pos = np.arange(len(lanes))
+    width_bar = 0.35
+    ax.bar(x_pos - width_bar/2, counts, width_bar, label='Vehicle Count', color='skyblue')
+    ax.bar(x_pos + width_bar/2, times, width_bar, label='Green Time (s)', color='lightgreen')
+    ax.set_title('Latest Traffic Data by Lane', color='white')
+    ax.set_ylabel('Count / Time', color='white')
+    ax.set_xticks(x_pos)
+    ax.set_xticklabels(lanes, color='white')
+    ax.tick_params(axis='y', colors='white')
+    ax.legend(facecolor=(0.2, 0.2, 0.2, 0.7), labelcolor='white')
+    ax.grid(True, linestyle='--', alpha=0.3)
+
+    canvas = FigureCanvasAgg(fig)
+    canvas.draw()
+    raw_data = canvas.get_renderer().tostring_argb()
+    surf = pygame.image.fromstring(raw_data, canvas.get_width_height(), "ARGB")
+    surface.blit(surf, (x, y))
+    plt.close(fig)
+
+
+def new_result(system, rng):
+    """Give a random lane a new detection result, as at the end of its phase"""
+    lane_index = int(rng.integers(len(system.lanes)))
+    system.lanes[lane_index].vehicle_count = int(rng.integers(0, 40))
+    system.apply_lane_result(lane_index)
+
+
+def measure_fps(system, screen, frames, update_every, full_redraw, seed=0):
+    rng = np.random.default_rng(seed)
+    for i in range(len(system.lanes)):
+        new_result(system, rng)
+
+    # Scroll to the bottom so the chart is on screen
+    system.render(screen, full_redraw=True)
+    td.scroll_y = max(0, td.scrollable_surface_height - td.SCREEN_HEIGHT)
+
+    start = time.perf_counter()
+    for frame in range(frames):
+        if update_every and frame % update_every == 0:
+            new_result(system, rng)
+        system.render(screen, full_redraw)
+    return frames / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--update-every", type=int, default=30, help="Frames between new lane results (0: never)")
+    args = parser.parse_args()
+
+    screen = pygame.display.set_mode((td.SCREEN_WIDTH, td.SCREEN_HEIGHT))
+    system = td.TrafficSystem(render=False, lane_sources=[None] * 4)
+    try:
+        results = {}
+        native_chart = td.TrafficSystem.render_traffic_chart
+        td.TrafficSystem.render_traffic_chart = matplotlib_render_traffic_chart
+        try:
+            results['matplotlib'] = measure_fps(system, screen, args.frames, args.update_every, True)
+        finally:
+            td.TrafficSystem.render_traffic_chart = native_chart
+        results['cached'] = measure_fps(system, screen, args.frames, args.update_every, True)
+        results['dirty'] = measure_fps(system, screen, args.frames, args.update_every, False)
+    finally:
+        system.close()
+        pygame.quit()
+
+    print(f"\n{'variant':<12} {'dashboard FPS':>14}")
+    for name, fps in results.items():
+        print(f"{name:<12} {fps:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
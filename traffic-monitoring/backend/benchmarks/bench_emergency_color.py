@@ -0,0 +1,115 @@
+"""
+Microbenchmark the ambulance color check on frames with many candidate vehicles
+
+Compares the per-box check VideoTrafficDetector used to run (HSV conversion,
+fresh HSV bound arrays, three inRange calls and np.sum over each box region)
+with box_postprocess.ColorCoverage: one HSV conversion of the area spanned
+by the candidates plus integral image lookups once the boxes overlap, shared
+bounds and countNonZero per box otherwise. Frames are synthetic 1080p street
+scenes with white/red "ambulances" among the boxes; both paths must flag the
+same boxes.
+
+Usage:
+    python benchmarks/bench_emergency_color.py [--boxes 50 100 200] [--repeats 20]
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from box_postprocess import ColorCoverage
+
+# Same bounds and thresholds as VideoTrafficDetector
+EMERGENCY_COLORS = {
+    "white": [(np.array([0, 0, 200], dtype=np.uint8), np.array([180, 30, 255], dtype=np.uint8))],
+    "red": [(np.array([0, 100, 100], dtype=np.uint8), np.array([10, 255, 255], dtype=np.uint8)),
+            (np.array([160, 100, 100], dtype=np.uint8), np.array([180, 255, 255], dtype=np.uint8))],
+}
+WHITE_RATIO, RED_RATIO, CONFIDENCE = 0.4, 0.05, 0.65
+
+
+def make_scene(num_boxes, rng, width=1920, height=1080):
+    """Noisy frame with num_boxes candidate vehicles on the road, a third of them painted as ambulances"""
+    frame = rng.integers(0, 180, (height, width, 3), dtype=np.uint8)
+    boxes = []
+    for i in range(num_boxes):
+        w = int(rng.integers(150, 300))
+        h = int(rng.integers(70, w // 1.5))
+        x = int(rng.integers(0, width - w))
+        y = int(rng.integers(height * 2 // 5, height - h))  # On the road, below the horizon
+        boxes.append((x, y, x + w, y + h))
+        if i % 3 == 0:
+            cv2.rectangle(frame, (x, y), (x + w, y + h), (235, 235, 235), -1)
+            cv2.rectangle(frame, (x + w // 3, y + h // 3), (x + w // 2, y + h // 2), (0, 0, 220), -1)
+    confidences = rng.uniform(0.3, 0.7, num_boxes)
+    return frame, np.array(boxes, dtype=np.int32), confidences
+
+
+def legacy_check(frame, boxes, confidences):
+    """The old per-box color analysis"""
+    flags = []
+    for (x1, y1, x2, y2), confidence in zip(boxes.tolist(), confidences.tolist()):
+        vehicle_region = frame[y1:y2, x1:x2]
+        if vehicle_region.size == 0:
+            flags.append(False)
+            continue
+        hsv = cv2.cvtColor(vehicle_region, cv2.COLOR_BGR2HSV)
+        white_lower = np.array([0, 0, 200])
+        white_upper = np.array([180, 30, 255])
+        red_lower1 = np.array([0, 100, 100])
+        red_upper1 = np.array([10, 255, 255])
+        red_lower2 = np.array([160, 100, 100])
+        red_upper2 = np.array([180, 255, 255])
+        white_mask = cv2.inRange(hsv, white_lower, white_upper)
+        red_mask1 = cv2.inRange(hsv, red_lower1, red_upper1)
+        red_mask2 = cv2.inRange(hsv, red_lower2, red_upper2)
+        red_mask = cv2.bitwise_or(red_mask1, red_mask2)
+        white_percent = np.sum(white_mask > 0) / white_mask.size
+        red_percent = np.sum(red_mask > 0) / red_mask.size
+        flags.append((white_percent > WHITE_RATIO and red_percent > RED_RATIO) or confidence > CONFIDENCE)
+    return np.array(flags, dtype=bool)
+
+
+def integral_check(frame, boxes, confidences):
+    """Same decision through ColorCoverage, as VideoTrafficDetector makes it"""
+    region = (int(boxes[:, 0].min()), int(boxes[:, 1].min()), int(boxes[:, 2].max()), int(boxes[:, 3].max()))
+    coverage = ColorCoverage(frame, EMERGENCY_COLORS, region)
+    shares = coverage.fractions(boxes)
+    has_colors = (shares["white"] > WHITE_RATIO) & (shares["red"] > RED_RATIO)
+    return (has_colors | (confidences > CONFIDENCE)) & (coverage.areas(boxes) > 0)
+
+
+def time_it(fn, args, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn(*args)
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--boxes", type=int, nargs="+", default=[50, 100, 200])
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"\n{'boxes':>6} {'per-box ms':>11} {'integral ms':>12} {'speedup':>8} {'flagged':>8}")
+    for num_boxes in args.boxes:
+        scene = make_scene(num_boxes, rng)
+        expected = legacy_check(*scene)
+        assert np.array_equal(expected, integral_check(*scene)), "Flags differ"
+
+        legacy_time = time_it(legacy_check, scene, args.repeats)
+        integral_time = time_it(integral_check, scene, args.repeats)
+        print(f"{num_boxes:>6} {legacy_time * 1e3:>11.2f} {integral_time * 1e3:>12.2f} "
+              f"{legacy_time / integral_time:>7.1f}x {int(expected.sum()):>8}")
+
+
+if __name__ == "__main__":
+    main()
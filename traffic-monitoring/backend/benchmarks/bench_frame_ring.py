@@ -0,0 +1,136 @@
+"""
+Benchmark SharedFrameRing against copying and pickling frames between processes
+
+For each lane count, a capture loop produces 1080p BGR frames and a consumer
+process (standing in for a detector/renderer) touches every frame it is
+handed. Two transports are compared:
+
+    copy  - the old path: frame.copy() for annotation, another .copy() for
+            display, then the array is pickled through a multiprocessing queue
+    ring  - the frame is written once into a SharedFrameRing slot and only
+            (lane, seq) crosses the process boundary; the consumer reads a view
+
+Reported per transport: mean and p95 capture-to-consumer latency per frame,
+and peak Python-heap memory allocated on the capture side (tracemalloc).
+
+Usage:
+    python benchmarks/bench_frame_ring.py [--lanes 4 8 16] [--frames 20]
+"""
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from frame_ring import SharedFrameRing
+
+FRAME_SHAPE = (1080, 1920, 3)
+RING_DEPTH = 3
+
+
+def copy_consumer(frame_queue, ack_queue):
+    """Receive pickled frames and acknowledge each one"""
+    while True:
+        message = frame_queue.get()
+        if message is None:
+            break
+        sent_at, frame = message
+        _ = int(frame[0, 0, 0]) + int(frame[-1, -1, -1])
+        ack_queue.put(time.perf_counter() - sent_at)
+
+
+def ring_consumer(ring_name, num_lanes, frame_queue, ack_queue):
+    """Read frames straight out of the shared ring and acknowledge each one"""
+    ring = SharedFrameRing.attach(ring_name, num_lanes, RING_DEPTH, FRAME_SHAPE)
+    try:
+        while True:
+            message = frame_queue.get()
+            if message is None:
+                break
+            sent_at, lane, seq = message
+            _, frame = ring.read(lane, seq)
+            if frame is not None:
+                _ = int(frame[0, 0, 0]) + int(frame[-1, -1, -1])
+            ack_queue.put(time.perf_counter() - sent_at)
+    finally:
+        ring.close()
+
+
+def run_copy(source_frames, num_frames):
+    """Old path: two copies per frame plus a pickle round-trip"""
+    ctx = mp.get_context("spawn")
+    frame_queue, ack_queue = ctx.Queue(maxsize=4), ctx.Queue()
+    consumer = ctx.Process(target=copy_consumer, args=(frame_queue, ack_queue))
+    consumer.start()
+
+    latencies = []
+    tracemalloc.start()
+    for _ in range(num_frames):
+        for lane, frame in enumerate(source_frames):
+            start = time.perf_counter()
+            annotated_frame = frame.copy()
+            current_frame = annotated_frame.copy()
+            frame_queue.put((start, current_frame))
+            latencies.append(ack_queue.get())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    frame_queue.put(None)
+    consumer.join()
+    return latencies, peak, 0
+
+
+def run_ring(source_frames, num_frames):
+    """New path: one write into shared memory, only (lane, seq) is sent"""
+    num_lanes = len(source_frames)
+    ring = SharedFrameRing(num_lanes, RING_DEPTH, FRAME_SHAPE)
+    ctx = mp.get_context("spawn")
+    frame_queue, ack_queue = ctx.Queue(maxsize=4), ctx.Queue()
+    consumer = ctx.Process(target=ring_consumer, args=(ring.name, num_lanes, frame_queue, ack_queue))
+    consumer.start()
+
+    latencies = []
+    tracemalloc.start()
+    for _ in range(num_frames):
+        for lane, frame in enumerate(source_frames):
+            start = time.perf_counter()
+            seq = ring.write(lane, frame)
+            frame_queue.put((start, lane, seq))
+            latencies.append(ack_queue.get())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    frame_queue.put(None)
+    consumer.join()
+    footprint = ring._shm.size
+    ring.close()
+    return latencies, peak, footprint
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lanes", type=int, nargs="+", default=[4, 8, 16])
+    parser.add_argument("--frames", type=int, default=20, help="Frames per lane")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    mb = 1024 * 1024
+
+    print(f"\n{'lanes':>6} {'transport':>10} {'mean ms':>9} {'p95 ms':>9} {'peak heap MB':>13} {'shared MB':>10}")
+    for num_lanes in args.lanes:
+        source_frames = [rng.integers(0, 255, FRAME_SHAPE, dtype=np.uint8) for _ in range(num_lanes)]
+        for name, runner in (("copy", run_copy), ("ring", run_ring)):
+            latencies, peak, footprint = runner(source_frames, args.frames)
+            latencies_ms = np.array(latencies) * 1000
+            print(f"{num_lanes:>6} {name:>10} {latencies_ms.mean():>9.2f} "
+                  f"{np.percentile(latencies_ms, 95):>9.2f} {peak / mb:>13.1f} {footprint / mb:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Count the detector runs AdaptiveFrameSampler saves on the bundled lane videos
+
+Each video is decoded once and fed through the sampler (no YOLO needed). The
+adaptive inference count is compared with the fixed half-FPS interval the
+dashboard used before (rounded like the sampler's intervals, the baseline
+the sampler must not exceed), with fixed-rate sampling at the sampler's max
+rate (same responsiveness to motion), and with running YOLO on every frame.
+The per-frame cost of the motion score itself is reported too. The default
+rates are TrafficSystem's.
+
+The bundled clips are busy traffic throughout, so the sampler runs at its
+max rate on them and saves nothing against half-FPS at a 2 Hz cap. Two
+synthetic scenes built from the first video's first frame show where
+skipping pays: 'static' (the empty background with sensor noise) and
+'sparse' (one vehicle-sized block crossing for 3 s every 20 s).
+
+Usage:
+    python benchmarks/bench_frame_sampler.py [--videos data/test_video.mp4 data/video4.mp4]
+                                             [--min-rate 0.5] [--max-rate 2] [--synthetic-seconds 60]
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from frame_sampler import AdaptiveFrameSampler
+
+DEFAULT_VIDEOS = [os.path.join(BACKEND_DIR, "data", "test_video.mp4"),
+                  os.path.join(BACKEND_DIR, "data", "video4.mp4")]
+
+
+def video_frames(video_path):
+    """(fps, frame iterator) of a video file, or None if it cannot be opened"""
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        print(f"Error opening video file {video_path}")
+        return None
+
+    def frames():
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield frame
+        cap.release()
+    return cap.get(cv2.CAP_PROP_FPS), frames()
+
+
+def synthetic_frames(background, fps, seconds, vehicle_every=None, crossing_seconds=3.0, seed=0):
+    """
+    Frames of a fixed camera over background with sensor noise
+
+    Args:
+        vehicle_every: Seconds between vehicles crossing the frame (None: static scene)
+        crossing_seconds: Time one vehicle takes to cross
+    """
+    rng = np.random.default_rng(seed)
+    noise = [rng.integers(-4, 5, background.shape, dtype=np.int16) for _ in range(8)]
+    base = background.astype(np.int16)
+    height, width = background.shape[:2]
+    vehicle_w, vehicle_h = width // 5, height // 5
+    for i in range(int(seconds * fps)):
+        frame = np.clip(base + noise[i % len(noise)], 0, 255).astype(np.uint8)
+        if vehicle_every is not None:
+            t = (i / fps) % vehicle_every
+            if t < crossing_seconds:
+                x = int(t / crossing_seconds * (width + vehicle_w)) - vehicle_w
+                frame[height // 2:height // 2 + vehicle_h, max(x, 0):max(x + vehicle_w, 0)] = (40, 40, 200)
+        yield frame
+
+
+def run(fps, frames, min_rate, max_rate):
+    sampler = AdaptiveFrameSampler(fps, min_rate=min_rate, max_rate=max_rate)
+    score_time = 0.0
+    for frame in frames:
+        start = time.perf_counter()
+        sampler.should_infer(frame)
+        score_time += time.perf_counter() - start
+    return sampler, score_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--videos", nargs="+", default=DEFAULT_VIDEOS)
+    parser.add_argument("--min-rate", type=float, default=0.5)
+    parser.add_argument("--max-rate", type=float, default=2.0)
+    parser.add_argument("--synthetic-seconds", type=float, default=60.0,
+                        help="Length of the synthetic static and sparse scenes (0: skip them)")
+    args = parser.parse_args()
+
+    sources = []
+    for video_path in args.videos:
+        opened = video_frames(video_path)
+        if opened is not None:
+            sources.append((os.path.basename(video_path), *opened))
+    if args.synthetic_seconds > 0 and args.videos:
+        opened = video_frames(args.videos[0])
+        if opened is not None:
+            fps, frames = opened
+            background = next(frames)
+            sources.append(("static", fps, synthetic_frames(background, fps, args.synthetic_seconds)))
+            sources.append(("sparse", fps, synthetic_frames(background, fps, args.synthetic_seconds,
+                                                            vehicle_every=20.0)))
+
+    print(f"\n{'video':<16} {'frames':>7} {'adaptive':>9} {'half fps':>9} {'max rate':>9} "
+          f"{'saved vs half':>14} {'saved vs max':>13} {'saved vs all':>13} {'score us':>9}")
+    for name, fps, frames in sources:
+        sampler, score_time = run(fps, frames, args.min_rate, args.max_rate)
+        half_fps_interval = max(1, int(round(sampler.fps / 2)))
+        fixed_max = sampler.inferences + sampler.saved_versus(sampler.min_interval)
+        fixed_half = sampler.inferences + sampler.saved_versus(half_fps_interval)
+        print(f"{name:<16} {sampler.frames_seen:>7} {sampler.inferences:>9} "
+              f"{fixed_half:>9} {fixed_max:>9} "
+              f"{sampler.saved_versus(half_fps_interval) / fixed_half:>13.0%} "
+              f"{sampler.saved_versus(sampler.min_interval) / fixed_max:>12.0%} "
+              f"{sampler.saved_versus(1) / sampler.frames_seen:>12.0%} "
+              f"{score_time / sampler.frames_seen * 1e6:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
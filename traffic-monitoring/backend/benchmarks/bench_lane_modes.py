@@ -0,0 +1,64 @@
+"""
+Benchmark TrafficDetector.process_all_lanes across its lane processing modes
+
+Compares per-process, threaded, batched and worker-pool throughput for 4, 8 and 16 lanes
+using the test images in backend/data (cycled to fill the lanes).
+
+Usage:
+    python benchmarks/bench_lane_modes.py [--repeats 3] [--lanes 4 8 16]
+"""
+import argparse
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from traffic_detection import TrafficDetector, get_test_frames
+
+MODES = ["process", "threaded", "batched", "pool"]
+
+
+def build_frames(base_frames, num_lanes):
+    """Cycle the test images so every lane has a frame"""
+    images = list(base_frames.values())
+    return {lane_id: images[(lane_id - 1) % len(images)] for lane_id in range(1, num_lanes + 1)}
+
+
+def time_mode(detector, frames, mode, repeats):
+    """Return the mean wall time of one process_all_lanes call in the given mode"""
+    # Warm-up run so model loading and CUDA/CPU kernel setup are not measured
+    detector.process_all_lanes(frames, mode=mode)
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        results = detector.process_all_lanes(frames, mode=mode)
+    elapsed = (time.perf_counter() - start) / repeats
+
+    assert len(results) == len(frames), f"{mode}: expected {len(frames)} results, got {len(results)}"
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--lanes", type=int, nargs="+", default=[4, 8, 16])
+    parser.add_argument("--modes", nargs="+", default=MODES, choices=MODES)
+    args = parser.parse_args()
+
+    detector = TrafficDetector()
+    base_frames = get_test_frames()
+
+    print(f"\n{'lanes':>6} {'mode':>10} {'cycle (s)':>10} {'lanes/s':>10}")
+    for num_lanes in args.lanes:
+        frames = build_frames(base_frames, num_lanes)
+        for mode in args.modes:
+            elapsed = time_mode(detector, frames, mode, args.repeats)
+            print(f"{num_lanes:>6} {mode:>10} {elapsed:>10.3f} {num_lanes / elapsed:>10.1f}")
+
+    detector.close_pool()
+
+
+if __name__ == "__main__":
+    main()
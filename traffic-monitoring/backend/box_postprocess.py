@@ -0,0 +1,199 @@
+import cv2
+import numpy as np
+
+
+class Detections:
+    """
+    Vehicle detections of one frame, stored as parallel NumPy arrays
+
+    Attributes:
+        boxes: int32 array (N, 4) of x1, y1, x2, y2 pixel coordinates
+        confidences: float32 array (N,) of detection confidences
+        class_ids: int64 array (N,) of YOLO class IDs
+        areas: int64 array (N,) of box areas in pixels
+        aspect_ratios: float64 array (N,) of width / height (0 for zero-height boxes)
+        counts: int64 array indexed by class ID with the number of kept boxes per class
+    """
+
+    __slots__ = ("boxes", "confidences", "class_ids", "areas", "aspect_ratios", "counts")
+
+    def __init__(self, boxes, confidences, class_ids, areas, aspect_ratios, counts):
+        self.boxes = boxes
+        self.confidences = confidences
+        self.class_ids = class_ids
+        self.areas = areas
+        self.aspect_ratios = aspect_ratios
+        self.counts = counts
+
+    def __len__(self):
+        return len(self.class_ids)
+
+    def count(self, class_id):
+        """Number of kept boxes of a class"""
+        return int(self.counts[class_id]) if class_id < len(self.counts) else 0
+
+    def counts_by_name(self, class_names):
+        """
+        Per-class counts keyed by name
+
+        Args:
+            class_names: Mapping of class ID -> name; every name gets an entry,
+                several IDs mapping to one name are summed
+        """
+        named = {name: 0 for name in class_names.values()}
+        for class_id, name in class_names.items():
+            named[name] += self.count(class_id)
+        return named
+
+
+def boxes_to_array(results):
+    """
+    Pull the raw (N, 6) box tensor out of an ultralytics Results object
+
+    Returns:
+        float32 array with columns x1, y1, x2, y2, confidence, class_id
+    """
+    data = results.boxes.data
+    if hasattr(data, "cpu"):
+        data = data.cpu().numpy()
+    return np.asarray(data, dtype=np.float32).reshape(-1, 6)
+
+
+def postprocess_boxes(data, vehicle_class_ids, size_gates=None):
+    """
+    Filter, measure and count YOLO boxes in one vectorized pass
+
+    Args:
+        data: (N, 6) array of x1, y1, x2, y2, confidence, class_id
+            (e.g. from boxes_to_array)
+        vehicle_class_ids: Class IDs to keep
+        size_gates: Optional {class_id: (min_area, max_area, min_ratio)}; boxes of
+            that class are only kept when min_area <= area <= max_area and
+            width / height >= min_ratio (used to weed out auto-rickshaw false
+            positives)
+
+    Returns:
+        Detections for the kept boxes, in their original order
+    """
+    data = np.asarray(data, dtype=np.float32).reshape(-1, 6)
+    vehicle_class_ids = np.fromiter(vehicle_class_ids, dtype=np.int64)
+    num_classes = int(vehicle_class_ids.max()) + 1 if len(vehicle_class_ids) else 0
+
+    # Coordinates are truncated to whole pixels before measuring, as when drawing
+    boxes = data[:, :4].astype(np.int32)
+    class_ids = data[:, 5].astype(np.int64)
+    widths = (boxes[:, 2] - boxes[:, 0]).astype(np.int64)
+    heights = (boxes[:, 3] - boxes[:, 1]).astype(np.int64)
+    areas = widths * heights
+    aspect_ratios = np.divide(widths, heights, out=np.zeros(len(widths)), where=heights > 0)
+
+    keep = np.isin(class_ids, vehicle_class_ids)
+    for class_id, (min_area, max_area, min_ratio) in (size_gates or {}).items():
+        gated = class_ids == class_id
+        passes = (areas >= min_area) & (areas <= max_area) & (aspect_ratios >= min_ratio)
+        keep &= ~gated | passes
+
+    kept_classes = class_ids[keep]
+    return Detections(
+        boxes=boxes[keep],
+        confidences=data[keep, 4],
+        class_ids=kept_classes,
+        areas=areas[keep],
+        aspect_ratios=aspect_ratios[keep],
+        counts=np.bincount(kept_classes, minlength=num_classes),
+    )
+
+
+class ColorCoverage:
+    """
+    Fraction of pixels within HSV color ranges for any box of a frame
+
+    When the boxes overlap enough that their total area exceeds the covered
+    region's by SHARED_HSV_OVERLAP, the region is converted to HSV once and each
+    color mask is summed into an integral image, so every box costs four
+    lookups. Otherwise the boxes are converted and masked one by one, which is
+    cheaper: building the integral images costs about 1.5x per pixel what
+    masking a box does. Both give identical pixel counts.
+    """
+
+    # Total box area / region area above which the shared HSV conversion pays off
+    # (measured with benchmarks/bench_emergency_color.py on 1080p frames)
+    SHARED_HSV_OVERLAP = 1.5
+
+    def __init__(self, frame, color_ranges, region=None):
+        """
+        Args:
+            frame: BGR frame
+            color_ranges: {name: [(lower, upper), ...]} HSV bounds; the ranges of
+                one name are combined (e.g. the two ends of the red hue circle)
+            region: Optional (x1, y1, x2, y2) part of the frame to cover; boxes
+                are clipped to it. Defaults to the whole frame
+        """
+        frame_h, frame_w = frame.shape[:2]
+        x1, y1, x2, y2 = region if region is not None else (0, 0, frame_w, frame_h)
+        self.region = (max(x1, 0), max(y1, 0), min(x2, frame_w), min(y2, frame_h))
+        x1, y1, x2, y2 = self.region
+
+        self.color_ranges = color_ranges
+        self.pixels = frame[y1:y2, x1:x2]
+        self._integrals = None
+
+    def _mask(self, hsv, name):
+        """0/255 mask of the pixels within any range of a color"""
+        ranges = self.color_ranges[name]
+        mask = cv2.inRange(hsv, *ranges[0])
+        for lower, upper in ranges[1:]:
+            cv2.bitwise_or(mask, cv2.inRange(hsv, lower, upper), mask)
+        return mask
+
+    def _integral_images(self):
+        if self._integrals is None:
+            hsv = cv2.cvtColor(self.pixels, cv2.COLOR_BGR2HSV)
+            # Sums of 0/255 masks fit in int32 up to ~8.4M pixels (a 4K frame)
+            depth = cv2.CV_32S if hsv.shape[0] * hsv.shape[1] * 255 < 2 ** 31 else cv2.CV_64F
+            self._integrals = {name: cv2.integral(self._mask(hsv, name), sdepth=depth)
+                               for name in self.color_ranges}
+        return self._integrals
+
+    def _clip(self, boxes):
+        """Boxes clipped to the region, in region coordinates, with their areas"""
+        rx1, ry1, rx2, ry2 = self.region
+        boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+        x1 = np.clip(boxes[:, 0], rx1, rx2) - rx1
+        y1 = np.clip(boxes[:, 1], ry1, ry2) - ry1
+        x2 = np.clip(boxes[:, 2], rx1, rx2) - rx1
+        y2 = np.clip(boxes[:, 3], ry1, ry2) - ry1
+        areas = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+        return x1, y1, x2, y2, areas
+
+    def areas(self, boxes):
+        """Pixel area of each box inside the covered region"""
+        return self._clip(boxes)[4]
+
+    def fractions(self, boxes):
+        """
+        Args:
+            boxes: (N, 4) array of x1, y1, x2, y2 frame coordinates
+
+        Returns:
+            {name: float array (N,)} fraction of each box within the color ranges
+            (0 for boxes that are empty after clipping)
+        """
+        x1, y1, x2, y2, areas = self._clip(boxes)
+        visible = areas > 0
+
+        if areas.sum() > self.SHARED_HSV_OVERLAP * self.pixels.shape[0] * self.pixels.shape[1]:
+            # Overlapping boxes: masking the region once is cheaper than per box
+            counts = {}
+            for name, integral in self._integral_images().items():
+                sums = integral[y2, x2] - integral[y1, x2] - integral[y2, x1] + integral[y1, x1]
+                counts[name] = np.where(visible, sums / 255.0, 0.0)
+        else:
+            counts = {name: np.zeros(len(areas)) for name in self.color_ranges}
+            for i in np.flatnonzero(visible):
+                box_hsv = cv2.cvtColor(self.pixels[y1[i]:y2[i], x1[i]:x2[i]], cv2.COLOR_BGR2HSV)
+                for name in self.color_ranges:
+                    counts[name][i] = cv2.countNonZero(self._mask(box_hsv, name))
+
+        return {name: np.divide(count, areas, out=np.zeros(len(areas)), where=visible)
+                for name, count in counts.items()}
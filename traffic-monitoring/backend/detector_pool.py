@@ -0,0 +1,353 @@
+import multiprocessing as mp
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Largest frame a slot can hold (1080p BGR)
+DEFAULT_MAX_FRAME_SHAPE = (1080, 1920, 3)
+
+
+def _worker_main(model_path, confidence, render, shm_name, slot_shape, task_queue, result_queue, max_batch):
+    """
+    Detector worker loop: loads the model once, then serves batches of lane frames
+
+    Each message is a list of (request_id, slot, frame_shape) tasks. The worker
+    reads the frames straight out of their shared memory slots, writes the
+    annotated frames back into the same slots (unless headless) and reports
+    the detections on the result queue.
+    """
+    from traffic_detection import TrafficDetector
+
+    # Spawned children share the parent's resource tracker, so attaching here
+    # does not take ownership of the block away from the pool
+    shm = shared_memory.SharedMemory(name=shm_name)
+    slots = np.ndarray(slot_shape, dtype=np.uint8, buffer=shm.buf)
+
+    detector, startup_error = None, None
+    try:
+        detector = TrafficDetector(model_path, confidence, render)
+    except Exception as e:
+        startup_error = f"Detector failed to load: {e}"
+
+    try:
+        while True:
+            message = task_queue.get()
+            if message is None:
+                break
+
+            # Drain whatever else is already waiting so a whole junction cycle
+            # goes through the model as one batch
+            pending = list(message)
+            stop = False
+            while len(pending) < max_batch:
+                try:
+                    message = task_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if message is None:
+                    stop = True
+                    break
+                pending.extend(message)
+
+            for start in range(0, len(pending), max_batch):
+                _run_batch(detector, startup_error, slots, pending[start:start + max_batch], result_queue)
+
+            if stop:
+                break
+    finally:
+        del slots
+        shm.close()
+
+
+def _run_batch(detector, startup_error, slots, tasks, result_queue):
+    """Run one forward pass over the tasks' frames and report each result"""
+    if detector is None:
+        for request_id, _, _ in tasks:
+            result_queue.put((request_id, None, startup_error))
+        return
+
+    frames = [slots[slot, :h, :w] for _, slot, (h, w, _) in tasks]
+    try:
+        analyzed = detector.analyze_frames(frames)
+    except Exception as e:
+        for request_id, _, _ in tasks:
+            result_queue.put((request_id, None, str(e)))
+        return
+
+    for (request_id, slot, (h, w, _)), (detections, processed_frame) in zip(tasks, analyzed):
+        rendered = processed_frame is not None
+        if rendered:
+            slots[slot, :h, :w] = processed_frame
+        detection = (detections, detector.has_ambulance(detections), rendered)
+        result_queue.put((request_id, detection, None))
+
+
+class DetectorPool:
+    """
+    Long-lived pool of detector processes fed through shared memory
+
+    Each worker loads the YOLO model once at startup. Lane frames are copied
+    into preallocated shared memory slots, so only a small task tuple crosses
+    the process boundary, and the workers batch whatever is queued into a
+    single forward pass.
+
+    Example:
+        with DetectorPool(num_workers=1) as pool:
+            futures = pool.submit_lanes(frames)
+            results = pool.collect(futures)
+    """
+
+    def __init__(self, model_path="yolov8n.pt", confidence=0.25, num_workers=1,
+                 num_slots=16, max_batch=16, max_frame_shape=DEFAULT_MAX_FRAME_SHAPE,
+                 render=True):
+        """
+        Start the worker processes
+
+        Args:
+            model_path: Path to the YOLO model weights
+            confidence: Confidence threshold for detections
+            num_workers: Number of detector processes (each holds one model)
+            num_slots: Number of frames that can be in flight at once
+            max_batch: Largest batch a worker will run in one forward pass
+            max_frame_shape: (height, width, channels) of the largest frame accepted
+            render: Return annotated frames; False returns only detections
+        """
+        self.max_frame_shape = tuple(max_frame_shape)
+        self.num_slots = num_slots
+        slot_shape = (num_slots,) + self.max_frame_shape
+
+        self._shm = shared_memory.SharedMemory(create=True, size=int(np.prod(slot_shape)))
+        self._slots = np.ndarray(slot_shape, dtype=np.uint8, buffer=self._shm.buf)
+
+        self._free_slots = queue.Queue()
+        for slot in range(num_slots):
+            self._free_slots.put(slot)
+
+        # Spawn rather than fork: forking a process that has torch threads running can deadlock
+        ctx = mp.get_context("spawn")
+        self._task_queue = ctx.Queue()
+        self._result_queue = ctx.Queue()
+        self._workers = [
+            ctx.Process(
+                target=_worker_main,
+                args=(model_path, confidence, render, self._shm.name, slot_shape,
+                      self._task_queue, self._result_queue, max_batch),
+                daemon=True
+            )
+            for _ in range(num_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._next_request_id = 0
+        self._closed = False
+        self.broken = None  # Reason the pool stopped accepting work (a worker died)
+        self.liveness_interval = 1.0  # Seconds between worker liveness checks while idle
+
+        self._collector = threading.Thread(target=self._collect_results, daemon=True)
+        self._collector.start()
+
+    def submit(self, lane_id, frame, timeout=None):
+        """
+        Queue one lane frame for detection
+
+        Blocks while every shared memory slot is in use.
+
+        Args:
+            lane_id: ID of the lane the frame belongs to
+            frame: BGR image (uint8, at most max_frame_shape)
+            timeout: Seconds to wait for a free slot (None waits forever)
+
+        Returns:
+            Future resolving to the same result dict as TrafficDetector.process_all_lanes
+        """
+        future, task = self._stage(lane_id, frame, timeout)
+        self._task_queue.put([task])
+        return future
+
+    def submit_lanes(self, frames, timeout=None):
+        """
+        Queue a frame for every lane as a single batch
+
+        Args:
+            frames: Dictionary of frames, with lane IDs as keys
+            timeout: Seconds to wait for each free slot
+
+        Returns:
+            Dictionary of futures, with lane IDs as keys
+        """
+        futures, tasks = {}, []
+        try:
+            for lane_id, frame in frames.items():
+                # More lanes than slots: send what is staged so the workers can free some up
+                if tasks and self._free_slots.empty():
+                    self._task_queue.put(tasks)
+                    tasks = []
+                futures[lane_id], task = self._stage(lane_id, frame, timeout)
+                tasks.append(task)
+        except BaseException:
+            # Lanes already sent finish normally and free their own slots
+            self._unstage(tasks)
+            raise
+        if tasks:
+            self._task_queue.put(tasks)
+        return futures
+
+    def _stage(self, lane_id, frame, timeout):
+        """Copy a frame into a free slot and register its future"""
+        if self._closed:
+            raise RuntimeError("DetectorPool is closed")
+        if self.broken:
+            raise RuntimeError(self.broken)
+
+        h, w = frame.shape[:2]
+        channels = frame.shape[2] if frame.ndim == 3 else 1
+        max_h, max_w, max_c = self.max_frame_shape
+        if frame.dtype != np.uint8 or h > max_h or w > max_w or channels != max_c:
+            raise ValueError(
+                f"Frame {frame.shape} {frame.dtype} does not fit a {self.max_frame_shape} uint8 slot"
+            )
+
+        try:
+            slot = self._free_slots.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError("No free frame slot in DetectorPool") from None
+
+        self._slots[slot, :h, :w] = frame.reshape(h, w, channels)
+
+        future = Future()
+        with self._pending_lock:
+            request_id = self._next_request_id
+            self._next_request_id += 1
+            self._pending[request_id] = (future, lane_id, slot, (h, w, channels))
+
+        return future, (request_id, slot, (h, w, channels))
+
+    def _unstage(self, tasks):
+        """Give back the slots and futures of tasks that were never sent to a worker"""
+        for request_id, slot, _ in tasks:
+            with self._pending_lock:
+                future = self._pending.pop(request_id)[0]
+            self._free_slots.put(slot)
+            future.cancel()
+
+    def collect(self, futures, timeout=None):
+        """
+        Wait for submitted lanes and gather their results
+
+        Args:
+            futures: Dictionary of futures from submit_lanes
+            timeout: Overall seconds to wait (None waits forever)
+
+        Returns:
+            results: Dictionary of results, with lane IDs as keys
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        results = {}
+        for lane_id, future in futures.items():
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            results[lane_id] = future.result(timeout=remaining)
+        return results
+
+    def process_all_lanes(self, frames, timeout=None):
+        """Submit every lane and wait for all of them (one inference round-trip)"""
+        return self.collect(self.submit_lanes(frames), timeout)
+
+    def _collect_results(self):
+        """Resolve futures as workers report back, then hand the slot back"""
+        last_check = time.monotonic()
+        while True:
+            try:
+                message = self._result_queue.get(timeout=self.liveness_interval)
+            except queue.Empty:
+                message = False
+            if time.monotonic() - last_check >= self.liveness_interval:
+                self._check_workers()
+                last_check = time.monotonic()
+            if message is False:
+                continue
+            if message is None:
+                break
+
+            request_id, detection, error = message
+            with self._pending_lock:
+                entry = self._pending.pop(request_id, None)
+            if entry is None:
+                continue  # Already failed by _check_workers
+            future, lane_id, slot, (h, w, channels) = entry
+
+            if error is not None:
+                self._free_slots.put(slot)
+                future.set_exception(RuntimeError(error))
+                continue
+
+            detections, has_ambulance, rendered = detection
+            # Copy out before the slot is reused for the next frame
+            processed_frame = self._slots[slot, :h, :w].copy() if rendered else None
+            self._free_slots.put(slot)
+
+            future.set_result({
+                'lane_id': lane_id,
+                'vehicles_count': len(detections),
+                'has_ambulance': has_ambulance,
+                'processed_frame': processed_frame,
+                'detections': detections,
+                'timestamp': time.time()
+            })
+
+    def _check_workers(self):
+        """
+        Fail every pending future once a worker process has died
+
+        Tasks share one queue, so the requests the dead worker had taken
+        cannot be told apart from the others: everything in flight fails and
+        the pool refuses new work (close it and start a new one).
+        """
+        if self._closed or self.broken:
+            return
+        dead = [worker for worker in self._workers if not worker.is_alive()]
+        if not dead:
+            return
+        self.broken = f"DetectorPool worker exited with code {dead[0].exitcode}"
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        for future, _, slot, _ in pending.values():
+            self._free_slots.put(slot)
+            future.set_exception(RuntimeError(self.broken))
+
+    def close(self):
+        """Stop the workers and release the shared memory"""
+        if self._closed:
+            return
+        self._closed = True
+
+        for _ in self._workers:
+            self._task_queue.put(None)
+        for worker in self._workers:
+            worker.join(timeout=10)
+            if worker.is_alive():
+                worker.terminate()
+
+        self._result_queue.put(None)
+        self._collector.join()
+
+        with self._pending_lock:
+            for future, _, _, _ in self._pending.values():
+                future.cancel()
+            self._pending.clear()
+
+        del self._slots
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
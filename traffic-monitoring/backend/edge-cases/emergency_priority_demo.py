@@ -1,9 +1,13 @@
 import pygame
 import time
 import os
+import sys
 from enum import Enum
 from dataclasses import dataclass
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from emergency_arbitration import EmergencyArbiter
+
 # Initialize pygame
 pygame.init()
 
@@ -58,11 +62,14 @@ class EmergencyVehicle:
         
         return img
 
-def determine_priority(vehicles):
-    """Returns the vehicle with highest priority"""
-    if not vehicles:
-        return None
-    return min(vehicles, key=lambda x: (x.vehicle_type.value, x.arrival_time))
+# Lanes A (bottom) and B (top) face each other and can share green, as can C and D
+LANE_CONFLICTS = {'A': 'CD', 'B': 'CD', 'C': 'AB', 'D': 'AB'}
+
+
+def add_vehicle(arbiter, requests, vehicle):
+    """Register a new vehicle with the arbiter"""
+    request = arbiter.request('J1', vehicle.lane, vehicle.vehicle_type, arrival_time=vehicle.arrival_time)
+    requests[request] = vehicle
 
 def draw_junction(screen):
     """Draw the traffic junction visualization"""
@@ -95,8 +102,8 @@ def draw_vehicles(screen, vehicles):
         pos = lane_positions[vehicle.lane]
         screen.blit(vehicle.image, (pos[0] - 60, pos[1] - 30))
 
-def draw_priority_indicator(screen, priority_vehicle):
-    """Highlight the priority vehicle"""
+def draw_priority_indicator(screen, priority_vehicle, green_lanes=()):
+    """Highlight the priority vehicle and the lanes given green"""
     if not priority_vehicle:
         return
         
@@ -117,7 +124,8 @@ def draw_priority_indicator(screen, priority_vehicle):
         'C': (150, 250),
         'D': (650, 250)
     }
-    pygame.draw.circle(screen, (0, 255, 0), signal_pos[priority_vehicle.lane], 20)
+    for lane in green_lanes or (priority_vehicle.lane,):
+        pygame.draw.circle(screen, (0, 255, 0), signal_pos[lane], 20)
 
 def draw_legend(screen):
     """Draw the color legend for vehicle types"""
@@ -140,6 +148,12 @@ def main():
         EmergencyVehicle('A', EmergencyType.AMBULANCE),
         EmergencyVehicle('C', EmergencyType.FIRE_TRUCK)
     ]
+    arbiter = EmergencyArbiter()
+    arbiter.add_junction('J1', 'ABCD', conflicts=LANE_CONFLICTS)
+    requests = {}  # EmergencyRequest -> EmergencyVehicle
+    for vehicle in active_vehicles:
+        add_vehicle(arbiter, requests, vehicle)
+    green_lanes, priority_vehicle = frozenset(), None
     
     running = True
     while running:
@@ -150,8 +164,9 @@ def main():
         draw_vehicles(screen, active_vehicles)
         
         # Determine and display priority
-        priority_vehicle = determine_priority(active_vehicles)
-        draw_priority_indicator(screen, priority_vehicle)
+        for green_lanes, reason, request in arbiter.decide().values():
+            priority_vehicle = requests.get(request)
+        draw_priority_indicator(screen, priority_vehicle, green_lanes)
         
         # Display information
         y_pos = 20
@@ -204,18 +219,26 @@ def main():
                 # Vehicle addition
                 elif event.key == pygame.K_1:
                     active_vehicles.append(EmergencyVehicle(current_lane, EmergencyType.AMBULANCE))
+                    add_vehicle(arbiter, requests, active_vehicles[-1])
                 elif event.key == pygame.K_2:
                     active_vehicles.append(EmergencyVehicle(current_lane, EmergencyType.ORGAN_TRANSPORT))
+                    add_vehicle(arbiter, requests, active_vehicles[-1])
                 elif event.key == pygame.K_3:
                     active_vehicles.append(EmergencyVehicle(current_lane, EmergencyType.FIRE_TRUCK))
+                    add_vehicle(arbiter, requests, active_vehicles[-1])
                 elif event.key == pygame.K_4:
                     active_vehicles.append(EmergencyVehicle(current_lane, EmergencyType.POLICE))
+                    add_vehicle(arbiter, requests, active_vehicles[-1])
                 elif event.key == pygame.K_5:
                     active_vehicles.append(EmergencyVehicle(current_lane, EmergencyType.DISASTER_RESPONSE))
+                    add_vehicle(arbiter, requests, active_vehicles[-1])
                 
                 # Controls
                 elif event.key == pygame.K_SPACE:
                     active_vehicles = []
+                    for request in requests:
+                        arbiter.clear(request)
+                    requests = {}
                 elif event.key == pygame.K_ESCAPE:
                     running = False
         
@@ -1,47 +1,26 @@
 import numpy as np
 import sounddevice as sd
 import pygame
-from scipy.fft import fft
 from scipy.signal import spectrogram
 import time
 import matplotlib.pyplot as plt
-from enum import Enum
+import os
+import sys
 
-class SirenType(Enum):
-    AMBULANCE = 1
-    FIRE_TRUCK = 2
-    POLICE = 3
-    NONE = 0
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from siren_stream import (SirenType, SAMPLE_RATE, StreamingSirenDetector, MicrophoneSource, WavFileSource,
+                          print_changes)
+from siren_classifier import SirenPatternClassifier
 
 # Audio Configuration
-SAMPLE_RATE = 44100
 DURATION = 3.0  # seconds
 CHANNELS = 1
-THRESHOLD = 0.3  # Minimum volume threshold
-
-# Siren Frequency Profiles (Hz)
-SIREN_PROFILES = {
-    SirenType.AMBULANCE: {
-        'min_freq': 500,
-        'max_freq': 1500,
-        'pattern': 'wail'  # High-low pattern
-    },
-    SirenType.FIRE_TRUCK: {
-        'min_freq': 800,
-        'max_freq': 1200,
-        'pattern': 'steady'  # Continuous wail
-    },
-    SirenType.POLICE: {
-        'min_freq': 600,
-        'max_freq': 1800,
-        'pattern': 'hi-lo'  # Alternating pattern
-    }
-}
 
 class SirenValidator:
     def __init__(self):
         pygame.mixer.init()
         self.recording = np.array([])
+        self.classifier = SirenPatternClassifier(SAMPLE_RATE)
         self.fig, self.ax = plt.subplots(figsize=(10, 4))
         plt.ion()  # Interactive mode
         
@@ -78,59 +57,44 @@ class SirenValidator:
         if len(self.recording) == 0:
             return SirenType.NONE
         
-        # Compute FFT
-        n = len(self.recording)
-        yf = fft(self.recording)
-        xf = np.linspace(0, SAMPLE_RATE/2, n//2)
-        magnitudes = 2/n * np.abs(yf[:n//2])
+        # Track the dominant tone over time and match it against the siren patterns
+        times, track, _ = self.classifier.track(self.recording)
+        result = self.classifier.classify(self.recording)
         
         # Visualize
         self.ax.clear()
-        self.ax.plot(xf, magnitudes)
-        self.ax.set_xlim(0, 3000)
-        self.ax.set_title("Frequency Analysis")
-        self.ax.set_xlabel("Frequency (Hz)")
-        self.ax.set_ylabel("Magnitude")
+        self.ax.plot(times, track[0], '.')
+        self.ax.set_ylim(0, 3000)
+        self.ax.set_title(f"Dominant Frequency ({result.pattern})")
+        self.ax.set_xlabel("Time (s)")
+        self.ax.set_ylabel("Frequency (Hz)")
         plt.pause(0.01)
         
-        # Find dominant frequencies
-        peak_freq = xf[np.argmax(magnitudes)]
-        max_mag = np.max(magnitudes)
-        
-        if max_mag < THRESHOLD:
-            return SirenType.NONE
-            
-        # Check against siren profiles
-        for siren_type, profile in SIREN_PROFILES.items():
-            if (profile['min_freq'] <= peak_freq <= profile['max_freq']):
-                # Additional pattern verification would go here
-                return siren_type
-                
-        return SirenType.NONE
+        print(f"Pattern: {result.pattern}, {result.peak_freq:.0f} Hz, span {result.span:.0f} Hz, "
+              f"sweep {result.sweep_rate:.0f} Hz/s, period {result.period:.2f} s")
+        return result.siren_type
 
     def live_detection(self):
-        """Run continuous live detection"""
+        """Run continuous live detection on the microphone stream (a decision every 100 ms)"""
         print("Starting live siren detection...")
         print("Press Ctrl+C to stop")
         
+        source = MicrophoneSource(SAMPLE_RATE)
+        detector = StreamingSirenDetector(SAMPLE_RATE, on_decision=print_changes())
+        source.start(detector.process)
         try:
             while True:
-                self.record_audio()
-                detected = self.analyze_frequencies()
-                
-                if detected != SirenType.NONE:
-                    print(f"🚨 {detected.name} SIREN DETECTED!")
-                    # Flash red for emergency
-                    self.ax.set_facecolor((1, 0.8, 0.8))
-                    plt.pause(0.1)
-                    self.ax.set_facecolor((1, 1, 1))
-                else:
-                    print("No siren detected")
-                
-                plt.pause(0.5)
-                
+                time.sleep(0.5)
         except KeyboardInterrupt:
             print("\nStopping detection")
+        finally:
+            source.stop()
+    
+    def file_detection(self, path):
+        """Run the streaming detector over a WAV file"""
+        source = WavFileSource(path)
+        detector = StreamingSirenDetector(source.sample_rate, on_decision=print_changes())
+        detector.run(source)
 
 if __name__ == "__main__":
     validator = SirenValidator()
@@ -140,8 +104,9 @@ if __name__ == "__main__":
     print("1. Test with microphone")
     print("2. Play sample siren (ambulance)")
     print("3. Live detection mode")
+    print("4. Detect sirens in a WAV file")
     
-    choice = input("Select mode (1-3): ")
+    choice = input("Select mode (1-4): ")
     
     if choice == "1":
         validator.record_audio()
@@ -153,4 +118,7 @@ if __name__ == "__main__":
         validator.play_sample_siren(SirenType.AMBULANCE)
         
     elif choice == "3":
-        validator.live_detection()
\ No newline at end of file
+        validator.live_detection()
+        
+    elif choice == "4":
+        validator.file_detection(input("WAV file: "))
\ No newline at end of file
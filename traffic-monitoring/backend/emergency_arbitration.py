@@ -0,0 +1,260 @@
+import heapq
+import itertools
+import time
+
+
+class EmergencyRequest:
+    """One emergency vehicle asking for green on an approach of a junction"""
+
+    __slots__ = ("junction", "approach", "priority", "arrival_time", "expires_at", "vehicle_id", "active")
+
+    def __init__(self, junction, approach, priority, arrival_time, expires_at, vehicle_id=None):
+        self.junction = junction
+        self.approach = approach
+        self.priority = priority
+        self.arrival_time = arrival_time
+        self.expires_at = expires_at
+        self.vehicle_id = vehicle_id
+        self.active = True
+
+
+class JunctionState:
+    """Pending requests and the current grant of one junction"""
+
+    def __init__(self, name, approaches, conflicts, now):
+        self.name = name
+        self.approaches = list(approaches)
+        self.conflicts = conflicts                            # Approach -> approaches it cannot share green with
+        self.queues = {approach: [] for approach in approaches}  # Approach -> heap of (priority, arrival, seq, request)
+        self.pending = 0
+        self.stale = 0                # Cleared requests still in the heaps
+        self.green = frozenset()      # Approaches held green by the arbiter (empty: normal signal plan)
+        self.reason = None            # 'emergency' or 'service'
+        self.granted_at = now
+        self.service_until = 0.0
+        self.wake_at = None           # Next timer that can change the grant
+        self.last_green = dict.fromkeys(approaches, now)
+
+
+class EmergencyArbiter:
+    """
+    Right of way for many concurrent emergency vehicles over many junctions
+
+    Every approach of every junction keeps a heap of its requests keyed on
+    (priority, arrival_time), where priority is EmergencyType.value (lower
+    wins), so insertion is O(log n) and the most urgent request of a junction
+    is found among the heap tops of its few approaches. Requests expire
+    through one global heap of expiry times; cleared and expired requests
+    are dropped lazily when they reach a heap top.
+
+    A junction gives green to the approach of its most urgent request, plus
+    every approach with waiting requests that does not conflict with it.
+    The grant is held at least min_hold seconds before another approach
+    may take over (unless the held approaches have no requests left), and
+    an approach kept red for max_red seconds by emergencies gets service_time
+    seconds of green, so normal lanes are never starved.
+
+    Example:
+        arbiter = EmergencyArbiter()
+        arbiter.add_junction('J1', 'ABCD', conflicts={'A': 'CD', 'B': 'CD', 'C': 'AB', 'D': 'AB'})
+        request = arbiter.request('J1', 'C', EmergencyType.FIRE_TRUCK)
+        decisions = arbiter.decide()
+        arbiter.clear(request)  # The vehicle has crossed
+    """
+
+    def __init__(self, min_hold=5.0, max_red=90.0, service_time=10.0, request_ttl=120.0):
+        """
+        Args:
+            min_hold: Seconds a grant is kept before another approach may pre-empt it
+            max_red: Longest an approach may be held red by emergencies
+            service_time: Green given to an approach that reached max_red
+            request_ttl: Seconds after which a request that was never cleared expires
+        """
+        self.min_hold = min_hold
+        self.max_red = max_red
+        self.service_time = service_time
+        self.request_ttl = request_ttl
+        self.junctions = {}
+        self._expiry = []  # Heap of (expires_at, seq, request)
+        self._seq = itertools.count()
+        self._dirty = set()  # Junctions whose requests changed since the last decide()
+        self._timers = []    # Heap of (wake_at, seq, junction) for hold, service and starvation timers
+        self.pending = 0
+
+    def add_junction(self, name, approaches, conflicts=None, now=None):
+        """
+        Args:
+            name: Junction name
+            approaches: Approach names
+            conflicts: Dictionary of approach -> approaches that cannot be
+                green at the same time (default: every other approach)
+        """
+        now = time.time() if now is None else now
+        if conflicts is None:
+            conflicts = {a: set(approaches) - {a} for a in approaches}
+        else:
+            conflicts = {a: set(conflicts.get(a, ())) for a in approaches}
+            for a, others in list(conflicts.items()):  # Conflicts are mutual
+                for b in others:
+                    conflicts[b].add(a)
+        self.junctions[name] = JunctionState(name, approaches, conflicts, now)
+
+    def request(self, junction, approach, vehicle_type, arrival_time=None, vehicle_id=None, ttl=None):
+        """
+        Register an emergency vehicle approaching a junction
+
+        Args:
+            vehicle_type: EmergencyType (or its integer value; lower is more urgent)
+
+        Returns:
+            EmergencyRequest, to pass to clear() once the vehicle is through
+        """
+        state = self.junctions[junction]
+        arrival_time = time.time() if arrival_time is None else arrival_time
+        priority = getattr(vehicle_type, 'value', vehicle_type)
+        request = EmergencyRequest(junction, approach, priority, arrival_time,
+                                   arrival_time + (self.request_ttl if ttl is None else ttl), vehicle_id)
+        seq = next(self._seq)
+        heapq.heappush(state.queues[approach], (priority, arrival_time, seq, request))
+        heapq.heappush(self._expiry, (request.expires_at, seq, request))
+        state.pending += 1
+        self._dirty.add(junction)
+        self.pending += 1
+        return request
+
+    def clear(self, request):
+        """Remove a request (the vehicle has crossed or turned away)"""
+        if request.active:
+            request.active = False
+            state = self.junctions[request.junction]
+            state.pending -= 1
+            state.stale += 1
+            self._dirty.add(request.junction)
+            self.pending -= 1
+            if state.stale > 2 * state.pending + 64:
+                self._compact(state)
+
+    def expire(self, now):
+        """Drop every request whose time to live has passed"""
+        expiry = self._expiry
+        while expiry and expiry[0][0] <= now:
+            self.clear(heapq.heappop(expiry)[2])
+
+    def _compact(self, state):
+        """Rebuild a junction's heaps without cleared requests (amortised over the clears)"""
+        for approach, queue in state.queues.items():
+            queue = [entry for entry in queue if entry[3].active]
+            heapq.heapify(queue)
+            state.queues[approach] = queue
+        state.stale = 0
+
+    def _top(self, state, approach):
+        """Most urgent active request of an approach, dropping cleared ones from the top"""
+        queue = state.queues[approach]
+        while queue and not queue[0][3].active:
+            heapq.heappop(queue)
+            state.stale -= 1
+        return queue[0] if queue else None
+
+    def decide(self, now=None):
+        """
+        Update every junction whose requests changed or whose timers ran out
+
+        Returns:
+            Dictionary of junction name -> (green approaches, reason, most urgent
+            request) for the junctions whose grant changed; an empty set of
+            approaches hands the junction back to its normal signal plan
+        """
+        now = time.time() if now is None else now
+        self.expire(now)
+        names, self._dirty = self._dirty, set()
+        timers = self._timers
+        while timers and timers[0][0] <= now:
+            wake_at, _, name = heapq.heappop(timers)
+            if self.junctions[name].wake_at == wake_at:  # Not superseded by a later decision
+                names.add(name)
+
+        changes = {}
+        for name in names:
+            state = self.junctions[name]
+            decision = self._decide_junction(state, now)
+            if decision is not None:
+                changes[name] = decision
+            state.wake_at = self._next_wake(state, now)
+            if state.wake_at is not None:
+                heapq.heappush(timers, (state.wake_at, next(self._seq), name))
+        return changes
+
+    def _next_wake(self, state, now):
+        """Earliest time a junction's grant can change without new requests"""
+        if not state.green:
+            return None
+        times = [state.last_green[a] + self.max_red for a in state.approaches if a not in state.green]
+        if state.reason == 'service':
+            times.append(state.service_until)
+        if now - state.granted_at < self.min_hold:
+            times.append(state.granted_at + self.min_hold)
+        return max(min(times), now) if times else None
+
+    def _decide_junction(self, state, now):
+        tops = {a: self._top(state, a) for a in state.approaches}
+        waiting = {a: top for a, top in tops.items() if top is not None}
+        best = min(waiting.values(), key=lambda top: top[:3]) if waiting else None
+
+        if state.reason == 'service' and now < state.service_until:
+            return None  # Serving a starved approach
+        if best is None:
+            if not state.green:
+                return None
+            return self._grant(state, frozenset(), None, now, None)
+
+        held = now - state.granted_at
+        may_switch = not state.green or held >= self.min_hold or not (state.green & waiting.keys())
+
+        # Minimum service for approaches kept red by emergencies
+        if state.green and may_switch:
+            starved = [a for a in state.approaches
+                       if a not in state.green and now - state.last_green[a] >= self.max_red]
+            if starved:
+                approach = min(starved, key=lambda a: state.last_green[a])
+                # Every approach that fits joins the service green, waiting ones first
+                others = sorted(waiting, key=lambda a: waiting[a][:3])
+                others += [a for a in state.approaches if a not in waiting]
+                green = self._compatible(state, approach, others)
+                state.service_until = now + self.service_time
+                return self._grant(state, green, 'service', now, best[3])
+
+        approach = best[3].approach
+        if approach in state.green and state.reason == 'emergency':
+            green = self._compatible(state, approach, self._by_urgency(waiting))
+            if green == state.green:
+                return None
+            return self._grant(state, green, 'emergency', now, best[3], keep_time=True)
+        if not may_switch:
+            return None
+        return self._grant(state, self._compatible(state, approach, self._by_urgency(waiting)), 'emergency', now, best[3])
+
+    @staticmethod
+    def _by_urgency(waiting):
+        return sorted(waiting, key=lambda a: waiting[a][:3])
+
+    def _compatible(self, state, approach, candidates):
+        """approach plus every candidate, in order, that conflicts with none already chosen"""
+        green = {approach}
+        for other in candidates:
+            if other not in green and not (state.conflicts[other] & green):
+                green.add(other)
+        return frozenset(green)
+
+    def _grant(self, state, green, reason, now, request, keep_time=False):
+        if not keep_time:
+            state.granted_at = now
+        if not green:
+            # The normal plan serves everyone again
+            state.last_green = dict.fromkeys(state.approaches, now)
+        else:
+            for approach in state.green - green:  # Red from now on
+                state.last_green[approach] = now
+        state.green = green
+        state.reason = reason if green else None
+        return green, state.reason, request
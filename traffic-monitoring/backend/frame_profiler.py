@@ -0,0 +1,90 @@
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class FrameProfiler:
+    """
+    Rolling frame times of a render loop, split into named sections
+
+    Wrap the parts of a frame in section() and call end_frame() once per
+    frame. The overlay text is only rebuilt every refresh seconds, so showing
+    it does not make the display change every frame.
+
+    Example:
+        with profiler.section('update'):
+            system.update(dt)
+        with profiler.section('render'):
+            system.render(screen)
+        profiler.end_frame()
+    """
+
+    def __init__(self, window=120, refresh=0.5):
+        """
+        Args:
+            window: Frames the averages are taken over
+            refresh: Seconds between overlay text updates
+        """
+        self.window = window
+        self.refresh = refresh
+        self.frame_times = deque(maxlen=window)
+        self.section_times = {}  # Section name -> deque of seconds per frame
+        self.counters = {}       # Latest value of per-frame counters, e.g. dirty rects
+        self._current = {}
+        self._frame_start = None
+        self._lines = []
+        self._lines_time = 0.0
+
+    @contextmanager
+    def section(self, name):
+        """Time the enclosed block as part of the current frame"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._current[name] = self._current.get(name, 0.0) + time.perf_counter() - start
+
+    def count(self, name, value):
+        """Record a per-frame counter shown in the overlay"""
+        self.counters[name] = value
+
+    def end_frame(self):
+        """Close the current frame (the frame time runs from one call to the next)"""
+        now = time.perf_counter()
+        if self._frame_start is not None:
+            self.frame_times.append(now - self._frame_start)
+            for name, seconds in self._current.items():
+                self.section_times.setdefault(name, deque(maxlen=self.window)).append(seconds)
+        self._frame_start = now
+        self._current = {}
+
+    def summary(self):
+        """
+        Returns:
+            Dictionary with fps, frame_ms (mean), frame_p95_ms and <section>_ms means
+        """
+        if not self.frame_times:
+            return {'fps': 0.0, 'frame_ms': 0.0, 'frame_p95_ms': 0.0}
+        frame_times = np.array(self.frame_times)
+        stats = {
+            'fps': 1.0 / frame_times.mean(),
+            'frame_ms': frame_times.mean() * 1000,
+            'frame_p95_ms': np.percentile(frame_times, 95) * 1000,
+        }
+        for name, times in self.section_times.items():
+            stats[f"{name}_ms"] = sum(times) / len(times) * 1000
+        return stats
+
+    def overlay_lines(self):
+        """Text lines for an on-screen overlay, rebuilt at most every refresh seconds"""
+        now = time.time()
+        if now - self._lines_time >= self.refresh:
+            stats = self.summary()
+            self._lines = [f"{stats['fps']:.0f} FPS  {stats['frame_ms']:.1f} ms (p95 {stats['frame_p95_ms']:.1f})"]
+            self._lines += [f"{name}: {sum(times) / len(times) * 1000:.2f} ms"
+                            for name, times in self.section_times.items()]
+            self._lines += [f"{name}: {value}" for name, value in self.counters.items()]
+            self._lines_time = now
+        return self._lines
@@ -0,0 +1,166 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Default slot size (1080p BGR); smaller frames use the top-left corner of a slot
+DEFAULT_MAX_SHAPE = (1080, 1920, 3)
+
+# Sequence number stored in a slot that is being written or was never written
+EMPTY_SEQ = -1
+
+
+class SharedFrameRing:
+    """
+    Ring buffer of preallocated frames in shared memory, indexed by lane and sequence number
+
+    Every lane owns `depth` frame slots. A capture thread writes frame N of a
+    lane into slot N % depth and readers (detectors, renderers, other
+    processes attached by name) get numpy views straight into shared memory,
+    so no frame is copied or pickled on its way from capture to display.
+
+    A view stays valid until the lane has been written `depth` more times;
+    readers that hold on to a view longer can check `is_current(lane, seq)`.
+    Each lane expects a single writer.
+
+    Layout of the shared block:
+        seqs    int64[num_lanes, depth]      sequence number held by each slot
+        shapes  int32[num_lanes, depth, 3]   (h, w, c) of the frame in each slot
+        latest  int64[num_lanes]             newest committed sequence per lane
+        frames  uint8[num_lanes, depth, H, W, C]
+    """
+
+    def __init__(self, num_lanes, depth=3, max_shape=DEFAULT_MAX_SHAPE, name=None):
+        """
+        Create a new ring, or attach to an existing one when `name` is given
+
+        Args:
+            num_lanes: Number of independent frame streams
+            depth: Slots per lane (how many frames a reader may lag behind)
+            max_shape: (height, width, channels) of the largest frame accepted
+            name: Name of an existing ring to attach to (see `name` attribute)
+        """
+        self.num_lanes = num_lanes
+        self.depth = depth
+        self.max_shape = tuple(max_shape)
+
+        seqs_size = num_lanes * depth * 8
+        shapes_size = num_lanes * depth * 3 * 4
+        latest_size = num_lanes * 8
+        header_size = seqs_size + shapes_size + latest_size
+        # Keep frame data 64-byte aligned
+        frames_offset = (header_size + 63) // 64 * 64
+        frames_shape = (num_lanes, depth) + self.max_shape
+        total_size = frames_offset + int(np.prod(frames_shape))
+
+        self._owner = name is None
+        if self._owner:
+            self._shm = shared_memory.SharedMemory(create=True, size=total_size)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+        self.name = self._shm.name
+
+        buf = self._shm.buf
+        self._seqs = np.ndarray((num_lanes, depth), dtype=np.int64, buffer=buf, offset=0)
+        self._shapes = np.ndarray((num_lanes, depth, 3), dtype=np.int32, buffer=buf, offset=seqs_size)
+        self._latest = np.ndarray((num_lanes,), dtype=np.int64, buffer=buf, offset=seqs_size + shapes_size)
+        self._frames = np.ndarray(frames_shape, dtype=np.uint8, buffer=buf, offset=frames_offset)
+
+        if self._owner:
+            self._seqs.fill(EMPTY_SEQ)
+            self._shapes.fill(0)
+            self._latest.fill(EMPTY_SEQ)
+
+    @classmethod
+    def attach(cls, name, num_lanes, depth=3, max_shape=DEFAULT_MAX_SHAPE):
+        """Attach to a ring created by another process"""
+        return cls(num_lanes, depth, max_shape, name=name)
+
+    def reserve(self, lane, shape):
+        """
+        Claim the next slot of a lane for writing in place
+
+        The returned view can be filled or drawn on directly (e.g. by cv2);
+        call commit() afterwards to publish it to readers.
+
+        Args:
+            lane: Lane index
+            shape: (h, w, c) of the frame that will be written
+
+        Returns:
+            (seq, view) of the claimed slot
+        """
+        h, w = shape[:2]
+        c = shape[2] if len(shape) == 3 else 1
+        max_h, max_w, max_c = self.max_shape
+        if h > max_h or w > max_w or c != max_c:
+            raise ValueError(f"Frame shape {tuple(shape)} does not fit ring slots of {self.max_shape}")
+
+        seq = int(self._latest[lane]) + 1
+        slot = seq % self.depth
+        # Invalidate the slot first so readers never see a half-written frame as current
+        self._seqs[lane, slot] = EMPTY_SEQ
+        self._shapes[lane, slot] = (h, w, c)
+        return seq, self._frames[lane, slot, :h, :w]
+
+    def commit(self, lane, seq):
+        """Publish a slot claimed with reserve() as the lane's newest frame"""
+        self._seqs[lane, seq % self.depth] = seq
+        self._latest[lane] = seq
+
+    def write(self, lane, frame):
+        """
+        Copy a frame into the next slot of a lane
+
+        Returns:
+            Sequence number of the written frame
+        """
+        seq, view = self.reserve(lane, frame.shape)
+        view[...] = frame.reshape(view.shape)
+        self.commit(lane, seq)
+        return seq
+
+    def read(self, lane, seq=None):
+        """
+        Get a view of a lane's frame without copying
+
+        Args:
+            lane: Lane index
+            seq: Sequence number to read (None reads the newest frame)
+
+        Returns:
+            (seq, view), or (None, None) if that frame is not (or no longer) in the ring
+        """
+        if seq is None:
+            seq = int(self._latest[lane])
+        if seq < 0:
+            return None, None
+
+        slot = seq % self.depth
+        if self._seqs[lane, slot] != seq:
+            return None, None
+        h, w, _ = self._shapes[lane, slot]
+        return seq, self._frames[lane, slot, :h, :w]
+
+    def latest_seq(self, lane):
+        """Newest committed sequence number of a lane (-1 if nothing written yet)"""
+        return int(self._latest[lane])
+
+    def is_current(self, lane, seq):
+        """True while the frame with this sequence number has not been overwritten"""
+        return seq is not None and seq >= 0 and self._seqs[lane, seq % self.depth] == seq
+
+    def close(self):
+        """Detach from the ring; the creating process also frees the shared memory"""
+        if self._shm is None:
+            return
+        del self._seqs, self._shapes, self._latest, self._frames
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
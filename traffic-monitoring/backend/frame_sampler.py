@@ -0,0 +1,105 @@
+import cv2
+import numpy as np
+
+
+class AdaptiveFrameSampler:
+    """
+    Decides which video frames are worth running the detector on
+
+    Each frame is shrunk to a tiny blurred grayscale thumbnail and compared
+    with the thumbnail of the last frame the detector ran on. The detector
+    runs again once enough of the scene has changed, but never more often
+    than max_rate and never less often than min_rate, so a static scene costs
+    min_rate inferences per second and busy traffic up to max_rate.
+    boost() samples at boost_rate for a while, e.g. when an emergency vehicle
+    candidate shows up.
+    """
+
+    def __init__(self, fps=30.0, min_rate=0.5, max_rate=5.0, boost_rate=None, motion_threshold=0.05,
+                 pixel_threshold=25, thumb_size=(160, 90)):
+        """
+        Args:
+            fps: Frame rate of the video
+            min_rate: Inferences per second on a static scene
+            max_rate: Inferences per second under heavy motion (capped at fps)
+            boost_rate: Inferences per second while boosted, motion or not
+                (default max_rate; may be higher, capped at fps)
+            motion_threshold: Fraction of changed thumbnail pixels since the
+                last inference that triggers the next one
+            pixel_threshold: Gray level change (0-255) for a pixel to count as changed
+            thumb_size: (width, height) of the thumbnails that are compared
+        """
+        self.fps = fps if fps and fps > 0 else 30.0
+        self.min_interval = max(1, int(round(self.fps / min(max_rate, self.fps))))
+        self.max_interval = max(self.min_interval, int(round(self.fps / min_rate)))
+        boost_rate = max_rate if boost_rate is None else boost_rate
+        self.boost_interval = max(1, int(round(self.fps / min(boost_rate, self.fps))))
+        self.motion_threshold = motion_threshold
+        self.pixel_threshold = pixel_threshold
+        self.thumb_size = thumb_size
+
+        self._reference = None  # Thumbnail of the last inferred frame
+        self._last_inference = None
+        self._boost_until = -1
+        self.frame_index = -1
+        self.motion_score = 0.0
+
+        # Stats
+        self.frames_seen = 0
+        self.inferences = 0
+
+    def _thumbnail(self, frame):
+        # Linear resize at this scale is a cheap subsample; the blur removes pixel noise
+        thumb = cv2.resize(frame, self.thumb_size, interpolation=cv2.INTER_LINEAR)
+        if thumb.ndim == 3:
+            thumb = cv2.cvtColor(thumb, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(thumb, (5, 5), 0)
+
+    def _changed_fraction(self, thumb):
+        changed = cv2.absdiff(thumb, self._reference) > self.pixel_threshold
+        return float(np.count_nonzero(changed)) / changed.size
+
+    def should_infer(self, frame):
+        """
+        Feed the next frame of the video
+
+        Returns:
+            bool: True if the detector should run on this frame
+        """
+        self.frame_index += 1
+        self.frames_seen += 1
+
+        if self._last_inference is not None:
+            elapsed = self.frame_index - self._last_inference
+            boosted = self.frame_index <= self._boost_until
+            if elapsed < (self.boost_interval if boosted else self.min_interval):
+                return False
+            thumb = self._thumbnail(frame)
+            self.motion_score = self._changed_fraction(thumb)
+            if elapsed < self.max_interval and not boosted and self.motion_score < self.motion_threshold:
+                return False
+        else:
+            thumb = self._thumbnail(frame)
+
+        self._reference = thumb
+        self._last_inference = self.frame_index
+        self.inferences += 1
+        return True
+
+    def boost(self, seconds=2.0):
+        """Sample at the boost rate for the next few seconds"""
+        self._boost_until = max(self._boost_until, self.frame_index + int(seconds * self.fps))
+
+    def saved_versus(self, fixed_interval):
+        """Inferences saved compared with running the detector every fixed_interval frames"""
+        fixed = -(-self.frames_seen // fixed_interval)  # ceil
+        return fixed - self.inferences
+
+    def stats(self):
+        """Dictionary of sampling statistics"""
+        return {
+            'frames': self.frames_seen,
+            'inferences': self.inferences,
+            'saved_vs_max_rate': self.saved_versus(self.min_interval),
+            'saved_vs_every_frame': self.saved_versus(1),
+        }
@@ -0,0 +1,225 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+from ultralytics import YOLO
+
+from box_postprocess import boxes_to_array
+
+
+class InferenceRequest:
+    """One frame waiting for inference"""
+
+    __slots__ = ("client", "frame", "future", "submitted_at")
+
+    def __init__(self, client, frame):
+        self.client = client
+        self.frame = frame
+        self.future = Future()
+        self.submitted_at = time.perf_counter()
+
+
+class FairInferenceScheduler:
+    """
+    YOLO inference shared by several clients (e.g. junctions), served round-robin
+
+    Every client has its own FIFO queue. Workers build each batch by taking
+    one request per client in turn, so a junction with many busy lanes cannot
+    starve a quiet one. Each worker thread owns its model. Latency from submit
+    to result is recorded per client and compared with the client's SLO.
+    """
+
+    def __init__(self, model_path="yolov8n.pt", confidence=0.25, num_workers=1, max_batch=4,
+                 default_slo_ms=1000.0, history=1000):
+        """
+        Args:
+            model_path: Path to the YOLO model weights
+            confidence: Confidence threshold for detections (0-1)
+            num_workers: Inference threads, each with its own model copy
+            max_batch: Most frames run through the model in one call
+            default_slo_ms: Latency objective for clients registered without one
+            history: Latency samples kept per client for the metrics
+        """
+        self.model_path = model_path
+        self.confidence = confidence
+        self.max_batch = max(1, max_batch)
+        self.default_slo_ms = default_slo_ms
+        self.history = history
+
+        self._queues = {}      # Client -> deque of InferenceRequests
+        self._order = []       # Round-robin order of the clients
+        self._next_client = 0  # Where the next batch starts
+        self._cond = threading.Condition()
+        self._closed = False
+        self._load_failures = 0
+        self.load_error = None  # Set once no worker could load the model; every request fails with it
+
+        # Metrics per client
+        self._slo_ms = {}
+        self._latencies = {}
+        self._served = {}
+        self._violations = {}
+        self.batches = 0
+
+        self._workers = [
+            threading.Thread(target=self._worker_main, name=f"inference-{i}", daemon=True)
+            for i in range(max(1, num_workers))
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def register(self, client, slo_ms=None):
+        """Add a client with its latency objective in milliseconds"""
+        with self._cond:
+            self._add_client(client)
+            if slo_ms is not None:
+                self._slo_ms[client] = slo_ms
+
+    def _add_client(self, client):
+        """Create the queue and metrics of a new client (call with the lock held)"""
+        if client not in self._queues:
+            self._queues[client] = deque()
+            self._order.append(client)
+            self._latencies[client] = deque(maxlen=self.history)
+            self._served[client] = 0
+            self._violations[client] = 0
+            self._slo_ms[client] = self.default_slo_ms
+
+    def submit(self, client, frame):
+        """
+        Queue a frame for inference
+
+        Returns:
+            Future resolving to the (N, 6) box array of the frame
+        """
+        request = InferenceRequest(client, frame)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Inference scheduler is closed")
+            if self.load_error is not None:
+                request.future.set_exception(self.load_error)
+                return request.future
+            self._add_client(client)
+            self._queues[client].append(request)
+            self._cond.notify()
+        return request.future
+
+    def infer(self, client, frame, timeout=None):
+        """Run inference on a frame and wait for its (N, 6) box array"""
+        return self.submit(client, frame).result(timeout)
+
+    def _next_batch(self):
+        """Take up to max_batch requests, one per client in turn (call with the lock held)"""
+        batch = []
+        num_clients = len(self._order)
+        start = self._next_client
+        while len(batch) < self.max_batch:
+            took = False
+            for offset in range(num_clients):
+                queue = self._queues[self._order[(start + offset) % num_clients]]
+                if queue:
+                    batch.append(queue.popleft())
+                    took = True
+                    if len(batch) == self.max_batch:
+                        break
+            if not took:
+                break
+        # The next batch starts with the client after the one served first this time
+        self._next_client = (start + 1) % num_clients if num_clients else 0
+        return batch
+
+    def _worker_main(self):
+        try:
+            model = YOLO(self.model_path)
+        except Exception as e:
+            self._worker_failed(e)
+            return
+        while True:
+            with self._cond:
+                while not self._closed and not any(self._queues.values()):
+                    self._cond.wait()
+                if self._closed:
+                    return
+                batch = self._next_batch()
+
+            batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                results = model([request.frame for request in batch], conf=self.confidence)
+            except Exception as e:
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+
+            finished = time.perf_counter()
+            with self._cond:
+                self.batches += 1
+                for request in batch:
+                    latency_ms = (finished - request.submitted_at) * 1000
+                    self._latencies[request.client].append(latency_ms)
+                    self._served[request.client] += 1
+                    if latency_ms > self._slo_ms[request.client]:
+                        self._violations[request.client] += 1
+            for request, result in zip(batch, results):
+                request.future.set_result(boxes_to_array(result))
+
+    def _worker_failed(self, error):
+        """A worker could not load the model; once none could, fail everything queued"""
+        print(f"Inference worker failed to load {self.model_path}: {error}")
+        with self._cond:
+            self._load_failures += 1
+            if self._load_failures < len(self._workers):
+                return  # The other workers keep serving
+            self.load_error = error
+            pending = [request for queue in self._queues.values() for request in queue]
+            for queue in self._queues.values():
+                queue.clear()
+        for request in pending:
+            if request.future.set_running_or_notify_cancel():
+                request.future.set_exception(error)
+
+    def metrics(self):
+        """
+        Latency metrics per client
+
+        Returns:
+            {client: {'served', 'queued', 'p50_ms', 'p95_ms', 'p99_ms', 'slo_ms', 'slo_violation_rate'}}
+        """
+        with self._cond:
+            report = {}
+            for client in self._order:
+                latencies = np.array(self._latencies[client])
+                p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if len(latencies) else (0.0, 0.0, 0.0)
+                served = self._served[client]
+                report[client] = {
+                    'served': served,
+                    'queued': len(self._queues[client]),
+                    'p50_ms': float(p50),
+                    'p95_ms': float(p95),
+                    'p99_ms': float(p99),
+                    'slo_ms': self._slo_ms[client],
+                    'slo_violation_rate': self._violations[client] / served if served else 0.0,
+                }
+            return report
+
+    def close(self):
+        """Stop the workers and cancel everything still queued"""
+        with self._cond:
+            self._closed = True
+            pending = [request for queue in self._queues.values() for request in queue]
+            for queue in self._queues.values():
+                queue.clear()
+            self._cond.notify_all()
+        for request in pending:
+            request.future.cancel()
+        for worker in self._workers:
+            worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,171 @@
+"""
+Headless signal control of several junctions on one host
+
+A JSON config lists the junctions and their lane sources:
+
+    {
+        "model": "yolov8n.pt",
+        "inference_workers": 2,
+        "max_batch": 4,
+        "junctions": [
+            {"name": "Main St", "lanes": ["data/video4.mp4", null], "slo_ms": 500},
+            {"name": "Station Rd", "lanes": ["cam/north.mp4", "cam/south.mp4", "cam/east.mp4"]}
+        ]
+    }
+
+Each junction runs its own TrafficSystem; all of them share one
+FairInferenceScheduler, so frames of every junction go through the same
+model workers, served round-robin. Lane paths are relative to the config
+file; null lanes are simulated. An optional "history_dir" keeps each
+junction's lane history in memory-mapped files under <history_dir>/<name>.
+
+Usage:
+    python junction_controller.py junctions.json [--duration 300] [--report-every 30]
+"""
+import argparse
+import json
+import os
+import time
+
+from inference_scheduler import FairInferenceScheduler
+from traffic_detectionn import TrafficSystem, DEFAULT_MODEL_PATH
+
+
+def load_junction_config(config_path):
+    """
+    Read a junction config file
+
+    Returns:
+        Config dictionary with lane paths resolved relative to the file
+    """
+    with open(config_path) as f:
+        config = json.load(f)
+
+    junctions = config.get('junctions')
+    if not junctions:
+        raise ValueError(f"No junctions in {config_path}")
+
+    base_dir = os.path.dirname(os.path.abspath(config_path))
+    if config.get('history_dir'):
+        config['history_dir'] = os.path.join(base_dir, config['history_dir'])
+    names = set()
+    for junction in junctions:
+        if 'name' not in junction or 'lanes' not in junction:
+            raise ValueError(f"Junction entries need a name and lanes: {junction}")
+        if junction['name'] in names:
+            raise ValueError(f"Duplicate junction name: {junction['name']}")
+        names.add(junction['name'])
+        junction['lanes'] = [os.path.join(base_dir, lane) if lane is not None else None
+                             for lane in junction['lanes']]
+    return config
+
+
+class MultiJunctionController:
+    """Runs one TrafficSystem per configured junction on a shared inference scheduler"""
+
+    def __init__(self, config):
+        """
+        Args:
+            config: Dictionary as returned by load_junction_config()
+        """
+        self.config = config
+        self.scheduler = FairInferenceScheduler(
+            config.get('model', DEFAULT_MODEL_PATH),
+            confidence=config.get('confidence', 0.25),
+            num_workers=config.get('inference_workers', 1),
+            max_batch=config.get('max_batch', 4),
+            default_slo_ms=config.get('slo_ms', 1000.0),
+        )
+
+        self.systems = {}
+        try:
+            for junction in config['junctions']:
+                name = junction['name']
+                history_dir = config.get('history_dir')
+                self.scheduler.register(name, junction.get('slo_ms'))
+                self.systems[name] = TrafficSystem(
+                    render=False,
+                    lane_sources=junction['lanes'],
+                    min_lanes=junction.get('min_lanes', 0),
+                    model_path=config.get('model', DEFAULT_MODEL_PATH),
+                    inference=self.scheduler,
+                    name=name,
+                    look_ahead=junction.get('look_ahead', 5.0),
+                    detection_timeout=junction.get('detection_timeout', 60.0),
+                    history_dir=os.path.join(history_dir, name) if history_dir else None,
+                )
+        except Exception:
+            self.close()
+            raise
+
+    def update(self, dt):
+        """Advance the signals of every junction by dt seconds"""
+        for system in self.systems.values():
+            system.update(dt)
+
+    def report(self):
+        """Print signal state and inference latency against the SLO per junction"""
+        metrics = self.scheduler.metrics()
+        print(f"\n{'junction':<16} {'green':>6} {'left s':>7} {'served':>7} {'queued':>7} "
+              f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'SLO ms':>7} {'over SLO':>9}")
+        for name, system in self.systems.items():
+            m = metrics.get(name)
+            if m is None:
+                continue
+            print(f"{name[:16]:<16} {system.current_lane_index + 1:>6} {system.remaining_time:>7.1f} "
+                  f"{m['served']:>7} {m['queued']:>7} {m['p50_ms']:>8.1f} {m['p95_ms']:>8.1f} "
+                  f"{m['p99_ms']:>8.1f} {m['slo_ms']:>7.0f} {m['slo_violation_rate']:>8.1%}")
+
+    def run(self, duration=None, tick=0.1, report_every=30.0):
+        """
+        Control the junctions in real time
+
+        Args:
+            duration: Seconds to run (None: until interrupted)
+            tick: Seconds between signal updates
+            report_every: Seconds between SLO reports
+        """
+        start = last_time = last_report = time.time()
+        try:
+            while duration is None or last_time - start < duration:
+                time.sleep(tick)
+                current_time = time.time()
+                self.update(current_time - last_time)
+                last_time = current_time
+                if current_time - last_report >= report_every:
+                    self.report()
+                    last_report = current_time
+        except KeyboardInterrupt:
+            pass
+        self.report()
+
+    def close(self):
+        """Stop every junction's detection, then the shared scheduler"""
+        for system in self.systems.values():
+            # Cancel first so no lane thread waits on a scheduler that is shutting down
+            for job in system.jobs.values():
+                job.cancel()
+        self.scheduler.close()
+        for system in self.systems.values():
+            system.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("config", help="Junction config file (JSON)")
+    parser.add_argument("--duration", type=float, default=None, help="Seconds to run (default: until Ctrl+C)")
+    parser.add_argument("--report-every", type=float, default=30.0, help="Seconds between SLO reports")
+    args = parser.parse_args()
+
+    with MultiJunctionController(load_junction_config(args.config)) as controller:
+        controller.run(args.duration, report_every=args.report_every)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+"""
+Siren pattern classification from the dominant-frequency track of a spectrogram
+
+A single FFT peak cannot tell sirens apart: their bands overlap, and what
+distinguishes them is how the tone moves. The classifier computes one
+spectrogram for a whole batch of clips (scipy.signal.spectrogram over the
+last axis), follows the loudest tone in the siren band frame by frame, and
+measures on that track:
+
+    span        - spread of the tone (10th to 90th percentile, Hz)
+    sweep rate  - median |df/dt| between consecutive frames (Hz/s)
+    two-level   - fraction of frames sitting at the low or high level
+    period      - repetition period of the track, from its autocorrelation
+
+Each pattern in PATTERNS accepts a range of these features (a wail sweeps
+slowly over seconds, a yelp sweeps fast, hi-lo jumps between two tones,
+steady barely moves). The siren type is the SIREN_PROFILES entry using the
+matched pattern whose band contains the tone.
+
+Usage:
+    python siren_classifier.py clip.wav [clip2.wav ...]
+    python siren_classifier.py --synthesize yelp --output yelp.wav
+"""
+import argparse
+import wave
+
+import numpy as np
+from scipy.ndimage import median_filter
+from scipy.signal import lfilter, spectrogram
+
+from siren_stream import SirenType, SIREN_PROFILES, SAMPLE_RATE, WavFileSource
+
+# Feature ranges of every pattern, checked in order (None: no limit)
+PATTERNS = {
+    'steady': {'span': (None, 60), 'sweep_rate': (None, 400), 'two_level': None, 'period': None},
+    'hi-lo': {'span': (60, None), 'sweep_rate': (None, 60), 'two_level': 0.7, 'period': (0.4, 4.0)},
+    'yelp': {'span': (150, None), 'sweep_rate': (1500, None), 'two_level': None, 'period': (0.08, 0.8)},
+    'wail': {'span': (150, None), 'sweep_rate': (60, 1500), 'two_level': None, 'period': (1.0, 12.0)},
+}
+LABELS = list(PATTERNS) + ['none']
+
+
+class SirenClassification:
+    """Classifier output for one clip"""
+
+    __slots__ = ("pattern", "siren_type", "confidence", "peak_freq", "span", "sweep_rate", "two_level", "period")
+
+    def __init__(self, pattern, siren_type, confidence, peak_freq, span, sweep_rate, two_level, period):
+        self.pattern = pattern        # Key of PATTERNS, or 'none'
+        self.siren_type = siren_type
+        self.confidence = confidence  # Fraction of frames with a clear tone in the siren band
+        self.peak_freq = peak_freq    # Median frequency of the tone (Hz)
+        self.span = span
+        self.sweep_rate = sweep_rate
+        self.two_level = two_level
+        self.period = period          # Seconds, NaN when the clip is too short to show a repeat
+
+    def __repr__(self):
+        return (f"SirenClassification({self.pattern}, {self.siren_type.name}, confidence={self.confidence:.2f}, "
+                f"peak={self.peak_freq:.0f} Hz, span={self.span:.0f} Hz, sweep={self.sweep_rate:.0f} Hz/s, "
+                f"two_level={self.two_level:.2f}, period={self.period:.2f} s)")
+
+
+class SirenPatternClassifier:
+    """
+    Vectorised siren pattern matching over batches of equal-length clips
+
+    Example:
+        classifier = SirenPatternClassifier()
+        result = classifier.classify(recording)
+        print(result.pattern, result.siren_type.name)
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, frame_size=1024, min_freq=300, max_freq=2500, min_snr=20.0,
+                 min_amplitude=0.01, min_voiced=0.5, patterns=None, profiles=None):
+        """
+        Args:
+            sample_rate: Samples per second of the clips
+            frame_size: Spectrogram window in samples; frames overlap by half
+            min_freq, max_freq: Band the dominant tone is searched in (Hz)
+            min_snr: Peak power over the band's median power for a frame to count as a tone
+            min_amplitude: Minimum amplitude of the tone (full scale = 1.0)
+            min_voiced: Fraction of frames that must carry a tone for any siren
+            patterns: Pattern feature ranges (default PATTERNS), checked in order
+            profiles: Siren profiles (default SIREN_PROFILES)
+        """
+        self.sample_rate = sample_rate
+        self.frame_size = frame_size
+        self.frame_hop = frame_size // 2
+        self.min_freq = min_freq
+        self.max_freq = max_freq
+        self.min_snr = min_snr
+        self.min_amplitude = min_amplitude
+        self.min_voiced = min_voiced
+        self.patterns = PATTERNS if patterns is None else patterns
+        self.profiles = SIREN_PROFILES if profiles is None else profiles
+
+    def track(self, clips):
+        """
+        Dominant tone of every frame of every clip
+
+        Args:
+            clips: Array of clips x samples (or one clip)
+
+        Returns:
+            (times, freqs, voiced): frame times (s), the tone frequency of
+            every clip x frame (Hz, NaN where no tone) and the tone mask
+        """
+        clips = np.atleast_2d(np.asarray(clips, dtype=np.float32))
+        freqs, times, power = spectrogram(clips, self.sample_rate, window='hann', nperseg=self.frame_size,
+                                          noverlap=self.frame_size - self.frame_hop, scaling='spectrum', axis=-1)
+        band = (freqs >= self.min_freq) & (freqs <= self.max_freq)
+        first = int(np.argmax(band))
+        power = power[:, band, :]  # clips x band bins x frames
+
+        peak = power.argmax(axis=1)
+        peak_power = np.take_along_axis(power, peak[:, None, :], axis=1)[:, 0, :]
+        noise_floor = np.median(power, axis=1)
+        voiced = (peak_power > self.min_snr * noise_floor) & (np.sqrt(2 * peak_power) >= self.min_amplitude)
+
+        # Parabolic interpolation of the peak on log power (bins are 43 Hz wide at 1024 / 44.1 kHz)
+        inner = np.clip(peak, 1, power.shape[1] - 2)
+        log_power = np.log(power + 1e-20)
+        left, centre, right = (np.take_along_axis(log_power, (inner + k)[:, None, :], axis=1)[:, 0, :]
+                               for k in (-1, 0, 1))
+        curvature = left - 2 * centre + right
+        offset = np.where(curvature < 0, 0.5 * (left - right) / np.where(curvature < 0, curvature, -1), 0.0)
+        offset = np.where(peak == inner, np.clip(offset, -0.5, 0.5), 0.0)
+        bin_width = freqs[1] - freqs[0]
+        track = freqs[first] + (peak + offset) * bin_width
+
+        # A short median filter removes single-frame octave and noise jumps
+        track = median_filter(track, size=(1, 3), mode='nearest')
+        return times, np.where(voiced, track, np.nan), voiced
+
+    def features(self, clips):
+        """
+        Pattern features of every clip
+
+        Returns:
+            Dictionary of arrays over the clips: voiced, peak_freq, span,
+            sweep_rate, two_level, period
+        """
+        _, track, voiced = self.track(clips)
+        return self.track_features(track, voiced)
+
+    def track_features(self, track, voiced):
+        """Pattern features (see features()) of tone tracks returned by track(), or slices of them"""
+        n_clips, n_frames = track.shape
+        hop_seconds = self.frame_hop / self.sample_rate
+        voiced_fraction = voiced.mean(axis=1)
+        any_voiced = voiced.any(axis=1)
+        filled = np.where(any_voiced[:, None], track, 0.0)  # Keeps nanpercentile quiet for silent clips
+
+        low, median, high = np.nanpercentile(filled, [10, 50, 90], axis=1)
+        span = high - low
+
+        # Sweep rate over pairs of consecutive tone frames
+        steps = np.abs(np.diff(track, axis=1)) / hop_seconds
+        has_steps = (~np.isnan(steps)).any(axis=1)
+        sweep_rate = np.nanmedian(np.where(has_steps[:, None], steps, 0.0), axis=1)
+
+        # Time spent at the low or the high level of the track
+        tolerance = np.minimum(40.0, span / 4)[:, None]
+        at_level = (np.abs(track - low[:, None]) <= tolerance) | (np.abs(track - high[:, None]) <= tolerance)
+        two_level = at_level.sum(axis=1) / np.maximum(voiced.sum(axis=1), 1)
+
+        # Repetition period from the autocorrelation of the centred track (zero between tones)
+        centred = np.where(voiced, track - median[:, None], 0.0)
+        spectrum = np.fft.rfft(centred, n=2 * n_frames, axis=1)
+        acf = np.fft.irfft(np.abs(spectrum) ** 2, axis=1)[:, :n_frames]
+        acf /= np.maximum(acf[:, :1], 1e-12)
+        min_lag, max_lag = 3, max(4, (2 * n_frames) // 3)
+        window = acf[:, min_lag:max_lag]
+        # Only local maxima count, so the slow decay of a long sweep is not read as a period
+        is_peak = np.zeros_like(window, dtype=bool)
+        is_peak[:, 1:-1] = (window[:, 1:-1] >= window[:, :-2]) & (window[:, 1:-1] >= window[:, 2:])
+        scored = np.where(is_peak & (window > 0.2), window, -np.inf)
+        best = scored.argmax(axis=1)
+        found = np.isfinite(scored[np.arange(n_clips), best])
+        period = np.where(found, (best + min_lag) * hop_seconds, np.nan)
+
+        return {
+            'voiced': voiced_fraction,
+            'peak_freq': np.where(any_voiced, median, 0.0),
+            'span': np.where(any_voiced, span, 0.0),
+            'sweep_rate': sweep_rate,
+            'two_level': two_level,
+            'period': period,
+        }
+
+    def match(self, features):
+        """Name of the first matching pattern for every clip ('none' where nothing matches)"""
+        n_clips = len(features['voiced'])
+        patterns = np.full(n_clips, 'none', dtype=object)
+        open_ = features['voiced'] >= self.min_voiced
+        for name, limits in self.patterns.items():
+            ok = open_.copy()
+            for key in ('span', 'sweep_rate'):
+                low, high = limits[key]
+                if low is not None:
+                    ok &= features[key] >= low
+                if high is not None:
+                    ok &= features[key] <= high
+            if limits['two_level'] is not None:
+                ok &= features['two_level'] >= limits['two_level']
+            if limits['period'] is not None:
+                # Clips shorter than a cycle show no period, which does not rule a pattern out
+                period = features['period']
+                ok &= np.isnan(period) | ((period >= limits['period'][0]) & (period <= limits['period'][1]))
+            patterns[ok] = name
+            open_ &= ~ok
+        return patterns
+
+    def siren_type(self, pattern, peak_freq):
+        """First profile using the pattern whose band contains the tone"""
+        for siren_type, profile in self.profiles.items():
+            uses = profile['pattern']
+            uses = (uses,) if isinstance(uses, str) else uses
+            if pattern in uses and profile['min_freq'] <= peak_freq <= profile['max_freq']:
+                return siren_type
+        return SirenType.NONE
+
+    def classify_batch(self, clips):
+        """
+        Classify equal-length clips in one pass
+
+        Args:
+            clips: Array of clips x samples
+
+        Returns:
+            List of SirenClassification, one per clip
+        """
+        return self.classify_features(self.features(clips))
+
+    def classify_features(self, features):
+        """List of SirenClassification for features from features() or track_features()"""
+        patterns = self.match(features)
+        results = []
+        for i, pattern in enumerate(patterns):
+            peak_freq = float(features['peak_freq'][i])
+            results.append(SirenClassification(
+                pattern, self.siren_type(pattern, peak_freq) if pattern != 'none' else SirenType.NONE,
+                float(features['voiced'][i]), peak_freq, float(features['span'][i]),
+                float(features['sweep_rate'][i]), float(features['two_level'][i]), float(features['period'][i])))
+        return results
+
+    def classify(self, samples):
+        """Classify one clip of mono samples"""
+        samples = np.asarray(samples, dtype=np.float32)
+        if samples.ndim > 1:
+            samples = samples.mean(axis=1)
+        if len(samples) < 2 * self.frame_size:
+            return SirenClassification('none', SirenType.NONE, 0.0, 0.0, 0.0, 0.0, 0.0, float('nan'))
+        return self.classify_batch(samples[None, :])[0]
+
+
+def synthesize_siren(pattern, duration=3.0, sample_rate=SAMPLE_RATE, snr_db=10.0, rng=None):
+    """
+    Synthetic siren with random timing and pitch, over traffic-like noise
+
+    Args:
+        pattern: 'wail', 'yelp', 'hi-lo', 'steady' or 'none' (noise only)
+        duration: Seconds of audio
+        snr_db: Siren to noise power ratio over the whole spectrum
+        rng: numpy Generator (default: a fresh unseeded one)
+
+    Returns:
+        float32 mono samples in [-1, 1]
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    n = int(duration * sample_rate)
+    t = np.arange(n) / sample_rate
+
+    if pattern == 'wail':
+        low, high, period = rng.uniform(500, 700), rng.uniform(1100, 1500), rng.uniform(2.0, 5.0)
+        freq = low + (high - low) * 0.5 * (1 - np.cos(2 * np.pi * t / period + rng.uniform(0, 2 * np.pi)))
+    elif pattern == 'yelp':
+        low, high, period = rng.uniform(500, 800), rng.uniform(1200, 1600), rng.uniform(0.15, 0.5)
+        phase = (t / period + rng.uniform()) % 1.0
+        rise = rng.uniform(0.5, 0.8)  # Rising part of each sweep
+        freq = low + (high - low) * np.where(phase < rise, phase / rise, (1 - phase) / (1 - rise))
+    elif pattern == 'hi-lo':
+        low, period = rng.uniform(600, 1000), rng.uniform(0.8, 2.0)
+        high = low * rng.uniform(1.2, 1.5)
+        freq = np.where((t / period + rng.uniform()) % 1.0 < 0.5, high, low)
+    elif pattern == 'steady':
+        base = rng.uniform(850, 1150)
+        freq = base + 3 * np.sin(2 * np.pi * rng.uniform(4, 7) * t)  # Slight vibrato
+    elif pattern == 'none':
+        freq = None
+    else:
+        raise ValueError(f"Unknown siren pattern: {pattern}")
+
+    siren = np.zeros(n)
+    if freq is not None:
+        phase = 2 * np.pi * np.cumsum(freq) / sample_rate
+        for harmonic, gain in ((1, 1.0), (2, 0.35), (3, 0.15)):
+            siren += gain * np.sin(harmonic * phase)
+        siren *= 0.5 * (1 + 0.2 * np.sin(2 * np.pi * rng.uniform(0.2, 1.0) * t))  # Passing / Doppler loudness
+
+    # Engine rumble (leaky-integrated white noise) plus broadband hiss
+    rumble = lfilter([1.0], [1.0, -0.995], rng.standard_normal(n))
+    noise = rumble / (rumble.std() + 1e-12) + 0.5 * rng.standard_normal(n)
+    if freq is not None:
+        noise *= np.sqrt(np.mean(siren ** 2) / np.mean(noise ** 2) / 10 ** (snr_db / 10))
+    else:
+        noise *= rng.uniform(0.05, 0.3) / noise.std()
+
+    audio = siren + noise
+    audio *= rng.uniform(0.3, 0.9) / max(np.abs(audio).max(), 1e-12)
+    return audio.astype(np.float32)
+
+
+def write_wav(path, samples, sample_rate=SAMPLE_RATE):
+    """Write mono float samples in [-1, 1] as a 16-bit PCM WAV file"""
+    pcm = (np.clip(samples, -1, 1) * np.iinfo(np.int16).max).astype(np.int16)
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm.tobytes())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("wavs", nargs='*', help="WAV files to classify")
+    parser.add_argument("--synthesize", choices=LABELS, help="Write a synthetic siren instead")
+    parser.add_argument("--duration", type=float, default=3.0, help="Seconds of synthetic audio")
+    parser.add_argument("--snr", type=float, default=10.0, help="Synthetic siren to noise ratio (dB)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", default="siren.wav", help="Synthetic WAV path")
+    args = parser.parse_args()
+
+    if args.synthesize:
+        samples = synthesize_siren(args.synthesize, args.duration, snr_db=args.snr,
+                                   rng=np.random.default_rng(args.seed))
+        write_wav(args.output, samples)
+        print(f"Wrote {args.duration:g}s {args.synthesize} siren to {args.output}")
+    elif args.wavs:
+        for path in args.wavs:
+            source = WavFileSource(path)
+            result = SirenPatternClassifier(source.sample_rate).classify(source.samples)
+            print(f"{path}: {result}")
+    else:
+        parser.error("give WAV files or --synthesize")
+
+
+if __name__ == "__main__":
+    main()
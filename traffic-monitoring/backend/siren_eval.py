@@ -0,0 +1,165 @@
+"""
+Batch evaluation of siren classification on labelled WAV clips
+
+Clips are named <label>_<n>.wav, where label is a siren pattern ('wail',
+'yelp', 'hi-lo', 'steady') or 'none'. --generate writes a synthetic set
+with synthesize_siren() at random signal-to-noise ratios. The clips are
+classified in a process pool, in batches of equal-length clips that
+share one spectrogram call, and the report compares:
+
+    pattern   - SirenPatternClassifier (spectrogram track + pattern matching)
+    peak      - the previous single-FFT argmax: first SIREN_PROFILES band
+                containing the loudest frequency of the whole clip
+
+Reported: per-label pattern accuracy and confusion matrix, siren type
+accuracy of both methods, and clips classified per second.
+
+Usage:
+    python siren_eval.py --generate data/siren_clips --clips 100   # 100 clips per label
+    python siren_eval.py data/siren_clips [--workers 4] [--batch 32]
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from siren_classifier import LABELS, SirenPatternClassifier, synthesize_siren, write_wav
+from siren_stream import SirenType, SIREN_PROFILES, SAMPLE_RATE, THRESHOLD, WavFileSource
+
+
+def expected_type(label):
+    """Siren type of the first profile using a pattern"""
+    for siren_type, profile in SIREN_PROFILES.items():
+        uses = profile['pattern']
+        if label in ((uses,) if isinstance(uses, str) else uses):
+            return siren_type
+    return SirenType.NONE
+
+
+def peak_classify(samples, sample_rate=SAMPLE_RATE):
+    """The single-FFT argmax check formerly in SirenValidator.analyze_frequencies"""
+    n = len(samples)
+    magnitudes = 2 / n * np.abs(np.fft.rfft(samples)[:n // 2])
+    peak_freq = np.argmax(magnitudes) * sample_rate / n
+    if magnitudes.max() < THRESHOLD:
+        return SirenType.NONE
+    for siren_type, profile in SIREN_PROFILES.items():
+        if profile['min_freq'] <= peak_freq <= profile['max_freq']:
+            return siren_type
+    return SirenType.NONE
+
+
+def _write_clip(path, label, duration, snr_db, seed):
+    write_wav(path, synthesize_siren(label, duration, snr_db=snr_db, rng=np.random.default_rng(seed)))
+    return path
+
+
+def generate_dataset(directory, clips_per_label, duration=3.0, snr_range=(-5.0, 15.0), seed=0, workers=None):
+    """
+    Write clips_per_label synthetic clips of every label to directory
+
+    Returns:
+        List of the written paths
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    jobs = []
+    for label in LABELS:
+        for i in range(clips_per_label):
+            path = os.path.join(directory, f"{label}_{i:04d}.wav")
+            jobs.append((path, label, duration, float(rng.uniform(*snr_range)), int(rng.integers(2 ** 31))))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_write_clip, *zip(*jobs), chunksize=16))
+
+
+def classify_files(paths):
+    """
+    Classify a batch of WAV files (executed in a worker process)
+
+    Returns:
+        List of (path, pattern, siren type name, peak-method siren type name)
+    """
+    sources = [WavFileSource(path) for path in paths]
+    groups = {}  # (sample rate, length) -> indices, so each group is one spectrogram call
+    for i, source in enumerate(sources):
+        groups.setdefault((source.sample_rate, len(source.samples)), []).append(i)
+
+    results = [None] * len(paths)
+    for (sample_rate, _), indices in groups.items():
+        classifier = SirenPatternClassifier(sample_rate)
+        clips = np.stack([sources[i].samples for i in indices])
+        for i, result in zip(indices, classifier.classify_batch(clips)):
+            results[i] = (paths[i], result.pattern, result.siren_type.name,
+                          peak_classify(sources[i].samples, sample_rate).name)
+    return results
+
+
+def evaluate(paths, workers=None, batch_size=32):
+    """Classify every clip in a process pool; returns classify_files() rows in path order"""
+    batches = [paths[i:i + batch_size] for i in range(0, len(paths), batch_size)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return [row for rows in executor.map(classify_files, batches) for row in rows]
+
+
+def clip_label(path):
+    return os.path.basename(path).rsplit('_', 1)[0]
+
+
+def print_report(rows, elapsed):
+    labels = [label for label in LABELS if any(clip_label(row[0]) == label for row in rows)]
+    predicted = LABELS
+    width = max(len(label) for label in predicted) + 2
+
+    print(f"Pattern confusion (rows: true label, columns: classified as)")
+    print(f"{'':<{width}}" + "".join(f"{label:>{width}}" for label in predicted) + f"{'accuracy':>10}")
+    for label in labels:
+        patterns = [row[1] for row in rows if clip_label(row[0]) == label]
+        counts = [patterns.count(p) for p in predicted]
+        print(f"{label:<{width}}" + "".join(f"{c:>{width}}" for c in counts)
+              + f"{patterns.count(label) / len(patterns):>10.1%}")
+
+    print(f"\nSiren type accuracy (expected type from SIREN_PROFILES patterns)")
+    print(f"{'label':<{width}}{'expected':>12}{'pattern':>10}{'peak':>10}")
+    totals = [0, 0]
+    for label in labels:
+        expected = expected_type(label).name
+        group = [row for row in rows if clip_label(row[0]) == label]
+        hits = [sum(row[2] == expected for row in group), sum(row[3] == expected for row in group)]
+        totals = [t + h for t, h in zip(totals, hits)]
+        print(f"{label:<{width}}{expected:>12}{hits[0] / len(group):>10.1%}{hits[1] / len(group):>10.1%}")
+    print(f"{'all':<{width}}{'':>12}{totals[0] / len(rows):>10.1%}{totals[1] / len(rows):>10.1%}")
+
+    print(f"\n{len(rows)} clips in {elapsed:.2f}s ({len(rows) / elapsed:.0f} clips/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", help="Directory of <label>_<n>.wav clips")
+    parser.add_argument("--generate", action="store_true", help="Write a synthetic clip set to the directory first")
+    parser.add_argument("--clips", type=int, default=100, help="Synthetic clips per label")
+    parser.add_argument("--duration", type=float, default=3.0, help="Seconds per synthetic clip")
+    parser.add_argument("--snr", type=float, nargs=2, default=[-5.0, 15.0], help="Synthetic SNR range (dB)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--batch", type=int, default=32, help="Clips per worker task")
+    args = parser.parse_args()
+
+    if args.generate:
+        start = time.perf_counter()
+        paths = generate_dataset(args.directory, args.clips, args.duration, args.snr, args.seed, args.workers)
+        print(f"Wrote {len(paths)} clips to {args.directory} in {time.perf_counter() - start:.1f}s\n")
+
+    paths = sorted(os.path.join(args.directory, name) for name in os.listdir(args.directory)
+                   if name.endswith('.wav') and clip_label(name) in LABELS)
+    if not paths:
+        parser.error(f"no <label>_<n>.wav clips in {args.directory}")
+
+    start = time.perf_counter()
+    rows = evaluate(paths, args.workers, args.batch)
+    print_report(rows, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""
+Streaming siren detection on a sliding window of audio
+
+Audio arrives in small blocks from a source (microphone callback, WAV file,
+or an array) and is written to a ring buffer holding the last few seconds.
+Every hop (100 ms by default) the detector tracks the dominant tone over the
+last pattern_seconds of the buffer with SirenPatternClassifier and finds
+where the current sustained tone began. Once a tone has lasted
+presence_seconds (0.5 s) its pattern is matched on the tone alone, so a
+siren is reported well under a second after it starts, told apart by how
+its tone moves (wail, yelp, hi-lo, steady) rather than by which overlapping
+band the loudest frequency falls in; the type is refined as more of the
+tone arrives (a hi-lo reads as steady until its first jump). Decisions are
+taken at fixed stream positions, so they do not depend on the block size.
+
+Usage:
+    python siren_stream.py recording.wav        # Decisions for a WAV file
+    python siren_stream.py --microphone         # Live (needs sounddevice)
+"""
+import argparse
+import threading
+import time
+import wave
+from collections import deque
+from enum import Enum
+
+import numpy as np
+
+
+class SirenType(Enum):
+    AMBULANCE = 1
+    FIRE_TRUCK = 2
+    POLICE = 3
+    NONE = 0
+
+
+SAMPLE_RATE = 44100
+THRESHOLD = 0.3  # Minimum amplitude of the dominant tone (full scale = 1.0)
+# A siren tone is under way while this fraction of the frames in any TONE_DENSITY_SECONDS is voiced
+TONE_DENSITY = 0.8
+TONE_DENSITY_SECONDS = 0.15
+
+# Siren Frequency Profiles (Hz)
+SIREN_PROFILES = {
+    SirenType.AMBULANCE: {
+        'min_freq': 500,
+        'max_freq': 1500,
+        'pattern': 'wail'  # Slow rising and falling sweep
+    },
+    SirenType.FIRE_TRUCK: {
+        'min_freq': 800,
+        'max_freq': 1200,
+        'pattern': 'steady'  # Continuous tone
+    },
+    SirenType.POLICE: {
+        'min_freq': 600,
+        'max_freq': 1800,
+        'pattern': ('hi-lo', 'yelp')  # Alternating or fast-sweeping pattern
+    }
+}
+
+
+class AudioRingBuffer:
+    """Last capacity mono samples, written from the audio thread and read from any thread"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.data = np.zeros(capacity, dtype=np.float32)
+        self.written = 0  # Samples written since the start of the stream
+        self._lock = threading.Lock()
+
+    def write(self, samples):
+        samples = samples[-self.capacity:]
+        n = len(samples)
+        with self._lock:
+            start = self.written % self.capacity
+            first = min(n, self.capacity - start)
+            self.data[start:start + first] = samples[:first]
+            self.data[:n - first] = samples[first:]
+            self.written += n
+
+    def read(self, start, end):
+        """Samples [start, end) of the stream (must still be in the buffer)"""
+        with self._lock:
+            if end - start > self.capacity or start < self.written - self.capacity or end > self.written:
+                raise ValueError(f"Samples {start}-{end} are not in the buffer")
+            indices = np.arange(start, end) % self.capacity
+            return self.data[indices]
+
+
+class SirenDecision:
+    """Detector output for one hop"""
+
+    __slots__ = ("time", "siren_type", "pattern", "confidence", "peak_freq")
+
+    def __init__(self, time, siren_type, pattern, confidence, peak_freq):
+        self.time = time              # Stream seconds at the end of the analysed audio
+        self.siren_type = siren_type
+        self.pattern = pattern        # Pattern matched by the classifier, or 'none'
+        self.confidence = confidence  # Fraction of analysed frames with a clear tone in the siren band
+        self.peak_freq = peak_freq    # Median frequency of the tone (Hz)
+
+
+class StreamingSirenDetector:
+    """
+    Siren decisions every hop_seconds from pattern classification of the current tone
+
+    Call process() with every block of audio; decisions are passed to
+    on_decision and kept in decisions. Each decision tracks the tone over
+    pattern_seconds of audio (a few milliseconds of work at 44.1 kHz), so
+    process() stays cheap enough for an audio callback at the default hop.
+
+    Example:
+        detector = StreamingSirenDetector(on_decision=print_changes())
+        detector.run(WavFileSource('street.wav'))
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, hop_seconds=0.1, pattern_seconds=3.0, presence_seconds=0.5,
+                 profiles=None, classifier=None, on_decision=None, history=600):
+        """
+        Args:
+            sample_rate: Samples per second of the stream
+            hop_seconds: Time between decisions
+            pattern_seconds: Audio every decision is based on; long enough to
+                show a few cycles of yelp and hi-lo and most of a wail sweep
+            presence_seconds: Sustained tone needed before a siren is reported;
+                the pattern is matched on the current tone only, so the type
+                is refined as more of it arrives
+            profiles: Siren profiles (default SIREN_PROFILES)
+            classifier: SirenPatternClassifier for the stream (default: one
+                with default settings for sample_rate and profiles)
+            on_decision: Called with every SirenDecision
+            history: Decisions kept in self.decisions
+        """
+        self.sample_rate = sample_rate
+        self.hop = max(1, int(round(hop_seconds * sample_rate)))
+        self.window = max(self.hop, int(round(pattern_seconds * sample_rate)))
+        self.profiles = SIREN_PROFILES if profiles is None else profiles
+        if classifier is None:
+            from siren_classifier import SirenPatternClassifier  # siren_classifier imports this module
+            classifier = SirenPatternClassifier(sample_rate, profiles=self.profiles)
+        self.classifier = classifier
+        frame_seconds = classifier.frame_hop / sample_rate
+        self.presence_frames = max(4, int(np.ceil(presence_seconds / frame_seconds)))
+        self.density_frames = max(1, int(round(TONE_DENSITY_SECONDS / frame_seconds)))
+        self.on_decision = on_decision
+
+        self.buffer = AudioRingBuffer(self.window)
+        self._next_decision = self.hop
+        self.decisions = deque(maxlen=history)
+        self.current = None
+
+    def process(self, block):
+        """Feed one block of mono float samples; returns the decisions it completed"""
+        block = np.asarray(block, dtype=np.float32)
+        if block.ndim > 1:
+            block = block.mean(axis=1)
+        decisions = []
+        # Write up to each decision point, so long blocks skip no decision
+        position = 0
+        while position < len(block):
+            take = min(len(block) - position, self._next_decision - self.buffer.written)
+            self.buffer.write(block[position:position + take])
+            position += take
+            if self.buffer.written == self._next_decision:
+                decisions.append(self._decide(self._next_decision))
+                self._next_decision += self.hop
+        return decisions
+
+    def _tone_onset(self, voiced):
+        """
+        First frame of the current sustained tone (0 if it fills the window)
+
+        Noise alone has a tone-like peak in scattered frames; a siren keeps
+        nearly every frame voiced, so the tone starts after the last stretch
+        of density_frames that is not TONE_DENSITY voiced.
+        """
+        n = self.density_frames
+        density = np.convolve(voiced, np.ones(n) / n, mode='valid')
+        sparse = np.flatnonzero(density < TONE_DENSITY)
+        return int(sparse[-1]) + n if len(sparse) else 0
+
+    def _decide(self, end):
+        # Until pattern_seconds have arrived, the decision covers the audio so far
+        samples = self.buffer.read(max(0, end - self.window), end)
+        siren_type, pattern, confidence, peak_freq = SirenType.NONE, 'none', 0.0, 0.0
+        if len(samples) >= 2 * self.classifier.frame_size:
+            _, track, voiced = self.classifier.track(samples)
+            # Only the current tone counts, so a siren is matched once it has sounded
+            # for presence_seconds instead of once it fills most of the window
+            onset = self._tone_onset(voiced[0])
+            if voiced.shape[1] - onset >= self.presence_frames:
+                features = self.classifier.track_features(track[:, onset:], voiced[:, onset:])
+                result = self.classifier.classify_features(features)[0]
+                # Run as a script, the classifier's NONE comes from the imported copy of this module
+                if result.siren_type in self.profiles:
+                    siren_type, pattern = result.siren_type, result.pattern
+                    confidence, peak_freq = result.confidence, result.peak_freq
+                elif self.current is not None and self.current.siren_type != SirenType.NONE:
+                    # The tone already matched is still sounding (any break would have reset
+                    # the onset): keep its siren through stretches that match no pattern
+                    siren_type, pattern = self.current.siren_type, self.current.pattern
+                    confidence, peak_freq = result.confidence, self.current.peak_freq
+        decision = SirenDecision(end / self.sample_rate, siren_type, pattern, confidence, peak_freq)
+        self.decisions.append(decision)
+        self.current = decision
+        if self.on_decision is not None:
+            self.on_decision(decision)
+        return decision
+
+    def run(self, source):
+        """Process every block of a finite source synchronously (WAV files, arrays, tests)"""
+        for block in source.blocks():
+            self.process(block)
+        return list(self.decisions)
+
+
+class ArraySource:
+    """Audio from an array, in blocks"""
+
+    def __init__(self, samples, sample_rate=SAMPLE_RATE, blocksize=1024):
+        self.samples = np.asarray(samples, dtype=np.float32)
+        self.sample_rate = sample_rate
+        self.blocksize = blocksize
+
+    def blocks(self):
+        for start in range(0, len(self.samples), self.blocksize):
+            yield self.samples[start:start + self.blocksize]
+
+
+class WavFileSource(ArraySource):
+    """Audio from a PCM WAV file (8/16/32-bit, mixed down to mono), in blocks"""
+
+    def __init__(self, path, blocksize=1024):
+        with wave.open(path, 'rb') as wav:
+            sample_rate = wav.getframerate()
+            channels = wav.getnchannels()
+            width = wav.getsampwidth()
+            raw = wav.readframes(wav.getnframes())
+        if width == 1:
+            samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) / 128
+        elif width in (2, 4):
+            dtype = np.int16 if width == 2 else np.int32
+            samples = np.frombuffer(raw, dtype=dtype).astype(np.float32) / np.iinfo(dtype).max
+        else:
+            raise ValueError(f"Unsupported WAV sample width: {8 * width} bits")
+        super().__init__(samples.reshape(-1, channels).mean(axis=1), sample_rate, blocksize)
+
+
+class MicrophoneSource:
+    """Live input through a sounddevice callback stream"""
+
+    def __init__(self, sample_rate=SAMPLE_RATE, blocksize=1024, device=None):
+        self.sample_rate = sample_rate
+        self.blocksize = blocksize
+        self.device = device
+        self.stream = None
+
+    def start(self, callback):
+        """Call callback(block) from the audio thread for every block recorded"""
+        import sounddevice as sd
+
+        def on_audio(indata, frames, time_info, status):
+            if status:
+                print(f"Audio input: {status}")
+            callback(indata[:, 0])
+
+        self.stream = sd.InputStream(samplerate=self.sample_rate, blocksize=self.blocksize, channels=1,
+                                     dtype='float32', device=self.device, callback=on_audio)
+        self.stream.start()
+
+    def stop(self):
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream.close()
+            self.stream = None
+
+
+def print_changes():
+    """on_decision callback printing only when the detected siren changes"""
+    last = [None]
+
+    def on_decision(decision):
+        if decision.siren_type != last[0]:
+            last[0] = decision.siren_type
+            if decision.siren_type == SirenType.NONE:
+                print(f"{decision.time:7.1f}s  No siren detected")
+            else:
+                print(f"{decision.time:7.1f}s  {decision.siren_type.name} SIREN DETECTED "
+                      f"({decision.pattern}, {decision.peak_freq:.0f} Hz, {decision.confidence:.0%} of frames)")
+    return on_decision
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("wav", nargs='?', help="WAV file to analyse")
+    parser.add_argument("--microphone", action="store_true", help="Listen to the default input device")
+    parser.add_argument("--hop", type=float, default=0.1, help="Seconds between decisions")
+    args = parser.parse_args()
+
+    if args.microphone:
+        source = MicrophoneSource()
+        detector = StreamingSirenDetector(source.sample_rate, hop_seconds=args.hop, on_decision=print_changes())
+        source.start(detector.process)
+        print("Listening... press Ctrl+C to stop")
+        try:
+            while True:
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            source.stop()
+    elif args.wav:
+        source = WavFileSource(args.wav)
+        detector = StreamingSirenDetector(source.sample_rate, hop_seconds=args.hop, on_decision=print_changes())
+        start = time.perf_counter()
+        decisions = detector.run(source)
+        elapsed = time.perf_counter() - start
+        audio_seconds = len(source.samples) / source.sample_rate
+        print(f"{len(decisions)} decisions over {audio_seconds:.1f}s of audio in {elapsed:.2f}s")
+    else:
+        parser.error("give a WAV file or --microphone")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frame_sampler import AdaptiveFrameSampler
+
+STATIC = np.full((90, 160, 3), 120, dtype=np.uint8)
+
+
+def inferred_frames(sampler, n):
+    return [i for i in range(n) if sampler.should_infer(STATIC)]
+
+
+def test_static_scene_runs_at_min_rate():
+    sampler = AdaptiveFrameSampler(30.0, min_rate=0.5, max_rate=2.0)
+    assert inferred_frames(sampler, 180) == [0, 60, 120]
+
+
+def test_boost_samples_above_max_rate():
+    sampler = AdaptiveFrameSampler(30.0, min_rate=0.5, max_rate=2.0, boost_rate=5.0)
+    sampler.should_infer(STATIC)
+    sampler.boost(1.0)
+    # Every 6th frame (5 Hz) for a second, then the static scene drops back to the min rate
+    assert [i + 1 for i in inferred_frames(sampler, 100)] == [6, 12, 18, 24, 30, 90]
@@ -0,0 +1,52 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from siren_classifier import synthesize_siren
+from siren_stream import ArraySource, SirenType, StreamingSirenDetector
+
+
+@pytest.mark.parametrize("pattern, siren_type", [
+    ('wail', SirenType.AMBULANCE),
+    ('steady', SirenType.FIRE_TRUCK),
+    ('hi-lo', SirenType.POLICE),
+    ('yelp', SirenType.POLICE),
+    ('none', SirenType.NONE),
+])
+def test_streaming_decision_at_10_db(pattern, siren_type):
+    samples = synthesize_siren(pattern, 4.0, snr_db=10.0, rng=np.random.default_rng(0))
+    decisions = StreamingSirenDetector().run(ArraySource(samples))
+    assert decisions[-1].siren_type == siren_type
+
+
+@pytest.mark.parametrize("pattern, siren_type", [
+    ('wail', SirenType.AMBULANCE),
+    ('steady', SirenType.FIRE_TRUCK),
+    ('hi-lo', SirenType.POLICE),
+    ('yelp', SirenType.POLICE),
+])
+def test_siren_reported_soon_after_onset(pattern, siren_type):
+    rng = np.random.default_rng(2)
+    noise = synthesize_siren('none', 4.0, rng=rng)
+    samples = np.concatenate((noise, synthesize_siren(pattern, 4.0, snr_db=10.0, rng=rng)))
+    decisions = StreamingSirenDetector().run(ArraySource(samples))
+
+    assert all(d.siren_type == SirenType.NONE for d in decisions if d.time <= 4.0)
+    after = [d for d in decisions if d.time > 4.0]
+    first_siren = next(d.time for d in after if d.siren_type != SirenType.NONE) - 4.0
+    first_match = next(d.time for d in after if d.siren_type == siren_type) - 4.0
+    assert first_siren <= 1.0
+    assert first_match <= 1.5  # A hi-lo reads as steady until its first jump
+    assert after[-1].siren_type == siren_type
+
+
+def test_decisions_do_not_depend_on_block_size():
+    samples = synthesize_siren('yelp', 2.0, snr_db=10.0, rng=np.random.default_rng(1))
+    small = StreamingSirenDetector().run(ArraySource(samples, blocksize=256))
+    large = StreamingSirenDetector().run(ArraySource(samples, blocksize=44100))
+    assert [(d.time, d.siren_type, d.confidence) for d in small] == \
+           [(d.time, d.siren_type, d.confidence) for d in large]
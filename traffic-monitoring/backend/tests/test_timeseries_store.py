@@ -0,0 +1,43 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timeseries_store import TimeSeriesStore
+
+FIELDS = ('vehicle_count', 'green_time')
+
+
+def test_open_rollup_bucket_survives_reopen(tmp_path):
+    store = TimeSeriesStore(FIELDS, directory=str(tmp_path))
+    for t, count in ((3600, 4), (3660, 10), (3720, 7)):
+        store.append(t, vehicle_count=count, green_time=15.0)
+    store.flush()
+
+    store = TimeSeriesStore(FIELDS, directory=str(tmp_path))
+    store.append(4000, vehicle_count=1, green_time=15.0)
+    store.append(7200, vehicle_count=2, green_time=16.0)  # Closes the first hour
+
+    hours = store.rollup('hour', include_current=False)
+    assert hours[:, 0].tolist() == [3600]
+    assert hours[0, 1] == 4  # Samples from before and after the reopen
+    columns = ['time', 'samples'] + [f"{f}_{s}" for f in FIELDS for s in ('mean', 'min', 'max')]
+    row = dict(zip(columns, hours[0]))
+    assert row['vehicle_count_mean'] == np.mean([4, 10, 7, 1])
+    assert (row['vehicle_count_min'], row['vehicle_count_max']) == (1, 10)
+
+    current = store.rollup('hour')[-1]
+    assert current[0] == 7200 and current[1] == 1
+
+
+def test_in_memory_rollup():
+    store = TimeSeriesStore(FIELDS)
+    assert len(store.rollup('minute')) == 0
+    store.append(0, vehicle_count=3, green_time=15.0)
+    store.append(30, vehicle_count=5, green_time=17.0)
+    store.append(60, vehicle_count=1, green_time=10.0)
+    minutes = store.rollup('minute')
+    assert minutes[:, 0].tolist() == [0, 60]
+    assert minutes[:, 1].tolist() == [2, 1]
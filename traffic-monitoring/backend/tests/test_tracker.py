@@ -0,0 +1,33 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tracker
+from tracker import VehicleTracker, _match
+
+
+def test_unmatched_tracks_and_detections_of_different_classes():
+    # The leftover track (class 2) and detection (class 7) make an all-inf centroid cost matrix
+    t = VehicleTracker()
+    t.update([[0, 0, 50, 50]], [2], 0)
+    assignments = t.update([[400, 400, 450, 450]], [7], 1)
+
+    assert len(assignments) == 1
+    track, index = assignments[0]
+    assert index == 0
+    assert track.class_id == 7
+    assert len(t.tracks) == 2
+
+
+def test_match_skips_forbidden_pairs():
+    cost = np.array([[0.1, np.inf], [np.inf, np.inf]])
+    assert _match(cost, 0.5) == [(0, 0)]
+
+
+def test_match_greedy_fallback_skips_forbidden_pairs(monkeypatch):
+    monkeypatch.setattr(tracker, "linear_sum_assignment", None)
+    cost = np.array([[np.inf, 0.2], [np.inf, np.inf]])
+    assert _match(cost, 0.5) == [(0, 1)]
@@ -0,0 +1,248 @@
+import os
+
+import numpy as np
+
+# Rollup resolutions kept by default: (name, bucket length in seconds)
+DEFAULT_ROLLUPS = (('minute', 60), ('hour', 3600))
+
+
+class RingBuffer:
+    """
+    Fixed-capacity table of float64 rows, oldest rows overwritten first
+
+    Column 0 is the timestamp, followed by one column per field. Rows must be
+    appended in time order. With a path the table lives in a memory-mapped
+    .npy file (plus a small <path>.state.npy with the write position), so the
+    history survives restarts.
+    """
+
+    def __init__(self, fields, capacity, path=None):
+        """
+        Args:
+            fields: Names of the value columns
+            capacity: Rows kept before the oldest are overwritten
+            path: Optional .npy file to keep the rows in (created if missing)
+        """
+        self.fields = tuple(fields)
+        self.columns = {name: i + 1 for i, name in enumerate(self.fields)}
+        self.capacity = capacity
+        self.path = path
+        shape = (capacity, len(self.fields) + 1)
+
+        if path is None:
+            self._rows = np.zeros(shape)
+            self._state = np.zeros(2, dtype=np.int64)  # (next write position, row count)
+        else:
+            state_path = path + '.state.npy'
+            if os.path.exists(path) and os.path.exists(state_path):
+                self._rows = np.lib.format.open_memmap(path, mode='r+')
+                self._state = np.lib.format.open_memmap(state_path, mode='r+')
+                if self._rows.shape != shape:
+                    raise ValueError(f"{path} holds {self._rows.shape} rows, expected {shape}")
+            else:
+                self._rows = np.lib.format.open_memmap(path, mode='w+', dtype=np.float64, shape=shape)
+                self._state = np.lib.format.open_memmap(state_path, mode='w+', dtype=np.int64, shape=(2,))
+
+    def __len__(self):
+        return int(self._state[1])
+
+    def append(self, timestamp, values):
+        """Add a row; values is a sequence in field order"""
+        head = int(self._state[0])
+        row = self._rows[head]
+        row[0] = timestamp
+        row[1:] = values
+        self._state[0] = (head + 1) % self.capacity
+        self._state[1] = min(int(self._state[1]) + 1, self.capacity)
+
+    def last(self):
+        """Newest row as {'time': ..., field: ...}, or None if empty"""
+        if not len(self):
+            return None
+        row = self._rows[int(self._state[0]) - 1]
+        return dict(zip(('time',) + self.fields, row.tolist()))
+
+    def latest(self, n=None):
+        """Newest n rows (default: all) as an (n, 1 + fields) array, oldest first"""
+        count = len(self)
+        n = count if n is None else min(n, count)
+        head = int(self._state[0])
+        start = head - n
+        if start >= 0:
+            return self._rows[start:head].copy()
+        return np.concatenate((self._rows[start:], self._rows[:head]))
+
+    def window(self, start=None, end=None):
+        """Rows with start <= time < end, oldest first"""
+        rows = self.latest()
+        times = rows[:, 0]
+        lo = 0 if start is None else np.searchsorted(times, start, side='left')
+        hi = len(rows) if end is None else np.searchsorted(times, end, side='left')
+        return rows[lo:hi]
+
+    def column(self, rows, field):
+        """One field of rows returned by latest() or window()"""
+        return rows[:, 0] if field == 'time' else rows[:, self.columns[field]]
+
+    def flush(self):
+        """Write memory-mapped rows to disk"""
+        if self.path is not None:
+            self._rows.flush()
+            self._state.flush()
+
+
+class Rollup:
+    """
+    Downsampled history: mean, min and max of every field per time bucket
+
+    Samples are accumulated into the current bucket; once a sample falls into
+    a later bucket the finished one becomes a row of the rollup ring, stored
+    with the bucket start time. With a path the bucket being filled is kept
+    in <path>.open.npy, so a reopened store carries on with it.
+    """
+
+    def __init__(self, fields, bucket_seconds, capacity, path=None):
+        self.fields = tuple(fields)
+        self.bucket_seconds = bucket_seconds
+        stat_fields = ['samples'] + [f"{name}_{stat}" for name in self.fields for stat in ('mean', 'min', 'max')]
+        self.buckets = RingBuffer(stat_fields, capacity, path)
+
+        # Open bucket: start time (NaN before the first sample), sample count, then sum, min and max per field
+        n = len(self.fields)
+        shape = (2 + 3 * n,)
+        open_path = path + '.open.npy' if path is not None else None
+        if open_path is not None and os.path.exists(open_path):
+            self._open = np.lib.format.open_memmap(open_path, mode='r+')
+            if self._open.shape != shape:
+                raise ValueError(f"{open_path} holds {self._open.shape} values, expected {shape}")
+        else:
+            if open_path is None:
+                self._open = np.zeros(shape)
+            else:
+                self._open = np.lib.format.open_memmap(open_path, mode='w+', dtype=np.float64, shape=shape)
+            self._open[0] = np.nan
+            self._open[2 + n:2 + 2 * n] = np.inf
+            self._open[2 + 2 * n:] = -np.inf
+        self._sum = self._open[2:2 + n]
+        self._min = self._open[2 + n:2 + 2 * n]
+        self._max = self._open[2 + 2 * n:]
+
+    @property
+    def _bucket_start(self):
+        start = self._open[0]
+        return None if np.isnan(start) else float(start)
+
+    @property
+    def _count(self):
+        return int(self._open[1])
+
+    def add(self, timestamp, values):
+        bucket_start = timestamp - timestamp % self.bucket_seconds
+        if self._bucket_start is not None and bucket_start != self._bucket_start:
+            self._close_bucket()
+        self._open[0] = bucket_start
+        values = np.asarray(values, dtype=np.float64)
+        self._open[1] += 1
+        self._sum += values
+        np.minimum(self._min, values, out=self._min)
+        np.maximum(self._max, values, out=self._max)
+
+    def _bucket_row(self):
+        stats = np.column_stack((self._sum / self._count, self._min, self._max)).ravel()
+        return np.concatenate(([self._count], stats))
+
+    def _close_bucket(self):
+        if self._count:
+            self.buckets.append(self._bucket_start, self._bucket_row())
+        self._open[1] = 0
+        self._sum[:] = 0
+        self._min[:] = np.inf
+        self._max[:] = -np.inf
+
+    def rows(self, n=None, include_current=True):
+        """
+        Newest n buckets, oldest first
+
+        Args:
+            n: Buckets to return (default: all)
+            include_current: Also return the bucket still being filled
+        """
+        rows = self.buckets.latest(n)
+        if include_current and self._count and n != 0:
+            current = np.concatenate(([self._bucket_start], self._bucket_row()))[np.newaxis]
+            rows = np.concatenate((rows[1:] if n is not None and len(rows) == n else rows, current))
+        return rows
+
+    def flush(self):
+        """Write the memory-mapped buckets and the open bucket to disk"""
+        self.buckets.flush()
+        if isinstance(self._open, np.memmap):
+            self._open.flush()
+
+
+class TimeSeriesStore:
+    """
+    Bounded time series of a few numeric fields with per-minute/hour rollups
+
+    Raw samples go into a fixed-capacity ring; every rollup keeps its own
+    ring of downsampled buckets, so memory stays constant however long the
+    controller runs. With a directory all rings are memory-mapped files in it.
+
+    Example:
+        store = TimeSeriesStore(('vehicle_count', 'green_time'))
+        store.append(time.time(), vehicle_count=12, green_time=21.0)
+        store.last()['green_time']
+        store.rollup('minute')  # rows of time, samples, vehicle_count_mean, ...
+    """
+
+    def __init__(self, fields, capacity=4096, rollups=DEFAULT_ROLLUPS, rollup_capacity=2048, directory=None):
+        """
+        Args:
+            fields: Names of the numeric fields
+            capacity: Raw samples kept
+            rollups: (name, bucket seconds) pairs of the downsampled series
+            rollup_capacity: Buckets kept per rollup
+            directory: Optional folder for memory-mapped storage
+        """
+        self.fields = tuple(fields)
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+        def path(name):
+            return os.path.join(directory, f"{name}.npy") if directory is not None else None
+
+        self.raw = RingBuffer(self.fields, capacity, path('raw'))
+        self.rollups = {name: Rollup(self.fields, seconds, rollup_capacity, path(name))
+                        for name, seconds in rollups}
+
+    def __len__(self):
+        return len(self.raw)
+
+    def append(self, timestamp, **values):
+        """Add a sample; every field must be given"""
+        row = [values[name] for name in self.fields]
+        self.raw.append(timestamp, row)
+        for rollup in self.rollups.values():
+            rollup.add(timestamp, row)
+
+    def last(self):
+        """Newest sample as {'time': ..., field: ...}, or None if empty"""
+        return self.raw.last()
+
+    def latest(self, n=None):
+        """Newest n raw samples, oldest first (columns: time, then the fields)"""
+        return self.raw.latest(n)
+
+    def window(self, start=None, end=None):
+        """Raw samples with start <= time < end"""
+        return self.raw.window(start, end)
+
+    def rollup(self, name, n=None, include_current=True):
+        """Newest n buckets of a rollup (columns: bucket start, samples, then mean/min/max per field)"""
+        return self.rollups[name].rows(n, include_current)
+
+    def flush(self):
+        """Write memory-mapped history to disk"""
+        self.raw.flush()
+        for rollup in self.rollups.values():
+            rollup.flush()
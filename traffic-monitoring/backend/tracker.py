@@ -0,0 +1,267 @@
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:  # Greedy matching is used when scipy is not installed
+    linear_sum_assignment = None
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """
+    Pairwise intersection-over-union of two sets of x1, y1, x2, y2 boxes
+
+    Returns:
+        float array (len(boxes_a), len(boxes_b))
+    """
+    a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 1, 4)
+    b = np.asarray(boxes_b, dtype=np.float64).reshape(1, -1, 4)
+
+    inter_w = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    inter_h = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = inter_w * inter_h
+
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    union = area_a + area_b - inter
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+
+def _match(cost, max_cost):
+    """
+    Assign rows to columns minimising total cost, ignoring pairs above max_cost
+
+    Returns:
+        List of (row, col) pairs
+    """
+    if cost.size == 0:
+        return []
+
+    if linear_sum_assignment is not None:
+        # Forbidden (inf) pairs get a finite sentinel: scipy rejects an all-inf row or
+        # column as infeasible, and the max_cost filter drops the sentinel pairs anyway
+        finite = np.isfinite(cost)
+        sentinel = 2 * max(cost[finite].max(initial=0.0), max_cost) + 1
+        rows, cols = linear_sum_assignment(np.where(finite, cost, sentinel))
+        return [(r, c) for r, c in zip(rows.tolist(), cols.tolist()) if cost[r, c] <= max_cost]
+
+    # Greedy: cheapest pairs first
+    pairs = []
+    used_rows, used_cols = set(), set()
+    for flat in np.argsort(cost, axis=None):
+        r, c = divmod(int(flat), cost.shape[1])
+        if cost[r, c] > max_cost:
+            break
+        if r not in used_rows and c not in used_cols:
+            pairs.append((r, c))
+            used_rows.add(r)
+            used_cols.add(c)
+    return pairs
+
+
+def _side_of_line(points, line):
+    """Sign of each point relative to a directed line ((x1, y1), (x2, y2))"""
+    (x1, y1), (x2, y2) = line
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    return np.sign((x2 - x1) * (points[:, 1] - y1) - (y2 - y1) * (points[:, 0] - x1))
+
+
+class Track:
+    """One tracked vehicle"""
+
+    def __init__(self, track_id, box, class_id, confidence, frame_index, is_emergency=False):
+        self.track_id = track_id
+        self.box = np.asarray(box, dtype=np.float64)
+        self.velocity = np.zeros(4)  # Box change per frame (constant-velocity model)
+        self.class_id = class_id
+        self.confidence = confidence
+        self.is_emergency = is_emergency
+        self.first_frame = frame_index
+        self.last_frame = frame_index
+        self.hits = 1
+        self.crossed = False
+
+    @property
+    def centroid(self):
+        return (self.box[:2] + self.box[2:]) / 2
+
+    def predict(self, frame_index):
+        """Box extrapolated to a frame from the last match"""
+        return self.box + self.velocity * (frame_index - self.last_frame)
+
+    def dwell_frames(self):
+        return self.last_frame - self.first_frame
+
+
+class VehicleTracker:
+    """
+    SORT-style multi-object tracker on CPU (IoU matching with a centroid fallback)
+
+    Detections are associated with existing tracks by IoU against each track's
+    constant-velocity prediction. Detections left over, e.g. because frames were
+    skipped between detector runs, get a second chance by centroid distance.
+    A track counts as a unique vehicle once it has been matched `min_hits`
+    times, and crossing the optional counting line is counted once per track.
+
+    Between detector runs, predict() interpolates every live track so boxes
+    can still be drawn on the skipped frames.
+    """
+
+    def __init__(self, iou_threshold=0.3, max_missed=15, min_hits=2,
+                 centroid_threshold=1.0, counting_line=None, fps=30.0, smoothing=0.5):
+        """
+        Args:
+            iou_threshold: Minimum IoU for a detection to continue a track
+            max_missed: Frames a track survives without a match
+            min_hits: Matches needed before a track counts as a vehicle
+            centroid_threshold: Max centroid distance for the fallback match,
+                as a fraction of the track box diagonal
+            counting_line: Optional ((x1, y1), (x2, y2)) line; tracks whose
+                centroid crosses it are counted per class and direction. For a
+                line drawn top to bottom, "forward" is right-to-left movement;
+                swap the end points to flip it
+            fps: Frame rate used to convert dwell frames to seconds
+            smoothing: Weight of the newest velocity estimate (0-1)
+        """
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.min_hits = min_hits
+        self.centroid_threshold = centroid_threshold
+        self.counting_line = counting_line
+        self.fps = fps
+        self.smoothing = smoothing
+
+        self.tracks = []
+        self._next_id = 1
+
+        # Unique vehicles (confirmed tracks) per class, and line crossings per (class, direction)
+        self.class_counts = {}
+        self.line_counts = {}
+        # Dwell time in seconds of every confirmed track that has ended
+        self.finished_dwell = []
+
+    def update(self, boxes, class_ids, frame_index, confidences=None, emergency_flags=None):
+        """
+        Feed the detections of one frame
+
+        Args:
+            boxes: (N, 4) array of x1, y1, x2, y2
+            class_ids: (N,) class IDs
+            frame_index: Index of the frame the detections come from
+            confidences: Optional (N,) detection confidences
+            emergency_flags: Optional (N,) booleans; once set a track stays flagged
+
+        Returns:
+            List of (track, detection_index) for every detection, in input order
+        """
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        class_ids = np.asarray(class_ids).reshape(-1)
+        num_detections = len(boxes)
+        if confidences is None:
+            confidences = np.ones(num_detections)
+        if emergency_flags is None:
+            emergency_flags = np.zeros(num_detections, dtype=bool)
+
+        predicted = np.array([t.predict(frame_index) for t in self.tracks]).reshape(-1, 4)
+
+        # Stage 1: IoU against predicted boxes
+        pairs = _match(1.0 - iou_matrix(predicted, boxes), 1.0 - self.iou_threshold)
+
+        # Stage 2: centroid distance for whatever is left
+        matched_tracks = {t for t, _ in pairs}
+        matched_dets = {d for _, d in pairs}
+        free_tracks = [t for t in range(len(self.tracks)) if t not in matched_tracks]
+        free_dets = [d for d in range(num_detections) if d not in matched_dets]
+        if free_tracks and free_dets:
+            track_boxes = predicted[free_tracks]
+            track_centroids = (track_boxes[:, :2] + track_boxes[:, 2:]) / 2
+            det_centroids = (boxes[free_dets, :2] + boxes[free_dets, 2:]) / 2
+            diagonals = np.hypot(track_boxes[:, 2] - track_boxes[:, 0], track_boxes[:, 3] - track_boxes[:, 1])
+            distance = np.linalg.norm(track_centroids[:, None, :] - det_centroids[None, :, :], axis=2)
+            cost = distance / np.maximum(diagonals, 1.0)[:, None]
+            # Never hand a detection to a track of a different class in the fallback
+            same_class = class_ids[free_dets][None, :] == np.array([self.tracks[t].class_id for t in free_tracks])[:, None]
+            cost[~same_class] = np.inf
+            pairs += [(free_tracks[t], free_dets[d]) for t, d in _match(cost, self.centroid_threshold)]
+
+        assignments = [None] * num_detections
+        for t, d in pairs:
+            track = self.tracks[t]
+            self._apply_match(track, boxes[d], frame_index, confidences[d], emergency_flags[d])
+            assignments[d] = track
+
+        for d in range(num_detections):
+            if assignments[d] is None:
+                track = Track(self._next_id, boxes[d], int(class_ids[d]), float(confidences[d]),
+                              frame_index, bool(emergency_flags[d]))
+                self._next_id += 1
+                self.tracks.append(track)
+                assignments[d] = track
+                if self.min_hits <= 1:
+                    self._confirm(track)
+
+        self._expire(frame_index)
+        return [(track, d) for d, track in enumerate(assignments)]
+
+    def _apply_match(self, track, box, frame_index, confidence, is_emergency):
+        """Move a track to its newly matched box"""
+        frames = max(frame_index - track.last_frame, 1)
+        old_centroid = track.centroid
+
+        new_velocity = (box - track.box) / frames
+        track.velocity = self.smoothing * new_velocity + (1 - self.smoothing) * track.velocity
+        track.box = box
+        track.last_frame = frame_index
+        track.confidence = float(confidence)
+        track.is_emergency = track.is_emergency or bool(is_emergency)
+        track.hits += 1
+
+        if track.hits == self.min_hits:
+            self._confirm(track)
+        if track.hits >= self.min_hits:
+            self._check_line_crossing(track, old_centroid)
+
+    def _confirm(self, track):
+        self.class_counts[track.class_id] = self.class_counts.get(track.class_id, 0) + 1
+
+    def _check_line_crossing(self, track, old_centroid):
+        if self.counting_line is None or track.crossed:
+            return
+        before, after = _side_of_line([old_centroid, track.centroid], self.counting_line)
+        if before != 0 and after != 0 and before != after:
+            track.crossed = True
+            direction = "forward" if after > 0 else "backward"
+            key = (track.class_id, direction)
+            self.line_counts[key] = self.line_counts.get(key, 0) + 1
+
+    def _expire(self, frame_index):
+        """Drop tracks that have gone unmatched for too long"""
+        alive = []
+        for track in self.tracks:
+            if frame_index - track.last_frame > self.max_missed:
+                if track.hits >= self.min_hits:
+                    self.finished_dwell.append(track.dwell_frames() / self.fps)
+            else:
+                alive.append(track)
+        self.tracks = alive
+
+    def predict(self, frame_index):
+        """
+        Interpolated boxes of the confirmed live tracks for a frame without detections
+
+        Returns:
+            List of (track, box) pairs
+        """
+        return [(track, track.predict(frame_index)) for track in self.tracks
+                if track.hits >= self.min_hits and frame_index - track.last_frame <= self.max_missed]
+
+    def active_tracks(self):
+        """Confirmed tracks that are still alive"""
+        return [track for track in self.tracks if track.hits >= self.min_hits]
+
+    def unique_count(self):
+        """Number of distinct vehicles seen so far"""
+        return sum(self.class_counts.values())
+
+    def dwell_times(self):
+        """Dwell time in seconds of every confirmed track, finished or still live"""
+        return self.finished_dwell + [t.dwell_frames() / self.fps for t in self.active_tracks()]
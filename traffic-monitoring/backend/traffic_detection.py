@@ -4,26 +4,41 @@ import time
 import torch
 from ultralytics import YOLO
 import multiprocessing as mp
+from concurrent.futures import ThreadPoolExecutor
 from queue import Empty
 import os
 import asyncio
 import websockets
 import json
 import base64
+from box_postprocess import boxes_to_array, postprocess_boxes
 
 class TrafficDetector:
-    def __init__(self, model_path="yolov8n.pt", confidence=0.25):
+    def __init__(self, model_path="yolov8n.pt", confidence=0.25, render=True):
         """
         Initialize the traffic detector with YOLO model
         
         Args:
             model_path: Path to the YOLO model weights
             confidence: Confidence threshold for detections
+            render: Draw annotated frames; set False on headless edge boxes to
+                return only counts and structured detections (see annotate())
         """
+        self.model_path = model_path
         self.model = YOLO(model_path)
         self.confidence = confidence
+        self.render = render
         self.vehicle_classes = [2, 3, 5, 7]  # car, motorcycle, bus, truck
         self.ambulance_class = 7  # Assuming truck class is used for ambulance detection
+        self._thread_detectors = []  # Per-thread model copies for threaded lane processing
+        self._pool = None  # DetectorPool, started on first use of pool mode
+
+    def __getstate__(self):
+        # Worker pools and per-thread model copies stay with the parent process
+        state = self.__dict__.copy()
+        state['_thread_detectors'] = []
+        state['_pool'] = None
+        return state
         
     def detect_vehicles(self, frame):
         """
@@ -35,53 +50,91 @@ class TrafficDetector:
         Returns:
             vehicles_count: Number of vehicles detected
             has_ambulance: Boolean indicating if an ambulance is detected
-            processed_frame: Frame with detection annotations
+            processed_frame: Frame with detection annotations (None in headless mode)
         """
-        results = self.model(frame, conf=self.confidence)[0]
-        
-        # Initialize counts
-        vehicles_count = 0
-        has_ambulance = False
+        return self.detect_vehicles_batch([frame])[0]
+
+    def detect_vehicles_batch(self, frames):
+        """
+        Detect vehicles in several frames with a single batched forward pass
+
+        Args:
+            frames: List of image frames (one per lane)
+
+        Returns:
+            List of (vehicles_count, has_ambulance, processed_frame) tuples,
+            in the same order as the input frames
+        """
+        return [(len(detections), self.has_ambulance(detections), processed_frame)
+                for detections, processed_frame in self.analyze_frames(frames)]
+
+    def analyze_frames(self, frames):
+        """
+        Run one batched forward pass and return structured detections
+
+        Args:
+            frames: List of image frames
+
+        Returns:
+            List of (detections, processed_frame) pairs, where detections is a
+            box_postprocess.Detections and processed_frame is the annotated
+            frame, or None when the detector is headless (render=False)
+        """
+        if not frames:
+            return []
+
+        batch_results = self.model(list(frames), conf=self.confidence)
+        analyzed = []
+        for frame, results in zip(frames, batch_results):
+            detections = postprocess_boxes(boxes_to_array(results), self.vehicle_classes)
+            processed_frame = self.annotate(frame, detections) if self.render else None
+            analyzed.append((detections, processed_frame))
+        return analyzed
+
+    def ambulance_mask(self, detections):
+        """Boolean mask of detections that might be an ambulance (using custom logic)"""
+        return (detections.class_ids == self.ambulance_class) & (detections.areas > 15000)
+
+    def has_ambulance(self, detections):
+        """True if any detection might be an ambulance"""
+        return bool(self.ambulance_mask(detections).any())
+
+    def annotate(self, frame, detections):
+        """
+        Draw detections on a copy of a frame
+
+        Headless detectors skip this; call it on demand for frames that are displayed.
+
+        Args:
+            frame: Image frame the detections belong to
+            detections: box_postprocess.Detections for the frame
+
+        Returns:
+            processed_frame: Annotated copy of the frame
+        """
+        vehicles_count = len(detections)
+        ambulance_mask = self.ambulance_mask(detections)
         
         # Process detections
         processed_frame = frame.copy()
         
-        for detection in results.boxes.data.tolist():
-            x1, y1, x2, y2, confidence, class_id = detection
+        for i, ((x1, y1, x2, y2), is_ambulance) in enumerate(zip(detections.boxes.tolist(), ambulance_mask.tolist())):
+            # Green for regular vehicles, red for ambulance
+            color = (0, 0, 255) if is_ambulance else (0, 255, 0)
             
-            # Convert to integers
-            x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
-            class_id = int(class_id)
-            
-            # Check if detected object is a vehicle
-            if class_id in self.vehicle_classes:
-                vehicles_count += 1
-                
-                # Check if it might be an ambulance (using custom logic)
-                vehicle_width = x2 - x1
-                vehicle_height = y2 - y1
-                vehicle_area = vehicle_width * vehicle_height
-                
-                # Draw bounding box
-                color = (0, 255, 0)  # Green for regular vehicles
-                
-                if class_id == self.ambulance_class and vehicle_area > 15000:
-                    has_ambulance = True
-                    color = (0, 0, 255)  # Red for ambulance
-                
-                cv2.rectangle(processed_frame, (x1, y1), (x2, y2), color, 2)
-                cv2.putText(processed_frame, f"Vehicle {vehicles_count}", (x1, y1 - 10),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+            cv2.rectangle(processed_frame, (x1, y1), (x2, y2), color, 2)
+            cv2.putText(processed_frame, f"Vehicle {i + 1}", (x1, y1 - 10),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
                 
         # Add count to the frame
         cv2.putText(processed_frame, f"Vehicles: {vehicles_count}", (10, 30),
                    cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
         
-        if has_ambulance:
+        if ambulance_mask.any():
             cv2.putText(processed_frame, "AMBULANCE DETECTED! - Green light required ", (10, 70),
                        cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
             
-        return vehicles_count, has_ambulance, processed_frame
+        return processed_frame
 
     def process_lane(self, frame, lane_id, results_queue):
         """
@@ -92,27 +145,85 @@ class TrafficDetector:
             lane_id: ID of the lane (1-4)
             results_queue: Queue to put results in
         """
-        vehicles_count, has_ambulance, processed_frame = self.detect_vehicles(frame)
-        
         # Add results to the queue
-        results_queue.put({
-            'lane_id': lane_id,
-            'vehicles_count': vehicles_count,
-            'has_ambulance': has_ambulance,
-            'processed_frame': processed_frame,
-            'timestamp': time.time()
-        })
+        results_queue.put(self._make_result(lane_id, *self.analyze_frames([frame])[0]))
         
-    def process_all_lanes(self, frames):
+    def process_all_lanes(self, frames, mode="batched"):
         """
-        Process all lanes in parallel
+        Process all lanes
         
         Args:
             frames: Dictionary of frames, with lane IDs as keys
+            mode: How to run detection across lanes:
+                "batched"  - one forward pass over all lane frames (default)
+                "threaded" - one thread per lane, each with its own model copy
+                "pool"     - persistent DetectorPool workers fed over shared memory
+                "process"  - one process per lane (original behaviour)
             
         Returns:
             results: Dictionary of results, with lane IDs as keys
         """
+        if mode == "batched":
+            return self._process_all_lanes_batched(frames)
+        if mode == "threaded":
+            return self._process_all_lanes_threaded(frames)
+        if mode == "pool":
+            return self._process_all_lanes_pool(frames)
+        if mode == "process":
+            return self._process_all_lanes_multiprocess(frames)
+        raise ValueError(f"Unknown lane processing mode: {mode}")
+
+    def _make_result(self, lane_id, detections, processed_frame):
+        """Build the per-lane result dictionary returned by process_all_lanes"""
+        return {
+            'lane_id': lane_id,
+            'vehicles_count': len(detections),
+            'has_ambulance': self.has_ambulance(detections),
+            'processed_frame': processed_frame,
+            'detections': detections,
+            'timestamp': time.time()
+        }
+
+    def _process_all_lanes_batched(self, frames):
+        """Stack every lane frame into a single model call and split the results"""
+        lane_ids = list(frames.keys())
+        analyzed = self.analyze_frames([frames[lane_id] for lane_id in lane_ids])
+        
+        return {lane_id: self._make_result(lane_id, detections, processed_frame)
+                for lane_id, (detections, processed_frame) in zip(lane_ids, analyzed)}
+
+    def _process_all_lanes_threaded(self, frames):
+        """Run each lane on its own thread, each thread with its own model copy (YOLO is not thread-safe)"""
+        # Model copies are kept between calls so only the first call pays for loading them
+        while len(self._thread_detectors) < len(frames):
+            self._thread_detectors.append(TrafficDetector(self.model_path, self.confidence, self.render))
+
+        with ThreadPoolExecutor(max_workers=len(frames) or 1) as executor:
+            futures = {
+                lane_id: executor.submit(detector.analyze_frames, [frame])
+                for detector, (lane_id, frame) in zip(self._thread_detectors, frames.items())
+            }
+            return {lane_id: self._make_result(lane_id, *future.result()[0])
+                    for lane_id, future in futures.items()}
+
+    def _process_all_lanes_pool(self, frames):
+        """Hand the lanes to a long-lived DetectorPool, starting it on first use"""
+        if self._pool is not None and self._pool.broken:
+            # A worker died: the failed round raised, the next one gets a fresh pool
+            self.close_pool()
+        if self._pool is None:
+            from detector_pool import DetectorPool
+            self._pool = DetectorPool(self.model_path, self.confidence, render=self.render)
+        return self._pool.process_all_lanes(frames)
+
+    def close_pool(self):
+        """Shut down the DetectorPool started by pool mode, if any"""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+
+    def _process_all_lanes_multiprocess(self, frames):
+        """Process all lanes in parallel, one process per lane"""
         # Create a multiprocessing manager and queue
         manager = mp.Manager()
         results_queue = manager.Queue()
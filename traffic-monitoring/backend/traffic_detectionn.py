@@ -5,21 +5,25 @@ import time
 import torch
 from ultralytics import YOLO
 from collections import deque
+from functools import partial
 import threading
 import concurrent.futures
 from datetime import datetime
 import pygame
 from pygame.locals import *
 import glob
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_agg import FigureCanvasAgg
+from frame_ring import SharedFrameRing
+from box_postprocess import boxes_to_array, postprocess_boxes
+from tracker import VehicleTracker
+from frame_sampler import AdaptiveFrameSampler
+from timeseries_store import TimeSeriesStore
+from frame_profiler import FrameProfiler
 
-# Initialize pygame for display purposes
+# Initialize pygame for display purposes; the window is opened by main(), so
+# headless users (e.g. junction_controller) can import this module
 pygame.init()
-pygame.display.set_caption("AI Traffic Signal Optimization")
-info_object = pygame.display.Info()
 SCREEN_WIDTH, SCREEN_HEIGHT = 1280, 720
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.RESIZABLE)  # Make window resizable
+screen = None
 clock = pygame.time.Clock()
 
 # Colors
@@ -32,6 +36,10 @@ BLUE = (0, 0, 255)
 GRAY = (220, 220, 220)
 DARK_GRAY = (80, 80, 80)
 BG_COLOR = (30, 30, 30)
+SKY_BLUE = (135, 206, 235)
+LIGHT_GREEN = (144, 238, 144)
+CHART_BG = (51, 51, 51, 178)
+GRID_COLOR = (110, 110, 110)
 
 # Fonts
 font_small = pygame.font.SysFont('Arial', 18)
@@ -39,13 +47,27 @@ font_medium = pygame.font.SysFont('Arial', 22, bold=True)
 font_large = pygame.font.SysFont('Arial', 30, bold=True)
 font_title = pygame.font.SysFont('Arial', 36, bold=True)
 
+# Rendered text surfaces by (font, text, color); most dashboard strings repeat every frame
+_text_cache = {}
+TEXT_CACHE_SIZE = 1024
+
+def render_text(font, text, color):
+    """Antialiased text surface, rendered once per distinct string"""
+    key = (id(font), text, color)
+    text_surface = _text_cache.get(key)
+    if text_surface is None:
+        if len(_text_cache) >= TEXT_CACHE_SIZE:
+            _text_cache.clear()  # Counters and timers keep producing new strings
+        text_surface = _text_cache[key] = font.render(text, True, color)
+    return text_surface
+
 # Scrolling parameters
 SCROLL_SPEED = 20
 scrollable_surface_height = 1500  # Initial height, will adjust as needed
 scroll_y = 0
 
-# Load the YOLO model
-model = YOLO('yolov8n.pt')
+# Default YOLO model; every detection thread loads its own copy
+DEFAULT_MODEL_PATH = 'yolov8n.pt'
 
 # Define classes for Indian traffic (relevant classes from COCO dataset)
 CLASSES = ['person', 'bicycle', 'car', 'motorcycle', 'bus', 'truck', 'traffic light',
@@ -54,27 +76,76 @@ CLASSES = ['person', 'bicycle', 'car', 'motorcycle', 'bus', 'truck', 'traffic li
 
 # Classes to count as vehicles
 VEHICLE_CLASSES = ['bicycle', 'car', 'motorcycle', 'bus', 'truck']
+# COCO class IDs of the vehicle classes (as predicted by the YOLOv8 models), with their names
+VEHICLE_CLASS_NAMES = {1: 'bicycle', 2: 'car', 3: 'motorcycle', 5: 'bus', 7: 'truck'}
 # Emergency vehicles would be here if we were detecting them
 EMERGENCY_CLASSES = []
+# Cheap shape check for a possible emergency vehicle (a large, long car or truck, as in
+# VideoTrafficDetector); lanes sample faster for a while after one shows up
+EMERGENCY_CANDIDATE_CLASSES = [2, 7]
+EMERGENCY_CANDIDATE_MIN_AREA = 10000
+EMERGENCY_CANDIDATE_MIN_RATIO = 1.5
 
 # Signal timing parameters
 MIN_GREEN_TIME = 10  # Minimum green light time in seconds
 MAX_GREEN_TIME = 60  # Maximum green light time in seconds
 BASE_TIME = 15       # Base green light time in seconds
 TIME_PER_VEHICLE = 0.5  # Additional time per vehicle
+LOOK_AHEAD_MARGIN = 1.25  # Look-ahead detection starts this multiple of its last duration early
+
+# History kept per lane: raw results (plus per-minute/hour rollups) and recent summary entries
+HISTORY_FIELDS = ('vehicle_count', 'green_time')
+HISTORY_CAPACITY = 4096
+SUMMARY_LENGTH = 100
+
+# Frame size assumed for lanes without a video
+DEFAULT_FRAME_SHAPE = (720, 1280, 3)
+
+def draw_detections(frame, detections):
+    """Draw vehicle boxes and class names onto a frame in place"""
+    for (x1, y1, x2, y2), class_id in zip(detections.boxes.tolist(), detections.class_ids.tolist()):
+        # Draw bounding box
+        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+        cv2.putText(frame, VEHICLE_CLASS_NAMES[class_id], 
+                   (x1, y1 - 10), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, 
+                   (0, 255, 0), 2)
+    return frame
 
 # Store lane data
 class LaneData:
-    def __init__(self, lane_id, video_path):
+    def __init__(self, lane_id, video_path, frame_ring=None, snapshot_ring=None):
         self.lane_id = lane_id
         self.video_path = video_path
         self.vehicle_count = 0
         self.vehicle_types = {}
         self.green_time = BASE_TIME
         self.is_emergency = False
-        self.current_frame = None
-        self.detection_frame = None
+        # Frames live in shared memory rings; the lane only keeps sequence numbers
+        self.frame_ring = frame_ring
+        self.snapshot_ring = snapshot_ring
+        self.current_seq = None
+        self.detection_seq = None
+        self.detections = None  # Detections of the latest processed frame
         self.processing_complete = False
+        # Last applied detection result, kept for fallbacks: (vehicle_count, vehicle_types, time)
+        self.last_result = None
+        self.result_is_estimate = False  # Green time based on an old result while detection runs
+        self.detection_seconds = None  # Duration of the lane's last completed detection
+
+    @property
+    def current_frame(self):
+        """View of the latest annotated frame (None if there is none yet)"""
+        if self.frame_ring is None or self.current_seq is None:
+            return None
+        return self.frame_ring.read(self.lane_id, self.current_seq)[1]
+
+    @property
+    def detection_frame(self):
+        """View of the annotated frame with the most vehicles seen so far"""
+        if self.snapshot_ring is None or self.detection_seq is None:
+            return None
+        return self.snapshot_ring.read(self.lane_id, self.detection_seq)[1]
     
     def calculate_green_time(self):
         # Calculate green time based on vehicle count
@@ -89,126 +160,320 @@ class LaneData:
         self.is_emergency = False
         self.processing_complete = False
 
+class LaneJob:
+    """
+    One background detection run of a lane
+
+    The worker stops between frames once cancel_event is set and sets
+    done_event when it returns, cancelled or not; future holds the result.
+    The timeout counts from started_at, when the worker begins the lane,
+    so time queued on the pool or behind the lane's previous job is free.
+    """
+    def __init__(self, lane_index, timeout=None):
+        self.lane_index = lane_index
+        self.timeout = timeout
+        self.cancel_event = threading.Event()
+        self.done_event = threading.Event()
+        self.future = None
+        self.started_at = None  # Set by the worker when detection begins
+        self.finished_at = None
+
+    def cancel(self):
+        self.cancel_event.set()
+        # A job still queued never runs, so nobody else would set done_event
+        if self.future is not None and self.future.cancel():
+            self.done_event.set()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def done(self):
+        return self.future is not None and self.future.done()
+
+    def timed_out(self):
+        return (self.timeout is not None and self.started_at is not None and not self.done()
+                and time.time() - self.started_at > self.timeout)
+
+    def succeeded(self):
+        """True once the job finished uncancelled without raising"""
+        return self.done() and not self.cancelled and self.future.exception() is None
+
 class TrafficSystem:
-    def __init__(self, data_folder="data"):
+    def __init__(self, data_folder="data", render=True, track_vehicles=True,
+                 min_sample_rate=0.5, max_sample_rate=2.0, boost_sample_rate=5.0, look_ahead=5.0,
+                 max_result_age=120.0,
+                 detection_timeout=60.0, max_parallel_lanes=None, lane_sources=None, min_lanes=4,
+                 model_path=DEFAULT_MODEL_PATH, inference=None, name="Junction", history_dir=None):
+        """
+        Args:
+            data_folder: Folder with the lane videos (video*.mp4), used when
+                lane_sources is not given
+            render: Draw detections on every processed frame; with False the
+                system only counts (headless) and frames are annotated on demand
+                by lane_display_frame()
+            track_vehicles: Count the unique vehicles tracked over the lane
+                video; False uses the sampled frame with the most vehicles
+            min_sample_rate: Detector runs per second on a static lane
+            max_sample_rate: Detector runs per second on a busy lane; above 2 Hz
+                busy lanes cost more than the old fixed half-FPS sampling
+            boost_sample_rate: Detector runs per second for a few seconds after
+                a possible emergency vehicle shows up
+            look_ahead: Seconds before the end of a green phase at which
+                detection of the next lane starts in the background, at least;
+                a lane whose last detection took longer starts that much
+                earlier (plus LOOK_AHEAD_MARGIN)
+            max_result_age: Seconds a lane's previous result may be reused when
+                its new detection is not done at the phase switch; older results
+                fall back to the base green time
+            detection_timeout: Seconds a lane detection may run before it is cancelled
+                (time spent queued for a worker does not count)
+            max_parallel_lanes: Lanes analysed at the same time (default: all)
+            lane_sources: Video path of every lane, in signal order; None
+                entries are simulated lanes
+            min_lanes: Simulated lanes are added until there are this many
+            model_path: YOLO weights loaded by each detection thread
+            inference: Shared inference scheduler (e.g. FairInferenceScheduler)
+                to run the frames on instead of a model per thread
+            name: Junction name, identifies this system to the shared scheduler
+            history_dir: Folder to keep the lane histories in as memory-mapped
+                files, so they survive restarts (default: in memory only)
+        """
         self.data_folder = data_folder
+        self.annotate_frames = render  # self.render is the dashboard draw method
+        self.track_vehicles = track_vehicles
+        self.min_sample_rate = min_sample_rate
+        self.max_sample_rate = max_sample_rate
+        self.boost_sample_rate = boost_sample_rate
+        self.look_ahead = look_ahead
+        self.max_result_age = max_result_age
+        self.detection_timeout = detection_timeout
+        self.max_parallel_lanes = max_parallel_lanes
+        self.lane_sources = lane_sources
+        self.min_lanes = min_lanes
+        self.model_path = model_path
+        self.inference = inference
+        self.name = name
+        self.history_dir = history_dir
+        self.jobs = {}  # Lane index -> latest LaneJob of that lane
+        self._stopping = {}  # Lane index -> cancelled LaneJob whose worker may still be running
+        self.executor = None
+        self._thread_models = threading.local()  # One YOLO model per worker thread
+        self.lookahead_started = False
         self.lanes = []
         self.current_lane_index = 0
         self.remaining_time = 0
         self.is_running = True
         self.start_time = time.time()
-        self.is_processing = False
         self.processing_results = None
-        self.traffic_summary = []
+        self.traffic_summary = deque(maxlen=SUMMARY_LENGTH)
         self.total_cycles = 0
-        self.detection_history = {0: [], 1: [], 2: [], 3: []}
-        self.time_history = {0: [], 1: [], 2: [], 3: []}
-        self.active_video_capture = None
-        self.active_video_thread = None
-        self.video_processing_done = False
+        self.lane_history = {}  # Lane index -> TimeSeriesStore of HISTORY_FIELDS
+        self.history_version = 0  # Bumped on every new result so cached charts know to redraw
+        self._chart_cache = None  # ((history_version, width, height), chart surface)
+        self._thumbnails = {}  # Lane index -> ((frame seq, width, height), scaled video surface)
+        self._panel_signatures = {}  # Dashboard panel -> state it was last drawn with
+        self._last_view = None  # Scroll position and sizes of the last render
+        self.profiler = FrameProfiler()
+        self.show_profiler = False
+        self._profiler_rect = pygame.Rect(0, 0, 0, 0)
         self.load_videos()  # Initialize lanes at instantiation time
         
     def load_videos(self):
-        # Look for video files in the data folder
-        video_files = sorted(glob.glob(os.path.join(self.data_folder, "video*.mp4")))
-        
-        if not video_files:
-            # If no videos found, create sample data
-            print(f"No video files found in '{self.data_folder}'. Using sample data.")
-            for i in range(4):
-                self.lanes.append(LaneData(i, None))
+        if self.lane_sources is not None:
+            video_paths = list(self.lane_sources)
         else:
-            # Load videos into lanes
-            for i, video_path in enumerate(video_files[:4]):  # Limit to 4 lanes
-                self.lanes.append(LaneData(i, video_path))
-                print(f"Loaded Lane {i+1}: {video_path}")
+            # Look for video files in the data folder
+            video_paths = sorted(glob.glob(os.path.join(self.data_folder, "video*.mp4")))
+            if not video_paths:
+                # If no videos found, create sample data
+                print(f"No video files found in '{self.data_folder}'. Using sample data.")
                 
-        # If less than 4 videos found, pad with None
-        while len(self.lanes) < 4:
-            self.lanes.append(LaneData(len(self.lanes), None))
+        # If less than min_lanes videos found, pad with None
+        video_paths += [None] * (self.min_lanes - len(video_paths))
+        if not video_paths:
+            raise ValueError(f"{self.name} has no lanes")
+        
+        # Preallocate shared frame buffers big enough for the largest video
+        max_shape = self._max_frame_shape(video_paths)
+        self.frame_ring = SharedFrameRing(len(video_paths), depth=3, max_shape=max_shape)
+        self.snapshot_ring = SharedFrameRing(len(video_paths), depth=2, max_shape=max_shape)
+        
+        for i, video_path in enumerate(video_paths):
+            self.lanes.append(LaneData(i, video_path, self.frame_ring, self.snapshot_ring))
+            lane_dir = os.path.join(self.history_dir, f"lane{i+1}") if self.history_dir else None
+            self.lane_history[i] = TimeSeriesStore(HISTORY_FIELDS, HISTORY_CAPACITY, directory=lane_dir)
+            if video_path:
+                print(f"Loaded Lane {i+1}: {video_path}")
             
-        # Set initial time for the first lane
-        self.remaining_time = self.lanes[0].green_time
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.max_parallel_lanes or len(self.lanes),
+            thread_name_prefix="lane-detection"
+        )
         
-        # Process the first lane right away to get initial data
-        self.process_lane(0)
+        # Analyse every lane at once; the first green runs on the base time until its result is in
+        self.detect_all_lanes()
+        self.begin_green(0)
+    
+    def _max_frame_shape(self, video_paths):
+        """Largest (height, width, channels) among the lane videos"""
+        max_h, max_w, channels = DEFAULT_FRAME_SHAPE
+        for video_path in video_paths:
+            if video_path is None:
+                continue
+            cap = cv2.VideoCapture(video_path)
+            max_h = max(max_h, int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+            max_w = max(max_w, int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)))
+            cap.release()
+        return (max_h, max_w, channels)
+    
+    def lane_display_frame(self, lane_index):
+        """
+        Latest frame of a lane with its detections drawn, for display
+
+        In headless mode the annotation happens here, only for the frames
+        that are actually shown.
+        """
+        lane = self.lanes[lane_index]
+        frame = lane.current_frame
+        if frame is None or self.annotate_frames or lane.detections is None:
+            return frame
+        return draw_detections(frame.copy(), lane.detections)
+    
+    @property
+    def is_processing(self):
+        """True while any lane detection is running"""
+        return any(not job.done() for job in self.jobs.values())
+    
+    def close(self, timeout=10.0):
+        """
+        Stop background detection and release the shared frame buffers
+
+        Args:
+            timeout: Seconds to wait for workers to stop (one blocked in
+                inference only sees the cancel after its model call); if
+                some are still running the frame buffers stay mapped, as
+                freeing them would pull the memory from under those workers
+        """
+        jobs = list(self.jobs.values()) + list(self._stopping.values())
+        for job in jobs:
+            job.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        deadline = time.time() + timeout
+        running = [job for job in jobs if not job.done_event.wait(max(0.0, deadline - time.time()))]
+        if running:
+            print(f"{self.name}: {len(running)} lane detection(s) still running after {timeout:g}s, "
+                  f"leaving their frame buffers mapped")
+        else:
+            self.frame_ring.close()
+            self.snapshot_ring.close()
+        for history in self.lane_history.values():
+            history.flush()
     
-    def process_video_thread(self, lane_index):
-        """Thread function to process video with real-time display"""
+    def _lane_model(self):
+        """YOLO model of the calling worker thread (models are not safe to share between threads)"""
+        if not hasattr(self._thread_models, 'model'):
+            self._thread_models.model = YOLO(self.model_path)
+        return self._thread_models.model
+    
+    def _detect_boxes(self, frame):
+        """(N, 6) YOLO boxes of a frame, from the shared scheduler if there is one"""
+        if self.inference is not None:
+            return self.inference.infer(self.name, frame)
+        return boxes_to_array(self._lane_model()(frame, conf=0.25)[0])
+    
+    def process_video_thread(self, lane_index, job=None):
+        """
+        Thread function to process video with real-time display
+
+        Args:
+            lane_index: Lane to analyse
+            job: LaneJob whose cancel_event stops the run
+            
+        Returns:
+            (vehicle_count, vehicle_types), or None if cancelled
+        """
         lane = self.lanes[lane_index]
+        cancel_event = job.cancel_event if job is not None else threading.Event()
         
         if lane.video_path is None or not os.path.exists(lane.video_path):
             # Simulate processing for demo if no video
             print(f"Simulating processing for Lane {lane_index+1}")
-            time.sleep(2)  # Simulate processing time
+            if cancel_event.wait(2):  # Simulate processing time
+                return None
             # Generate random data for demo
-            lane.vehicle_count = np.random.randint(5, 20)
+            vehicle_count = np.random.randint(5, 20)
             vehicle_types = {'car': 0, 'motorcycle': 0, 'bus': 0, 'truck': 0, 'bicycle': 0}
-            for _ in range(lane.vehicle_count):
+            for _ in range(vehicle_count):
                 vtype = np.random.choice(VEHICLE_CLASSES)
                 vehicle_types[vtype] = vehicle_types.get(vtype, 0) + 1
+            lane.vehicle_count = int(vehicle_count)
             lane.vehicle_types = vehicle_types
             lane.processing_complete = True
-            self.video_processing_done = True
-            return
+            return lane.vehicle_count, vehicle_types
         
         cap = cv2.VideoCapture(lane.video_path)
-        self.active_video_capture = cap
         
         # Get video properties
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
         fps = cap.get(cv2.CAP_PROP_FPS)
-        sample_interval = max(1, int(fps/2))  # Sample at half FPS for better performance
+        # Skip inference on static frames, sample faster when the scene moves
+        sampler = AdaptiveFrameSampler(fps, min_rate=self.min_sample_rate, max_rate=self.max_sample_rate,
+                                       boost_rate=self.boost_sample_rate)
+        # Fixed half-FPS rate the sampler is compared against, rounded like the sampler's intervals
+        sample_interval = max(1, int(round(sampler.fps / 2)))
         
         # Process video frames
         frame_count = 0
         max_vehicles = 0
         aggregated_counts = {}
         
-        while cap.isOpened() and not self.video_processing_done:
+        # Follow vehicles across the sampled frames so each one is counted once
+        tracker = None
+        if self.track_vehicles:
+            tracker = VehicleTracker(max_missed=2 * sampler.max_interval, fps=fps or 30.0)
+        
+        while cap.isOpened() and not cancel_event.is_set():
             ret, frame = cap.read()
             if not ret:
                 break
             
-            # Process every nth frame to improve performance
-            if frame_count % sample_interval == 0:
+            # Only run YOLO on frames the sampler picks
+            if sampler.should_infer(frame):
                 # Run inference with YOLO
-                results = model(frame, conf=0.25)
+                boxes = self._detect_boxes(frame)
                 
-                # Count vehicles in this frame and draw bounding boxes
-                frame_counts = {'car': 0, 'motorcycle': 0, 'bus': 0, 'truck': 0, 'bicycle': 0}
-                annotated_frame = frame.copy()
+                # Count vehicles in this frame in one vectorized pass
+                detections = postprocess_boxes(boxes, VEHICLE_CLASS_NAMES.keys())
+                frame_counts = detections.counts_by_name(VEHICLE_CLASS_NAMES)
+                candidates = (np.isin(detections.class_ids, EMERGENCY_CANDIDATE_CLASSES)
+                              & (detections.areas >= EMERGENCY_CANDIDATE_MIN_AREA)
+                              & (detections.aspect_ratios >= EMERGENCY_CANDIDATE_MIN_RATIO))
+                if candidates.any():
+                    sampler.boost()  # Watch a possible emergency vehicle closely
                 
-                for r in results:
-                    boxes = r.boxes
-                    for box in boxes:
-                        class_id = int(box.cls[0])
-                        if class_id < len(model.names):
-                            class_name = model.names[class_id]
-                            if class_name in VEHICLE_CLASSES:
-                                frame_counts[class_name] = frame_counts.get(class_name, 0) + 1
-                                
-                                # Draw bounding box
-                                x1, y1, x2, y2 = box.xyxy[0]
-                                cv2.rectangle(annotated_frame, 
-                                            (int(x1), int(y1)), 
-                                            (int(x2), int(y2)), 
-                                            (0, 255, 0), 2)
-                                cv2.putText(annotated_frame, class_name, 
-                                           (int(x1), int(y1) - 10), 
-                                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, 
-                                           (0, 255, 0), 2)
+                # Copy into the lane's next shared memory slot and annotate it there
+                seq, annotated_frame = self.frame_ring.reserve(lane_index, frame.shape)
+                annotated_frame[...] = frame
+                if self.annotate_frames:
+                    draw_detections(annotated_frame, detections)
                 
                 # Update max vehicles count
                 frame_total = sum(frame_counts.values())
                 if frame_total > max_vehicles:
                     max_vehicles = frame_total
                     aggregated_counts = frame_counts.copy()
-                    lane.detection_frame = annotated_frame.copy()
+                    lane.detection_seq = self.snapshot_ring.write(lane_index, annotated_frame)
+                
+                if tracker is not None:
+                    tracker.update(detections.boxes, detections.class_ids, frame_count, detections.confidences)
+                    frame_counts = self._tracked_counts(tracker)
                 
-                # Update current frame for display
-                lane.current_frame = annotated_frame.copy()
-                lane.vehicle_count = frame_total
+                # Publish the frame for display
+                self.frame_ring.commit(lane_index, seq)
+                lane.current_seq = seq
+                lane.detections = detections
+                lane.vehicle_count = sum(frame_counts.values())
                 lane.vehicle_types = frame_counts
             
             frame_count += 1
@@ -216,38 +481,101 @@ class TrafficSystem:
             # Small delay to allow pygame to update
             time.sleep(0.01)
         
-        # Set final lane data from the frame with most vehicles
+        if cap and cap.isOpened():
+            cap.release()
+        if cancel_event.is_set():
+            return None
+        
+        # Set final lane data from the unique tracked vehicles, or the frame with most vehicles
+        if tracker is not None:
+            aggregated_counts = self._tracked_counts(tracker)
         lane.vehicle_count = sum(aggregated_counts.values())
         lane.vehicle_types = aggregated_counts
         lane.processing_complete = True
-        self.video_processing_done = True
-        
-        if cap and cap.isOpened():
-            cap.release()
+        print(f"Lane {lane_index+1}: {sampler.inferences} inferences for {sampler.frames_seen} frames "
+              f"({sampler.saved_versus(sample_interval)} saved vs fixed half-FPS sampling, "
+              f"{sampler.saved_versus(sampler.min_interval)} vs its max rate)")
+        return lane.vehicle_count, aggregated_counts
     
-    def process_lane(self, lane_index):
-        """Process video for the specified lane to count vehicles"""
-        self.is_processing = True
-        self.video_processing_done = False
+    def _tracked_counts(self, tracker):
+        """Unique vehicles per type seen by a lane's tracker"""
+        return {name: tracker.class_counts.get(class_id, 0) for class_id, name in VEHICLE_CLASS_NAMES.items()}
+    
+    def start_lane_detection(self, lane_index):
+        """
+        Start detecting vehicles of a lane on the thread pool and return immediately
+
+        A detection already running for the lane is cancelled; the new one
+        waits for it to stop so only one worker writes to the lane at a time.
+        
+        Returns:
+            LaneJob of the new detection
+        """
+        previous = self.jobs.get(lane_index)
+        stopping = self._stopping.pop(lane_index, None)
+        if previous is None:
+            # A stopped job can still be inside a frame; the new one must wait for it too
+            previous = stopping
+        if previous is not None:
+            if previous.succeeded() and previous.future.result() is not None:
+                # Superseded before it was applied; still good as a fallback
+                vehicle_count, vehicle_types = previous.future.result()
+                self.lanes[lane_index].last_result = (vehicle_count, dict(vehicle_types), time.time())
+            previous.cancel()
+        
+        self.lanes[lane_index].processing_complete = False
+        job = LaneJob(lane_index, timeout=self.detection_timeout)
+        job.future = self.executor.submit(self._run_lane_job, job, previous)
+        self.jobs[lane_index] = job
+        return job
+    
+    def _run_lane_job(self, job, previous):
+        """Worker body of a LaneJob"""
+        try:
+            if previous is not None:
+                previous.done_event.wait()
+            if job.cancelled:
+                return None
+            job.started_at = time.time()
+            result = self.process_video_thread(job.lane_index, job)
+            if result is not None:
+                self.lanes[job.lane_index].detection_seconds = time.time() - job.started_at
+            return result
+        finally:
+            job.finished_at = time.time()
+            job.done_event.set()
+    
+    def detect_all_lanes(self):
+        """Start detecting every lane concurrently"""
+        return [self.start_lane_detection(i) for i in range(len(self.lanes))]
+    
+    def stop_lane_detection(self, lane_index=None):
+        """Cancel the detection of one lane (default: all lanes) and drop its result"""
+        lane_indices = [lane_index] if lane_index is not None else list(self.jobs)
+        for i in lane_indices:
+            job = self.jobs.pop(i, None)
+            if job is not None:
+                job.cancel()
+                if not job.done_event.is_set():
+                    # Still running: the lane's next job waits for it (one writer per lane)
+                    self._stopping[i] = job
+    
+    def apply_lane_result(self, lane_index):
+        """Turn a lane's finished detection into its green time and record it"""
         lane = self.lanes[lane_index]
-        
-        # Start video processing in a separate thread
-        self.active_video_thread = threading.Thread(
-            target=self.process_video_thread, 
-            args=(lane_index,)
-        )
-        self.active_video_thread.start()
-        
-        # Wait for processing to complete
-        while not self.video_processing_done:
-            time.sleep(0.1)
+        job = self.jobs.pop(lane_index, None)
+        if job is not None and job.succeeded() and job.future.result() is not None:
+            lane.vehicle_count, lane.vehicle_types = job.future.result()
         
         # Calculate green time based on vehicle count
         lane.calculate_green_time()
+        lane.result_is_estimate = False
+        lane.last_result = (lane.vehicle_count, dict(lane.vehicle_types), time.time())
         
         # Store statistics for history
-        self.detection_history[lane_index].append(lane.vehicle_count)
-        self.time_history[lane_index].append(lane.green_time)
+        self.lane_history[lane_index].append(time.time(), vehicle_count=lane.vehicle_count,
+                                             green_time=lane.green_time)
+        self.history_version += 1
         
         # Add to traffic summary
         self.traffic_summary.append({
@@ -257,42 +585,99 @@ class TrafficSystem:
             'green_time': lane.green_time,
             'vehicle_types': lane.vehicle_types
         })
-        
-        self.is_processing = False
         return lane
     
+    def process_lane(self, lane_index):
+        """Process video for the specified lane to count vehicles, waiting for the result"""
+        job = self.start_lane_detection(lane_index)
+        concurrent.futures.wait([job.future], timeout=job.timeout)
+        if not job.succeeded():
+            # Timed out or failed: keep the lane's previous green time
+            print(f"Lane {lane_index+1} detection did not finish")
+            self.stop_lane_detection(lane_index)
+            return self.lanes[lane_index]
+        return self.apply_lane_result(lane_index)
+    
+    def begin_green(self, lane_index):
+        """
+        Give a lane the green, using its look-ahead result if it is ready
+
+        Otherwise the green time is estimated from the lane's previous result
+        (if not older than max_result_age) or the base time, and corrected by
+        update() once the detection finishes.
+        """
+        lane = self.lanes[lane_index]
+        self.current_lane_index = lane_index
+        
+        job = self.jobs.get(lane_index)
+        if job is None or job.cancelled or (job.done() and not job.succeeded()):
+            # Nothing usable running for this lane (e.g. look-ahead disabled or failed)
+            job = self.start_lane_detection(lane_index)
+        
+        if job.succeeded():
+            self.apply_lane_result(lane_index)
+        else:
+            fresh = lane.last_result is not None and time.time() - lane.last_result[2] <= self.max_result_age
+            lane.vehicle_count, lane.vehicle_types = (lane.last_result[0], dict(lane.last_result[1])) if fresh else (0, {})
+            lane.calculate_green_time()
+            lane.result_is_estimate = True
+        
+        self.remaining_time = lane.green_time
+        self.lookahead_started = False
+    
     def switch_to_next_lane(self):
         """Switch to the next lane in sequence"""
         # Reset current lane
         self.lanes[self.current_lane_index].reset()
         
-        # Move to next lane
-        self.current_lane_index = (self.current_lane_index + 1) % len(self.lanes)
-        
-        # Stop any active video processing
-        self.video_processing_done = True
-        if self.active_video_thread and self.active_video_thread.is_alive():
-            self.active_video_thread.join()
-        
-        if self.active_video_capture and self.active_video_capture.isOpened():
-            self.active_video_capture.release()
-        
-        # Process next lane
-        self.process_lane(self.current_lane_index)
-            
-        # Set time for this lane
-        self.remaining_time = self.lanes[self.current_lane_index].green_time
+        # Move to next lane without waiting for its detection
+        self.begin_green((self.current_lane_index + 1) % len(self.lanes))
         
         # Increment cycle counter if we've gone through all lanes
         if self.current_lane_index == 0:
             self.total_cycles += 1
 
+    def lane_look_ahead(self, lane_index):
+        """Seconds before the current green ends at which detection of a lane starts"""
+        measured = self.lanes[lane_index].detection_seconds
+        if measured is None:
+            return self.look_ahead
+        return max(self.look_ahead, measured * LOOK_AHEAD_MARGIN)
+
     def update(self, dt):
-        """Update the traffic system state"""
+        """Update the traffic system state (never waits for detection)"""
+        self.remaining_time -= dt
+        lane = self.lanes[self.current_lane_index]
+        
+        # Give up on detections that take too long; their lanes keep estimated green times
+        for lane_index, job in list(self.jobs.items()):
+            if job.timed_out():
+                print(f"Lane {lane_index+1} detection timed out after {job.timeout:.0f}s")
+                self.stop_lane_detection(lane_index)
+            elif job.done() and not job.succeeded() and not job.cancelled:
+                print(f"Lane {lane_index+1} detection failed: {job.future.exception()}")
+                self.stop_lane_detection(lane_index)
+        
+        # A detection that missed the switch corrects the running green phase
+        job = self.jobs.get(self.current_lane_index)
+        if job is not None and job.succeeded():
+            estimated_green = lane.green_time
+            self.apply_lane_result(self.current_lane_index)
+            self.remaining_time = max(0, self.remaining_time + lane.green_time - estimated_green)
+        
+        # Capture the next lane early enough for its detection to finish before this green ends,
+        # unless it is being captured already or has a fresh result waiting to be applied
+        next_index = (self.current_lane_index + 1) % len(self.lanes)
+        if self.remaining_time <= self.lane_look_ahead(next_index) and not self.lookahead_started:
+            self.lookahead_started = True
+            next_job = self.jobs.get(next_index)
+            fresh = (next_job is not None and next_job.succeeded()
+                     and time.time() - next_job.finished_at <= self.max_result_age)
+            if next_job is None or (next_job.done() and not fresh):
+                self.start_lane_detection(next_index)
+        
         if self.remaining_time <= 0:
             self.switch_to_next_lane()
-        else:
-            self.remaining_time -= dt
     
     def render_traffic_light(self, surface, x, y, lane_index, size=80):
         """Render a traffic light for the given lane"""
@@ -329,17 +714,17 @@ class TrafficSystem:
         pygame.draw.circle(surface, green_color, (x + size/2, y + margin + light_y_spacing*2 + light_size/2), light_size/2)
         
         # Lane label
-        lane_text = font_medium.render(f"Lane {lane_index + 1}", True, WHITE)
+        lane_text = render_text(font_medium, f"Lane {lane_index + 1}", WHITE)
         surface.blit(lane_text, (x + size/2 - lane_text.get_width()/2, y + size*2.5 + 10))
         
         # Vehicle count
-        count_text = font_small.render(f"Vehicles: {self.lanes[lane_index].vehicle_count}", True, WHITE)
+        count_text = render_text(font_small, f"Vehicles: {self.lanes[lane_index].vehicle_count}", WHITE)
         surface.blit(count_text, (x + size/2 - count_text.get_width()/2, y + size*2.5 + 40))
         
         # Timer text
         if lane_index == self.current_lane_index:
             time_color = GREEN if self.remaining_time > 5 else YELLOW
-            time_text = font_medium.render(f"{int(self.remaining_time)}s", True, time_color)
+            time_text = render_text(font_medium, f"{int(self.remaining_time)}s", time_color)
             surface.blit(time_text, (x + size/2 - time_text.get_width()/2, y + size*2.5 + 70))
     
     def render_lane_video(self, surface, x, y, lane_index, width=400, height=300):
@@ -361,16 +746,10 @@ class TrafficSystem:
         
         lane = self.lanes[lane_index]
         
-        if lane.current_frame is not None:
-            # Convert OpenCV frame to pygame surface - FIX RESIZE ISSUE
+        if lane.current_seq is not None:
             try:
                 # Ensure width and height are integers to prevent the resize error
-                width_int = int(width)
-                height_int = int(height)
-                frame = cv2.resize(lane.current_frame, (width_int, height_int))
-                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                # Don't rotate the image as it causes viewing problems
-                pygame_surface = pygame.surfarray.make_surface(frame.swapaxes(0, 1))
+                pygame_surface = self._lane_thumbnail(lane_index, int(width), int(height))
                 surface.blit(pygame_surface, (x, y))
                 
                 # Show vehicle count overlay
@@ -378,21 +757,21 @@ class TrafficSystem:
                 count_bg.fill((0, 0, 0, 180))  # Semi-transparent black
                 surface.blit(count_bg, (x + 10, y + 10))
                 
-                count_text = font_small.render(f"Detected: {lane.vehicle_count}", True, GREEN)
+                count_text = render_text(font_small, f"Detected: {lane.vehicle_count}", GREEN)
                 surface.blit(count_text, (x + 15, y + 15))
             except Exception as e:
                 # Fallback if resize fails
                 print(f"Error rendering video frame: {e}")
                 # Show placeholder with error message
-                status_text = font_small.render(f"Frame display error: {str(e)[:30]}", True, RED)
+                status_text = render_text(font_small, f"Frame display error: {str(e)[:30]}", RED)
                 surface.blit(status_text, (x + width/2 - status_text.get_width()/2, y + height/2 - 15))
         else:
             # Show placeholder if no video
             if lane_index == self.current_lane_index:
-                status_text = font_medium.render("PROCESSING", True, YELLOW)
+                status_text = render_text(font_medium, "PROCESSING", YELLOW)
                 surface.blit(status_text, (x + width/2 - status_text.get_width()/2, y + height/2 - 15))
             else:
-                status_text = font_medium.render("WAITING", True, RED)
+                status_text = render_text(font_medium, "WAITING", RED)
                 surface.blit(status_text, (x + width/2 - status_text.get_width()/2, y + height/2 - 15))
             
             # Show vehicle count breakdown if available
@@ -400,10 +779,26 @@ class TrafficSystem:
                 y_offset = y + height/2 + 15
                 for vtype, count in lane.vehicle_types.items():
                     if count > 0:
-                        vtype_text = font_small.render(f"{vtype.capitalize()}: {count}", True, WHITE)
+                        vtype_text = render_text(font_small, f"{vtype.capitalize()}: {count}", WHITE)
                         surface.blit(vtype_text, (x + width/2 - vtype_text.get_width()/2, y_offset))
                         y_offset += 20
 
+    def _lane_thumbnail(self, lane_index, width, height):
+        """Lane's latest frame as a scaled pygame surface, converted once per frame sequence number"""
+        lane = self.lanes[lane_index]
+        key = (lane.current_seq, width, height)
+        cached = self._thumbnails.get(lane_index)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        
+        # Convert OpenCV frame to pygame surface
+        frame = cv2.resize(self.lane_display_frame(lane_index), (width, height))
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        # Don't rotate the image as it causes viewing problems
+        thumbnail = pygame.surfarray.make_surface(frame.swapaxes(0, 1))
+        self._thumbnails[lane_index] = (key, thumbnail)
+        return thumbnail
+    
     def render_traffic_stats(self, surface, x, y, width=500, height=300):
         """Render traffic statistics summary"""
         # Adjust y position with scroll
@@ -418,99 +813,117 @@ class TrafficSystem:
         pygame.draw.rect(surface, BLACK, (x, y, width, height), 2, border_radius=10)
         
         # Title
-        title_text = font_medium.render("Traffic Analysis", True, WHITE)
+        title_text = render_text(font_medium, "Traffic Analysis", WHITE)
         surface.blit(title_text, (x + width/2 - title_text.get_width()/2, y + 10))
         
         # Total vehicles
         total_vehicles = sum(lane.vehicle_count for lane in self.lanes)
-        vehicles_text = font_small.render(f"Total Vehicles: {total_vehicles}", True, WHITE)
+        vehicles_text = render_text(font_small, f"Total Vehicles: {total_vehicles}", WHITE)
         surface.blit(vehicles_text, (x + 20, y + 50))
         
         # Busiest lane
         busiest_idx = max(range(len(self.lanes)), key=lambda i: self.lanes[i].vehicle_count)
-        busiest_text = font_small.render(f"Busiest Lane: Lane {busiest_idx + 1} ({self.lanes[busiest_idx].vehicle_count} vehicles)", True, WHITE)
+        busiest_text = render_text(font_small, f"Busiest Lane: Lane {busiest_idx + 1} ({self.lanes[busiest_idx].vehicle_count} vehicles)", WHITE)
         surface.blit(busiest_text, (x + 20, y + 80))
         
         # Current cycle
-        cycle_text = font_small.render(f"Cycle Count: {self.total_cycles}", True, WHITE)
+        cycle_text = render_text(font_small, f"Cycle Count: {self.total_cycles}", WHITE)
         surface.blit(cycle_text, (x + 20, y + 110))
         
         # Runtime
         runtime = time.time() - self.start_time
-        runtime_text = font_small.render(f"Running Time: {int(runtime//60)}m {int(runtime%60)}s", True, WHITE)
+        runtime_text = render_text(font_small, f"Running Time: {int(runtime//60)}m {int(runtime%60)}s", WHITE)
         surface.blit(runtime_text, (x + 20, y + 140))
         
         # Traffic summary for last cycle
         if self.traffic_summary:
             y_pos = y + 180
-            summary_title = font_small.render("Recent Traffic Summary:", True, WHITE)
+            summary_title = render_text(font_small, "Recent Traffic Summary:", WHITE)
             surface.blit(summary_title, (x + 20, y_pos))
             y_pos += 25
             
-            for entry in self.traffic_summary[-min(4, len(self.traffic_summary)):]:
-                summary_text = font_small.render(
+            for entry in list(self.traffic_summary)[-4:]:
+                summary_text = render_text(
+                    font_small,
                     f"Lane {entry['lane']}: {entry['vehicle_count']} vehicles, {int(entry['green_time'])}s green", 
-                    True, WHITE
+                    WHITE
                 )
                 surface.blit(summary_text, (x + 30, y_pos))
                 y_pos += 20
 
     def render_traffic_chart(self, surface, x, y, width=500, height=240):
-        """Render chart of traffic data"""
+        """Render chart of traffic data, redrawn only when a lane gets a new result"""
         # Adjust y position with scroll
         y = y - scroll_y
         
         # Skip if not visible
         if y + height < 0 or y > SCREEN_HEIGHT:
             return
-            
-        # Create figure for plotting
-        fig, ax = plt.subplots(figsize=(width/100, height/100), dpi=100)
-        fig.patch.set_alpha(0.0)
-        ax.set_facecolor((0.2, 0.2, 0.2, 0.7))
         
-        # Plot vehicle counts by lane
+        key = (self.history_version, int(width), int(height))
+        if self._chart_cache is None or self._chart_cache[0] != key:
+            self._chart_cache = (key, self._draw_traffic_chart(int(width), int(height)))
+        
+        chart = self._chart_cache[1]
+        if chart is not None:  # None: no data yet
+            surface.blit(chart, (x, y))
+    
+    def _draw_traffic_chart(self, width, height):
+        """Bar chart of the latest vehicle count and green time per lane, drawn with pygame primitives"""
         lanes = []
         counts = []
         times = []
         
-        for lane_idx in range(4):
-            if self.detection_history[lane_idx]:
+        for lane_idx in range(len(self.lanes)):
+            latest = self.lane_history[lane_idx].last()
+            if latest is not None:
                 lanes.append(f"Lane {lane_idx+1}")
-                counts.append(self.detection_history[lane_idx][-1])
-                times.append(self.time_history[lane_idx][-1])
+                counts.append(latest['vehicle_count'])
+                times.append(latest['green_time'])
         
         if not lanes:  # No data yet
-            return
-            
-        # Plot
-        x_pos = np.arange(len(lanes))
-        width_bar = 0.35
-        
-        rects1 = ax.bar(x_pos - width_bar/2, counts, width_bar, label='Vehicle Count', color='skyblue')
-        rects2 = ax.bar(x_pos + width_bar/2, times, width_bar, label='Green Time (s)', color='lightgreen')
-        
-        # Customize plot
-        ax.set_title('Latest Traffic Data by Lane', color='white')
-        ax.set_ylabel('Count / Time', color='white')
-        ax.set_xticks(x_pos)
-        ax.set_xticklabels(lanes, color='white')
-        ax.tick_params(axis='y', colors='white')
-        ax.legend(facecolor=(0.2, 0.2, 0.2, 0.7), labelcolor='white')
-        ax.grid(True, linestyle='--', alpha=0.3)
-        
-        # Convert plot to pygame surface
-        canvas = FigureCanvasAgg(fig)
-        canvas.draw()
-        renderer = canvas.get_renderer()
-        raw_data = renderer.tostring_argb()
-        size = canvas.get_width_height()
-        
-        # Convert to pygame surface
-        surf = pygame.image.fromstring(raw_data, size, "ARGB")
-        surface.blit(surf, (x, y))
-        
-        plt.close(fig)
+            return None
+        
+        chart = pygame.Surface((width, height), pygame.SRCALPHA)
+        
+        # Plot area, leaving margins for the title, value labels and lane names
+        plot = pygame.Rect(50, 35, width - 70, height - 65)
+        pygame.draw.rect(chart, CHART_BG, plot)
+        
+        title_text = render_text(font_small, "Latest Traffic Data by Lane", WHITE)
+        chart.blit(title_text, (width/2 - title_text.get_width()/2, 8))
+        
+        # Value axis rounded up to a multiple of 10, with a grid line every fifth
+        y_max = max(10, int(np.ceil(max(counts + times) / 10.0)) * 10)
+        for step in range(6):
+            grid_y = plot.bottom - plot.height * step / 5
+            pygame.draw.line(chart, GRID_COLOR, (plot.left, grid_y), (plot.right, grid_y))
+            value_text = render_text(font_small, f"{y_max * step / 5:g}", WHITE)
+            chart.blit(value_text, (plot.left - value_text.get_width() - 6, grid_y - value_text.get_height()/2))
+        
+        # Vehicle count and green time bars side by side for every lane
+        group_width = plot.width / len(lanes)
+        bar_width = group_width * 0.35
+        for i, (lane_name, count, green_time) in enumerate(zip(lanes, counts, times)):
+            center = plot.left + group_width * (i + 0.5)
+            for value, color, offset in ((count, SKY_BLUE, -bar_width), (green_time, LIGHT_GREEN, 0)):
+                bar_height = plot.height * value / y_max
+                pygame.draw.rect(chart, color, (center + offset, plot.bottom - bar_height, bar_width, bar_height))
+            lane_text = render_text(font_small, lane_name, WHITE)
+            chart.blit(lane_text, (center - lane_text.get_width()/2, plot.bottom + 5))
+        
+        # Legend above the top right corner of the plot
+        legend_x = plot.right
+        for label, color in (("Green Time (s)", LIGHT_GREEN), ("Vehicle Count", SKY_BLUE)):
+            label_text = render_text(font_small, label, WHITE)
+            legend_x -= label_text.get_width()
+            chart.blit(label_text, (legend_x, 8))
+            legend_x -= 20
+            pygame.draw.rect(chart, color, (legend_x, 8 + label_text.get_height()/2 - 5, 14, 10))
+            legend_x -= 15
+        
+        pygame.draw.rect(chart, WHITE, plot, 1)
+        return chart
         
     def render_scroll_indicators(self, surface):
         """Render scroll indicators if content is off-screen"""
@@ -533,21 +946,17 @@ class TrafficSystem:
                     (SCREEN_WIDTH // 2 + 15, SCREEN_HEIGHT - 40)
                 ])
     
-    def render(self, surface):
-        """Render the entire traffic system UI with vertical layout"""
-        # Fill background
-        surface.fill(BG_COLOR)
-        
-        # Calculate positions based on a vertical layout
-        padding = 20
-        
-        # Draw title (always fixed at top)
-        title_text = font_title.render("AI-Powered Traffic Signal Optimization", True, WHITE)
-        surface.blit(title_text, (SCREEN_WIDTH/2 - title_text.get_width()/2, padding))
-        
-        # Status information (fixed at bottom)
-        status_panel_height = 40
-        scroll_indicator_margin = 20
+    def _dashboard_panels(self, padding=20):
+        """
+        Layout of the scrolling dashboard content
+        
+        Returns:
+            List of (key, rect, signature, draw) per panel: rect in content
+            coordinates (before scrolling), signature the state the panel shows
+            and draw(surface) the function drawing it
+        """
+        global scrollable_surface_height
+        panels = []
         
         # Define layout coordinates (all y-coordinates will have scroll_y subtracted when rendering)
         title_height = 60
@@ -556,87 +965,201 @@ class TrafficSystem:
         # Traffic light size and position
         light_size = 80
         light_gap = 30
-        light_row_width = (light_size * 4) + (light_gap * 3)
+        num_lanes = len(self.lanes)
+        light_row_width = (light_size * num_lanes) + (light_gap * (num_lanes - 1))
         light_start_x = (SCREEN_WIDTH - light_row_width) // 2
         
         # Position traffic lights in a row at the top
-        for i in range(4):
+        for i in range(num_lanes):
             x = light_start_x + (i * (light_size + light_gap))
             y = start_y
-            self.render_traffic_light(surface, x, y, i, light_size)
-        
-        # Video feeds - we'll display them in a 2x2 grid
+            is_current = i == self.current_lane_index
+            signature = (is_current, is_current and self.remaining_time > 5,
+                         int(self.remaining_time) if is_current else None, self.lanes[i].vehicle_count)
+            # The labels under the light are centered and may be wider than the light
+            rect = pygame.Rect(x - light_gap // 2, y, light_size + light_gap, light_size*2.5 + 100)
+            panels.append((('light', i), rect, signature,
+                           partial(self.render_traffic_light, x=x, y=y, lane_index=i, size=light_size)))
+        
+        # Video feeds - we'll display them in a grid two feeds wide
         video_width = SCREEN_WIDTH // 2 - padding*1.5
         video_height = video_width * 3 // 4  # 4:3 aspect ratio
         
         # Starting y position for video grid (after traffic lights)
         video_start_y = start_y + light_size*2.5 + 100
         
-        # Render video feeds in a 2x2 grid
-        for i in range(4):
+        # Render video feeds in a grid two feeds wide
+        video_rows = (num_lanes + 1) // 2
+        for i in range(num_lanes):
             row = i // 2
             col = i % 2
             x = padding + col * (video_width + padding)
             y = video_start_y + row * (video_height + padding*2)
-            self.render_lane_video(surface, x, y, i, video_width, video_height)
+            lane = self.lanes[i]
+            is_current = i == self.current_lane_index
+            signature = (lane.current_seq, is_current, is_current and self.remaining_time > 5, lane.vehicle_count,
+                         tuple(lane.vehicle_types.items()) if lane.processing_complete else None)
+            rect = pygame.Rect(x, y, video_width, video_height).inflate(2, 2)
+            panels.append((('video', i), rect, signature,
+                           partial(self.render_lane_video, x=x, y=y, lane_index=i, width=video_width, height=video_height)))
         
         # Traffic stats - place below videos
         stats_width = SCREEN_WIDTH - padding*2
         stats_height = 300
-        stats_y = video_start_y + 2 * (video_height + padding*2) + padding
-        self.render_traffic_stats(surface, padding, stats_y, stats_width, stats_height)
+        stats_y = video_start_y + video_rows * (video_height + padding*2) + padding
+        signature = (tuple(lane.vehicle_count for lane in self.lanes), self.total_cycles,
+                     int(time.time() - self.start_time), self.history_version)
+        panels.append(('stats', pygame.Rect(padding, stats_y, stats_width, stats_height).inflate(2, 2), signature,
+                       partial(self.render_traffic_stats, x=padding, y=stats_y, width=stats_width, height=stats_height)))
         
         # Chart - place below stats
         chart_width = stats_width
         chart_height = 240
         chart_y = stats_y + stats_height + padding
-        self.render_traffic_chart(surface, padding, chart_y, chart_width, chart_height)
+        panels.append(('chart', pygame.Rect(padding, chart_y, chart_width, chart_height), self.history_version,
+                       partial(self.render_traffic_chart, x=padding, y=chart_y, width=chart_width, height=chart_height)))
         
         # Update the scrollable height based on content
-        global scrollable_surface_height
         scrollable_surface_height = chart_y + chart_height + padding
+        return panels
+    
+    def _render_background(self, surface):
+        """Background and title, which the content scrolls over"""
+        surface.fill(BG_COLOR)
         
-        # Fixed position status bar at the bottom
-        pygame.draw.rect(surface, BG_COLOR, (0, SCREEN_HEIGHT - status_panel_height, SCREEN_WIDTH, status_panel_height))
+        # Draw title (always fixed at top)
+        title_text = render_text(font_title, "AI-Powered Traffic Signal Optimization", WHITE)
+        surface.blit(title_text, (SCREEN_WIDTH/2 - title_text.get_width()/2, 20))
+    
+    def _status_message(self):
+        """Text of the status bar, or None"""
+        capturing = [i + 1 for i, job in sorted(self.jobs.items()) if not job.done()]
+        if capturing:
+            return f"AI Camera capturing Lane {', '.join(map(str, capturing))}..."
+        if self.remaining_time <= 5:
+            return f"Switching to Lane {(self.current_lane_index + 1) % len(self.lanes) + 1} in {int(self.remaining_time)} seconds..."
+        return None
+    
+    def render_status_bar(self, surface, rect, message, padding=20):
+        """Fixed position status bar at the bottom"""
+        pygame.draw.rect(surface, BG_COLOR, rect)
         
         # Status messages in fixed position
-        if self.is_processing:
-            status_text = font_medium.render("Processing video feed...", True, YELLOW)
-            surface.blit(status_text, (SCREEN_WIDTH/2 - status_text.get_width()/2, SCREEN_HEIGHT - status_panel_height//2 - status_text.get_height()//2))
-        elif self.remaining_time <= 5:
-            status_text = font_medium.render(f"Switching to Lane {(self.current_lane_index + 1) % 4 + 1} in {int(self.remaining_time)} seconds...", True, YELLOW)
-            surface.blit(status_text, (SCREEN_WIDTH/2 - status_text.get_width()/2, SCREEN_HEIGHT - status_panel_height//2 - status_text.get_height()//2))
+        if message is not None:
+            status_text = render_text(font_medium, message, YELLOW)
+            surface.blit(status_text, (rect.centerx - status_text.get_width()/2, rect.centery - status_text.get_height()//2))
         
         # Render instruction
-        help_text = font_small.render("Mouse wheel to scroll | ESC to quit", True, WHITE)
-        surface.blit(help_text, (SCREEN_WIDTH - help_text.get_width() - padding, SCREEN_HEIGHT - status_panel_height//2 - help_text.get_height()//2))
+        help_text = render_text(font_small, "Mouse wheel to scroll | F3 profiler | ESC to quit", WHITE)
+        surface.blit(help_text, (rect.right - help_text.get_width() - padding, rect.centery - help_text.get_height()//2))
+    
+    def render_profiler_overlay(self, surface, lines, min_size=(0, 0), x=10, y=10):
+        """Frame time overlay in the top left corner; returns its rect"""
+        text_surfaces = [render_text(font_small, line, GREEN) for line in lines]
+        width = max((text.get_width() for text in text_surfaces), default=0) + 16
+        height = sum(text.get_height() for text in text_surfaces) + 12
+        rect = pygame.Rect(x, y, max(width, min_size[0]), max(height, min_size[1]))
+        pygame.draw.rect(surface, BLACK, rect)
+        pygame.draw.rect(surface, DARK_GRAY, rect, 1)
+        text_y = y + 6
+        for text in text_surfaces:
+            surface.blit(text, (x + 8, text_y))
+            text_y += text.get_height()
+        return rect
+    
+    def render(self, surface, full_redraw=False):
+        """
+        Render the traffic system UI with vertical layout
+        
+        Only panels whose state changed since the last call are redrawn, and
+        only those areas of the display are updated. Scrolling, resizing or
+        full_redraw=True repaint everything.
+        """
+        # Calculate positions based on a vertical layout
+        padding = 20
+        status_panel_height = 40
         
-        # Render scroll indicators
+        view = (scroll_y, SCREEN_WIDTH, SCREEN_HEIGHT, surface.get_size(), self.show_profiler)
+        full_redraw = full_redraw or view != self._last_view
+        if full_redraw:
+            self._last_view = view
+            self._panel_signatures = {}
+            self._render_background(surface)
+        
+        # Scrolling content: redraw the panels whose state changed
+        dirty = []
+        for key, rect, signature, draw in self._dashboard_panels(padding):
+            screen_rect = rect.move(0, -scroll_y)
+            if not screen_rect.colliderect(surface.get_rect()) or self._panel_signatures.get(key) == signature:
+                continue
+            self._panel_signatures[key] = signature
+            if not full_redraw:
+                # Repaint the background (and any title under it) just within the panel
+                surface.set_clip(screen_rect)
+                self._render_background(surface)
+            draw(surface)
+            surface.set_clip(None)
+            dirty.append(screen_rect)
+        
+        # Fixed overlays, redrawn when they change or content was redrawn underneath
+        status_rect = pygame.Rect(0, SCREEN_HEIGHT - status_panel_height, SCREEN_WIDTH, status_panel_height)
+        message = self._status_message()
+        if full_redraw or self._panel_signatures.get('status', '') != message or status_rect.collidelist(dirty) != -1:
+            self._panel_signatures['status'] = message
+            self.render_status_bar(surface, status_rect, message, padding)
+            dirty.append(status_rect)
+        
+        # Render scroll indicators (unchanged pixels unless something was drawn under them)
         self.render_scroll_indicators(surface)
         
-        pygame.display.flip()
+        if self.show_profiler:
+            lines = self.profiler.overlay_lines()
+            previous = self._panel_signatures.get('profiler')
+            if full_redraw or previous is None or previous[0] is not lines or previous[1].collidelist(dirty) != -1:
+                # The overlay only grows, so it always covers what it showed before
+                rect = self.render_profiler_overlay(surface, lines, self._profiler_rect.size)
+                self._profiler_rect = rect
+                self._panel_signatures['profiler'] = (lines, rect)
+                dirty.append(rect)
+        
+        if full_redraw:
+            pygame.display.flip()
+        elif dirty:
+            pygame.display.update(dirty)
+        self.profiler.count('dirty rects', 'all' if full_redraw else len(dirty))
         
 def main():
     print("AI Traffic Signal Optimization System")
     print("-------------------------------------")
     
+    # Global scroll variable
+    global scroll_y, scrollable_surface_height, SCREEN_WIDTH, SCREEN_HEIGHT, screen
+    scroll_y = 0
+    
+    pygame.display.set_caption("AI Traffic Signal Optimization")
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.RESIZABLE)  # Make window resizable
+    
     # Initialize the traffic system
     traffic_system = TrafficSystem()
     
     # Main loop
     last_time = time.time()
     running = True
-    
-    # Global scroll variable
-    global scroll_y, scrollable_surface_height, SCREEN_WIDTH, SCREEN_HEIGHT, screen
-    scroll_y = 0
+    profiler = traffic_system.profiler
     
     try:
         while running:
+            full_redraw = False
             # Handle events
             for event in pygame.event.get():
                 if event.type == QUIT or (event.type == KEYDOWN and event.key == K_ESCAPE):
                     running = False
+                elif event.type == KEYDOWN and event.key == K_F3:
+                    # Toggle the frame time overlay
+                    traffic_system.show_profiler = not traffic_system.show_profiler
+                elif event.type in (VIDEOEXPOSE, WINDOWEXPOSED):
+                    # The window contents were lost, e.g. it was uncovered
+                    full_redraw = True
                 elif event.type == MOUSEWHEEL:
                     # Handle scrolling with mouse wheel
                     scroll_y -= event.y * SCROLL_SPEED
@@ -653,17 +1176,21 @@ def main():
             last_time = current_time
             
             # Update traffic system
-            traffic_system.update(dt)
+            with profiler.section('update'):
+                traffic_system.update(dt)
             
             # Render
-            traffic_system.render(screen)
+            with profiler.section('render'):
+                traffic_system.render(screen, full_redraw)
             
             # Cap the frame rate
             clock.tick(30)
+            profiler.end_frame()
     except Exception as e:
         print(f"Error occurred: {e}")
     finally:
         # Clean up
+        traffic_system.close()
         pygame.quit()
     
 if __name__ == "__main__":
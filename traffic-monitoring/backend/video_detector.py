@@ -2,19 +2,158 @@ import cv2
 import numpy as np
 import time
 import os
+import threading
+from collections import deque
 from ultralytics import YOLO
+from box_postprocess import ColorCoverage, boxes_to_array, postprocess_boxes
+from tracker import VehicleTracker
+from frame_sampler import AdaptiveFrameSampler
+
+# Queue policies for the pipelined video mode
+DROP_OLDEST = "drop_oldest"  # Discard the stalest queued frame when full (live sources)
+BLOCK = "block"              # Wait for space when full (files, nothing may be skipped)
+
+# Marks the end of the stream in pipeline queues
+_END_OF_STREAM = object()
+
+# Ambulance colors in HSV: white body with red markings (red wraps around the hue circle)
+EMERGENCY_COLORS = {
+    "white": [(np.array([0, 0, 200], dtype=np.uint8), np.array([180, 30, 255], dtype=np.uint8))],
+    "red": [(np.array([0, 100, 100], dtype=np.uint8), np.array([10, 255, 255], dtype=np.uint8)),
+            (np.array([160, 100, 100], dtype=np.uint8), np.array([180, 255, 255], dtype=np.uint8))],
+}
+
+
+def _shade_region(frame, x1, y1, x2, y2, color, alpha=0.7):
+    """Blend a solid color over one rectangle of the frame in place (no full-frame copy)"""
+    region = frame[max(y1, 0):y2, max(x1, 0):x2]
+    if region.size == 0:
+        return
+    overlay = np.empty_like(region)
+    overlay[:] = color
+    cv2.addWeighted(overlay, alpha, region, 1 - alpha, 0, region)
+
+
+def _is_live_source(video_path):
+    """True for stream URLs and camera indices, False for video files"""
+    if isinstance(video_path, int):
+        return True
+    video_path = str(video_path)  # Also accepts pathlib.Path, like cv2.VideoCapture
+    return "://" in video_path or video_path.isdigit()
+
+
+class FrameQueue:
+    """
+    Bounded queue between two pipeline stages with depth statistics
+
+    With the drop_oldest policy a full queue discards its oldest item so the
+    consumer always gets the freshest frame; with the block policy the
+    producer waits for space.
+    """
+
+    def __init__(self, name, maxsize=4, policy=DROP_OLDEST):
+        if policy not in (DROP_OLDEST, BLOCK):
+            raise ValueError(f"Unknown queue policy: {policy}")
+        self.name = name
+        self.maxsize = maxsize
+        self.policy = policy
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        
+        # Stats
+        self.put_count = 0
+        self.drop_count = 0
+        self.max_depth = 0
+        self._depth_total = 0
+
+    def put(self, item, force=False):
+        """
+        Add an item, dropping or blocking when full depending on the policy
+
+        Args:
+            item: Item to queue
+            force: Always block instead of dropping (used for the end-of-stream marker)
+        """
+        with self._cond:
+            while len(self._items) >= self.maxsize and not self._closed:
+                if self.policy == DROP_OLDEST and not force:
+                    self._items.popleft()
+                    self.drop_count += 1
+                    break
+                self._cond.wait()
+            if self._closed:
+                return
+            self._items.append(item)
+            self.put_count += 1
+            depth = len(self._items)
+            self.max_depth = max(self.max_depth, depth)
+            self._depth_total += depth
+            self._cond.notify_all()
+
+    def get(self):
+        """Remove and return the oldest item, waiting until one is available"""
+        with self._cond:
+            while not self._items and not self._closed:
+                self._cond.wait()
+            if not self._items:
+                return _END_OF_STREAM
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+    def close(self):
+        """Wake up every waiting producer and consumer; later gets return end-of-stream"""
+        with self._cond:
+            self._closed = True
+            self._items.clear()
+            self._cond.notify_all()
+
+    def stats(self):
+        """Dictionary of queue depth statistics"""
+        return {
+            'queue': self.name,
+            'policy': self.policy,
+            'put': self.put_count,
+            'dropped': self.drop_count,
+            'max_depth': self.max_depth,
+            'mean_depth': self._depth_total / self.put_count if self.put_count else 0.0,
+        }
+
 
 class VideoTrafficDetector:
-    def __init__(self, model_path="yolov8n.pt", confidence=0.3):
+    def __init__(self, model_path="yolov8n.pt", confidence=0.3, render=True,
+                 track=True, detect_every=1, counting_line=None, adaptive_sampling=False):
         """
         Initialize the video traffic detector with YOLO model
         
         Args:
             model_path: Path to the YOLO model weights
             confidence: Confidence threshold for detections (0-1)
+            render: Draw annotated frames; set False on headless edge boxes to
+                only count and flag vehicles (see analyze() and annotate())
+            track: Follow vehicles across frames so counts are unique vehicles;
+                False sums the boxes of every frame (the old behaviour)
+            detect_every: Run YOLO on every Nth frame only and interpolate the
+                tracks in between (needs track=True)
+            counting_line: Optional ((x1, y1), (x2, y2)) line; vehicles whose
+                track crosses it are counted per type and direction
+            adaptive_sampling: Let scene motion decide which frames YOLO runs on
+                (see frame_sampler.AdaptiveFrameSampler) instead of detect_every;
+                needs track=True
         """
         self.model = YOLO(model_path)
         self.confidence = confidence
+        self.render = render
+        self.detect_every = max(1, int(detect_every)) if track else 1
+        self.tracker = None
+        if track:
+            # Tracks must survive several skipped frames between detector runs
+            self.tracker = VehicleTracker(max_missed=max(15, 3 * self.detect_every), counting_line=counting_line)
+        self.adaptive_sampling = adaptive_sampling and track
+        self.sampler = None  # Created per video in process_video(), it needs the FPS
+        self.inference_count = 0
+        self._last_track_ids = None
         
         # Enhanced vehicle classes for Indian roads
         self.vehicle_classes = {
@@ -45,6 +184,9 @@ class VideoTrafficDetector:
         # Emergency vehicle detection parameters
         self.emergency_min_area = 10000      # Reduced for Indian ambulances
         self.emergency_min_ratio = 1.5       # Adjusted aspect ratio
+        self.emergency_white_ratio = 0.4     # Share of white body pixels
+        self.emergency_red_ratio = 0.05      # Share of red marking pixels
+        self.emergency_confidence = 0.65     # Confidence that flags a vehicle without the colors
         
         # Auto-rickshaw detection parameters (usually classified as boats by YOLO)
         self.auto_min_area = 5000
@@ -56,6 +198,7 @@ class VideoTrafficDetector:
         self.start_time = time.time()
         self.emergency_detected = False
         self.emergency_start_time = None
+        self.pipeline_queues = []  # FrameQueues of the last pipelined run
         
         # Vehicle counters
         self.vehicle_counts = {vtype: 0 for vtype in self.vehicle_classes.values()}
@@ -69,160 +212,205 @@ class VideoTrafficDetector:
             frame: Video frame to process
             
         Returns:
-            processed_frame: Frame with detection annotations
+            processed_frame: Frame with detection annotations (None in headless mode)
             vehicle_count: Total vehicles detected
             has_emergency: Boolean if emergency vehicle detected
         """
-        results = self.model(frame, conf=self.confidence)[0]
+        # Between detector runs the tracks are interpolated instead of running YOLO
+        if self.sampler is not None:
+            skip = not self.sampler.should_infer(frame)
+        else:
+            skip = self.tracker is not None and (self.frame_count - 1) % self.detect_every != 0
+        if skip:
+            detections, emergency_flags = self._interpolated_detections()
+        else:
+            detections, emergency_flags = self.analyze(frame)
+        has_emergency = bool(emergency_flags.any())
         
-        vehicle_count = 0
-        has_emergency = False
-        processed_frame = frame.copy()
+        processed_frame = None
+        if self.render:
+            processed_frame = self.annotate(frame, detections, emergency_flags, self._last_track_ids)
         
-        # Reset frame counters
-        frame_counts = {vtype: 0 for vtype in self.vehicle_classes.values()}
+        return processed_frame, len(detections), has_emergency
+
+    def analyze(self, frame):
+        """
+        Detect vehicles and emergency vehicles without drawing anything
         
-        for detection in results.boxes.data.tolist():
-            x1, y1, x2, y2, conf, class_id = detection
-            x1, y1, x2, y2, class_id = map(int, [x1, y1, x2, y2, class_id])
-            
-            # Map class_id to our vehicle types
-            vehicle_type = self.vehicle_classes.get(class_id)
+        Updates the running vehicle counters (through the tracker when tracking)
+        and emergency state.
+        
+        Args:
+            frame: Video frame to process
             
-            if vehicle_type:
-                # Handle auto-rickshaw detection (often misclassified as boat class 8)
-                if class_id == 8:
-                    width, height = x2 - x1, y2 - y1
-                    area = width * height
-                    ratio = width / height if height > 0 else 0
-                    
-                    # Verify it's actually an auto based on size/ratio
-                    if not (self.auto_min_area <= area <= self.auto_max_area and ratio >= self.auto_ratio):
-                        continue
-                
-                vehicle_count += 1
-                frame_counts[vehicle_type] += 1
-                self.vehicle_counts[vehicle_type] += 1
-                self.total_count += 1
-                
-                # Check for emergency vehicle characteristics
-                is_emergency = self._is_emergency_vehicle(
-                    (x1, y1, x2, y2), class_id, conf, frame
-                )
-                
-                if is_emergency:
-                    has_emergency = True
-                    self.emergency_detected = True
-                    if self.emergency_start_time is None:
-                        self.emergency_start_time = time.time()
-                
-                # Get color for vehicle type
-                color = self.vehicle_colors.get(vehicle_type, (0, 255, 0))
-                if is_emergency:
-                    color = (0, 0, 255)  # Red for emergency
-                    
-                # Draw bounding box
-                cv2.rectangle(processed_frame, (x1, y1), (x2, y2), color, 2)
-                
-                # Prepare label with confidence
-                if is_emergency:
-                    label = f"EMERGENCY {vehicle_type} {conf:.2f}"
-                else:
-                    label = f"{vehicle_type} {conf:.2f}"
-                
-                # Add text background for better visibility
-                text_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 2)[0]
-                cv2.rectangle(
-                    processed_frame, 
-                    (x1, y1 - text_size[1] - 10), 
-                    (x1 + text_size[0], y1), 
-                    color, 
-                    -1
-                )
-                
-                # Add text
-                cv2.putText(
-                    processed_frame, label, (x1, y1 - 5),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2
-                )
+        Returns:
+            detections: box_postprocess.Detections for the frame
+            emergency_flags: Boolean array, True for detections judged to be emergency vehicles
+        """
+        results = self.model(frame, conf=self.confidence)[0]
+        self.inference_count += 1
         
-        # Update frame count display
-        self._add_count_display(processed_frame, frame_counts)
+        # Filter, measure and count every box in one vectorized pass; auto-rickshaws
+        # (often misclassified as boat class 8) must also look like one by size/ratio
+        detections = postprocess_boxes(
+            boxes_to_array(results), self.vehicle_classes.keys(),
+            size_gates={8: (self.auto_min_area, self.auto_max_area, self.auto_ratio)}
+        )
+        
+        if self.tracker is None:
+            for vtype, count in detections.counts_by_name(self.vehicle_classes).items():
+                self.vehicle_counts[vtype] += count
+            self.total_count += len(detections)
+        
+        # Only boxes passing the cheap class/size/shape checks need the color analysis
+        emergency_flags = (
+            np.isin(detections.class_ids, [2, 7])
+            & (detections.areas >= self.emergency_min_area)
+            & (detections.aspect_ratios >= self.emergency_min_ratio)
+        )
+        if self.sampler is not None and emergency_flags.any():
+            self.sampler.boost()  # Watch a possible emergency vehicle closely
+        candidates = np.flatnonzero(emergency_flags)
+        if len(candidates):
+            emergency_flags[candidates] = self._has_emergency_colors(
+                frame, detections.boxes[candidates], detections.confidences[candidates]
+            )
+        
+        if self.tracker is not None:
+            matches = self.tracker.update(
+                detections.boxes, detections.class_ids, self.frame_count,
+                detections.confidences, emergency_flags
+            )
+            # A vehicle once judged to be an emergency vehicle stays flagged
+            emergency_flags = np.array([track.is_emergency for track, _ in matches], dtype=bool)
+            self._last_track_ids = [track.track_id for track, _ in matches]
+            self._sync_track_counts()
         
-        return processed_frame, vehicle_count, has_emergency
+        self._note_emergency(emergency_flags)
+        return detections, emergency_flags
+
+    def _interpolated_detections(self):
+        """Detections predicted from the live tracks for a frame YOLO skipped"""
+        predicted = self.tracker.predict(self.frame_count)
+        data = np.array([
+            [*box, track.confidence, track.class_id] for track, box in predicted
+        ], dtype=np.float32).reshape(-1, 6)
+        detections = postprocess_boxes(data, self.vehicle_classes.keys())
+        emergency_flags = np.array([track.is_emergency for track, _ in predicted], dtype=bool)
+        self._last_track_ids = [track.track_id for track, _ in predicted]
+        self._note_emergency(emergency_flags)
+        return detections, emergency_flags
 
-    def _is_emergency_vehicle(self, bbox, class_id, confidence, frame):
+    def _sync_track_counts(self):
+        """Set the vehicle counters to the unique vehicles tracked so far"""
+        for class_id, vtype in self.vehicle_classes.items():
+            self.vehicle_counts[vtype] = self.tracker.class_counts.get(class_id, 0)
+        self.total_count = self.tracker.unique_count()
+
+    def _note_emergency(self, emergency_flags):
+        """Update the emergency state from a frame's emergency flags"""
+        if emergency_flags.any():
+            self.emergency_detected = True
+            if self.emergency_start_time is None:
+                self.emergency_start_time = time.time()
+
+    def annotate(self, frame, detections, emergency_flags, track_ids=None):
         """
-        Determine if a detected vehicle is likely an emergency vehicle
+        Draw detections and the vehicle count panel on a copy of a frame
+        
+        Headless detectors skip this; call it on demand for frames that are displayed.
         
         Args:
-            bbox: (x1, y1, x2, y2) bounding box coordinates
-            class_id: Detected class ID
-            confidence: Detection confidence
-            frame: Original frame for additional analysis
+            frame: Video frame the detections belong to
+            detections: box_postprocess.Detections from analyze()
+            emergency_flags: Boolean array from analyze()
+            track_ids: Optional track ID per detection, shown in the labels
             
         Returns:
-            bool: True if likely emergency vehicle
+            processed_frame: Annotated copy of the frame
         """
-        x1, y1, x2, y2 = bbox
-        width = x2 - x1
-        height = y2 - y1
-        area = width * height
-        
-        # Check if it's an ambulance/emergency vehicle (can be car, van or truck in Indian context)
-        if class_id not in [2, 7]:  # Car or truck
-            return False
+        processed_frame = frame.copy()
+        
+        if track_ids is None:
+            track_ids = [None] * len(detections)
+        
+        for (x1, y1, x2, y2), conf, class_id, is_emergency, track_id in zip(
+            detections.boxes.tolist(), detections.confidences.tolist(),
+            detections.class_ids.tolist(), emergency_flags.tolist(), track_ids
+        ):
+            vehicle_type = self.vehicle_classes[class_id]
+            
+            # Get color for vehicle type
+            color = self.vehicle_colors.get(vehicle_type, (0, 255, 0))
+            if is_emergency:
+                color = (0, 0, 255)  # Red for emergency
+                
+            # Draw bounding box
+            cv2.rectangle(processed_frame, (x1, y1), (x2, y2), color, 2)
             
-        # Size check (ambulances in India can be smaller)
-        if area < self.emergency_min_area:
-            return False
+            # Prepare label with confidence
+            if is_emergency:
+                label = f"EMERGENCY {vehicle_type} {conf:.2f}"
+            else:
+                label = f"{vehicle_type} {conf:.2f}"
+            if track_id is not None:
+                label = f"#{track_id} {label}"
             
-        # Aspect ratio check
-        aspect_ratio = width / height
-        if aspect_ratio < self.emergency_min_ratio:
-            return False
-        
-        # Check for ambulance colors - typically white with red markings
-        # Extract the vehicle region
-        vehicle_region = frame[y1:y2, x1:x2]
-        if vehicle_region.size == 0:
-            return False
+            # Add text background for better visibility
+            text_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 2)[0]
+            cv2.rectangle(
+                processed_frame, 
+                (x1, y1 - text_size[1] - 10), 
+                (x1 + text_size[0], y1), 
+                color, 
+                -1
+            )
             
-        # Convert to HSV for better color detection
-        hsv = cv2.cvtColor(vehicle_region, cv2.COLOR_BGR2HSV)
-        
-        # Define white and red color ranges (in HSV)
-        white_lower = np.array([0, 0, 200])
-        white_upper = np.array([180, 30, 255])
-        red_lower1 = np.array([0, 100, 100])
-        red_upper1 = np.array([10, 255, 255])
-        red_lower2 = np.array([160, 100, 100])
-        red_upper2 = np.array([180, 255, 255])
-        
-        # Create masks
-        white_mask = cv2.inRange(hsv, white_lower, white_upper)
-        red_mask1 = cv2.inRange(hsv, red_lower1, red_upper1)
-        red_mask2 = cv2.inRange(hsv, red_lower2, red_upper2)
-        red_mask = cv2.bitwise_or(red_mask1, red_mask2)
-        
-        # Calculate percentage of white and red
-        white_percent = np.sum(white_mask > 0) / white_mask.size
-        red_percent = np.sum(red_mask > 0) / red_mask.size
-        
-        # If significant white and some red markings, likely an ambulance
-        if white_percent > 0.4 and red_percent > 0.05:
-            return True
+            # Add text
+            cv2.putText(
+                processed_frame, label, (x1, y1 - 5),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2
+            )
+        
+        # Update frame count display
+        unique_total = self.total_count if self.tracker is not None else None
+        self._add_count_display(processed_frame, detections.counts_by_name(self.vehicle_classes), unique_total)
+        
+        return processed_frame
+
+    def _has_emergency_colors(self, frame, boxes, confidences):
+        """
+        Decide which candidate vehicles look like ambulances (typically white with red markings)
+        
+        The part of the frame spanned by the candidates is converted to HSV once;
+        white/red shares of every box then come from integral images.
+        
+        Args:
+            frame: Original frame
+            boxes: (N, 4) int array of candidate x1, y1, x2, y2 (already past
+                the class, size and aspect ratio checks)
+            confidences: (N,) detection confidences
             
-        # Confidence threshold for emergency vehicles
-        return confidence > 0.65
+        Returns:
+            Boolean array (N,), True if likely emergency vehicle
+        """
+        region = (int(boxes[:, 0].min()), int(boxes[:, 1].min()),
+                  int(boxes[:, 2].max()), int(boxes[:, 3].max()))
+        coverage = ColorCoverage(frame, EMERGENCY_COLORS, region)
+        shares = coverage.fractions(boxes)
+        
+        # Significant white and some red markings, or a very confident detection
+        has_colors = (shares["white"] > self.emergency_white_ratio) & (shares["red"] > self.emergency_red_ratio)
+        is_emergency = has_colors | (confidences > self.emergency_confidence)
+        
+        # Boxes entirely outside the frame have nothing to analyze
+        return is_emergency & (coverage.areas(boxes) > 0)
 
-    def _add_count_display(self, frame, frame_counts):
-        """Add vehicle count information to the frame"""
+    def _add_count_display(self, frame, frame_counts, unique_total=None):
+        """Add vehicle count information to the frame (in view, plus unique vehicles when tracking)"""
         # Add a semi-transparent overlay
         h, w = frame.shape[:2]
-        overlay = frame.copy()
-        cv2.rectangle(overlay, (w-250, 0), (w, 180), (0, 0, 0), -1)
-        cv2.addWeighted(overlay, 0.7, frame, 0.3, 0, frame)
+        _shade_region(frame, w-250, 0, w, 180, (0, 0, 0))
         
         # Add title
         cv2.putText(
@@ -246,20 +434,39 @@ class VideoTrafficDetector:
             frame, f"Total: {sum(frame_counts.values())}", (w-240, y_pos),
             cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2
         )
+        
+        if unique_total is not None:
+            cv2.putText(
+                frame, f"Unique vehicles: {unique_total}", (w-240, y_pos + 25),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2
+            )
 
-    def process_video(self, video_path, output_path=None):
+    def process_video(self, video_path, output_path=None, pipelined=False,
+                      queue_size=4, drop_policy=None):
         """
-        Process a video file for vehicle and emergency vehicle detection
+        Process a video file or live stream for vehicle and emergency vehicle detection
         
         Args:
-            video_path: Path to input video file
+            video_path: Path to input video file, stream URL (rtsp://, http://...)
+                or camera index
             output_path: Optional path to save processed video
+            pipelined: Run capture, inference and output on separate threads
+            queue_size: Frames buffered between pipeline stages
+            drop_policy: DROP_OLDEST to always work on the freshest frame or
+                BLOCK to process every frame (default: DROP_OLDEST for
+                streams and cameras, BLOCK for files)
         """
-        # Convert to absolute path and verify file exists
-        video_path = os.path.abspath(video_path)
-        if not os.path.exists(video_path):
-            print(f"Error: Video file not found at {video_path}")
-            return
+        live = _is_live_source(video_path)
+        if drop_policy is None:
+            drop_policy = DROP_OLDEST if live else BLOCK
+        if not live:
+            # Convert to absolute path and verify file exists
+            video_path = os.path.abspath(video_path)
+            if not os.path.exists(video_path):
+                print(f"Error: Video file not found at {video_path}")
+                return
+        elif isinstance(video_path, str) and video_path.isdigit():
+            video_path = int(video_path)
             
         cap = cv2.VideoCapture(video_path)
         if not cap.isOpened():
@@ -270,6 +477,17 @@ class VideoTrafficDetector:
         frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
         frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
         fps = cap.get(cv2.CAP_PROP_FPS)
+        if self.tracker is not None and fps > 0:
+            self.tracker.fps = fps  # Dwell times in seconds of video
+        if self.adaptive_sampling:
+            self.sampler = AdaptiveFrameSampler(fps)
+            # Tracks must outlive the longest gap between detector runs
+            self.tracker.max_missed = max(self.tracker.max_missed, 2 * self.sampler.max_interval)
+        
+        # Headless detectors produce no frames to write
+        if output_path and not self.render:
+            print("Headless mode: not writing an output video")
+            output_path = None
         
         # Initialize video writer if output path is specified
         if output_path:
@@ -285,6 +503,25 @@ class VideoTrafficDetector:
         print(f"📐 Frame size: {frame_width}x{frame_height}, FPS: {fps:.1f}")
         print("🔍 Looking for Indian vehicles including cars, motorcycles, auto-rickshaws, buses, and more...")
         
+        writer = out if output_path else None
+        if pipelined:
+            self._run_pipelined(cap, writer, queue_size, drop_policy)
+        else:
+            self._run_serial(cap, writer)
+        
+        # Release resources
+        cap.release()
+        if output_path:
+            out.release()
+        if self.render:  # Headless OpenCV builds have no window support at all
+            cv2.destroyAllWindows()
+        
+        # Print summary stats
+        self._print_summary_stats()
+
+    def _run_serial(self, cap, out):
+        """Read, detect, annotate and write each frame in turn on the calling thread"""
+        self.pipeline_queues = []
         while cap.isOpened():
             ret, frame = cap.read()
             if not ret:
@@ -295,32 +532,101 @@ class VideoTrafficDetector:
             # Process frame
             processed_frame, vehicle_count, has_emergency = self.detect_vehicles(frame)
             
-            # Add frame counter and stats
-            self._add_frame_info(processed_frame)
-            
-            # Add emergency alert if detected
-            if has_emergency:
-                self._add_emergency_alert(processed_frame)
-            
-            # Display processed frame
-            cv2.imshow('Indian Traffic Detection', processed_frame)
-            
-            # Write frame to output if specified
-            if output_path:
-                out.write(processed_frame)
-            
-            # Exit on 'q' key
-            if cv2.waitKey(1) & 0xFF == ord('q'):
+            if not self._show_and_write(processed_frame, has_emergency, out):
                 break
+
+    def _run_pipelined(self, cap, out, queue_size, drop_policy):
+        """
+        Run capture, inference and annotation/output as three pipelined stages
+
+        A reader thread decodes frames into a bounded queue, an inference
+        thread runs detection on whatever frame is freshest, and the calling
+        thread (which must own the display window) draws overlays, shows and
+        writes the results.
+        """
+        frame_queue = FrameQueue("capture->inference", queue_size, drop_policy)
+        result_queue = FrameQueue("inference->output", queue_size, drop_policy)
+        self.pipeline_queues = [frame_queue, result_queue]
+        stop = threading.Event()
+        errors = []  # Exceptions raised in the worker stages, re-raised on this thread
+
+        def read_frames():
+            try:
+                while not stop.is_set() and cap.isOpened():
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    frame_queue.put(frame)
+            except BaseException as e:
+                errors.append(e)
+            finally:
+                frame_queue.put(_END_OF_STREAM, force=True)
+
+        def run_inference():
+            try:
+                while not stop.is_set():
+                    frame = frame_queue.get()
+                    if frame is _END_OF_STREAM:
+                        break
+                    self.frame_count += 1
+                    processed_frame, vehicle_count, has_emergency = self.detect_vehicles(frame)
+                    result_queue.put((processed_frame, has_emergency))
+            except BaseException as e:
+                errors.append(e)
+                frame_queue.close()  # A reader blocked on a full queue must not wait forever
+            finally:
+                result_queue.put(_END_OF_STREAM, force=True)
+
+        reader = threading.Thread(target=read_frames, name="frame-reader", daemon=True)
+        inference = threading.Thread(target=run_inference, name="inference", daemon=True)
+        reader.start()
+        inference.start()
+
+        try:
+            while True:
+                item = result_queue.get()
+                if item is _END_OF_STREAM:
+                    break
+                processed_frame, has_emergency = item
+                if not self._show_and_write(processed_frame, has_emergency, out):
+                    break
+        finally:
+            # Unblock both workers whether we finished or the user quit
+            stop.set()
+            frame_queue.close()
+            result_queue.close()
+            reader.join()
+            inference.join()
+        if errors:
+            raise errors[0]
+
+    def _show_and_write(self, processed_frame, has_emergency, out):
+        """
+        Add overlays, display and optionally write a processed frame
+
+        Returns:
+            bool: False if the user asked to quit
+        """
+        # Headless: nothing to show or write
+        if processed_frame is None:
+            return True
         
-        # Release resources
-        cap.release()
-        if output_path:
-            out.release()
-        cv2.destroyAllWindows()
+        # Add frame counter and stats
+        self._add_frame_info(processed_frame)
         
-        # Print summary stats
-        self._print_summary_stats()
+        # Add emergency alert if detected
+        if has_emergency:
+            self._add_emergency_alert(processed_frame)
+        
+        # Display processed frame
+        cv2.imshow('Indian Traffic Detection', processed_frame)
+        
+        # Write frame to output if specified
+        if out is not None:
+            out.write(processed_frame)
+        
+        # Exit on 'q' key
+        return not (cv2.waitKey(1) & 0xFF == ord('q'))
 
     def _add_frame_info(self, frame):
         """Add frame counter and processing info to the frame"""
@@ -328,9 +634,7 @@ class VideoTrafficDetector:
         fps = self.frame_count / elapsed_time if elapsed_time > 0 else 0
         
         # Add a semi-transparent overlay
-        overlay = frame.copy()
-        cv2.rectangle(overlay, (0, 0), (300, 70), (0, 0, 0), -1)
-        cv2.addWeighted(overlay, 0.7, frame, 0.3, 0, frame)
+        _shade_region(frame, 0, 0, 300, 70, (0, 0, 0))
         
         info_text = f"Frame: {self.frame_count} | FPS: {fps:.1f}"
         cv2.putText(
@@ -351,9 +655,7 @@ class VideoTrafficDetector:
         # Create blinking effect with alternating background
         if int(time.time() * 2) % 2 == 0:
             # Add a semi-transparent overlay across the top
-            overlay = frame.copy()
-            cv2.rectangle(overlay, (0, 0), (w, 80), (0, 0, 255), -1)
-            cv2.addWeighted(overlay, 0.7, frame, 0.3, 0, frame)
+            _shade_region(frame, 0, 0, w, 80, (0, 0, 255))
         
         # Add text with shadow effect for better visibility
         alert_text = "EMERGENCY VEHICLE - PRIORITY GREEN LIGHT"
@@ -384,6 +686,10 @@ class VideoTrafficDetector:
         elapsed_time = time.time() - self.start_time
         print("\n📊 Processing Summary:")
         print(f"- Total frames processed: {self.frame_count}")
+        print(f"- YOLO inferences: {self.inference_count}")
+        if self.sampler is not None:
+            print(f"- Inferences saved by adaptive sampling: {self.sampler.saved_versus(self.sampler.min_interval)} "
+                  f"vs its max rate, {self.sampler.saved_versus(1)} vs every frame")
         print(f"- Total processing time: {elapsed_time:.2f} seconds")
         print(f"- Average FPS: {self.frame_count/elapsed_time:.1f}")
         
@@ -394,6 +700,17 @@ class VideoTrafficDetector:
                 print(f"- {vtype.capitalize()}: {count}")
         print(f"- Total vehicles: {self.total_count}")
         
+        # Tracking stats
+        if self.tracker is not None:
+            if self.tracker.counting_line is not None:
+                print("\n📏 Line Crossings:")
+                for (class_id, direction), count in sorted(self.tracker.line_counts.items()):
+                    print(f"- {self.vehicle_classes.get(class_id, class_id)} ({direction}): {count}")
+            dwell_times = self.tracker.dwell_times()
+            if dwell_times:
+                print(f"\n⏱️ Dwell time: mean {np.mean(dwell_times):.1f}s, max {np.max(dwell_times):.1f}s "
+                      f"over {len(dwell_times)} tracks")
+        
         # Emergency stats
         if self.emergency_detected:
             print("\n🚑 Emergency Vehicle Detected!")
@@ -402,6 +719,14 @@ class VideoTrafficDetector:
                 print(f"- Emergency duration: {duration:.2f} seconds")
         else:
             print("\n🚦 No emergency vehicles detected")
+        
+        # Pipeline queue stats
+        if self.pipeline_queues:
+            print("\n🧵 Pipeline Queues:")
+            for frame_queue in self.pipeline_queues:
+                stats = frame_queue.stats()
+                print(f"- {stats['queue']} ({stats['policy']}): {stats['put']} queued, "
+                      f"{stats['dropped']} dropped, depth mean {stats['mean_depth']:.1f} / max {stats['max_depth']}")
 
 def main():
     # Initializing detector with a slightly lower confidence threshold for Indian traffic
@@ -423,6 +748,15 @@ def main():
     # Process video
     detector.process_video(video_path)
     
+    # To run YOLO on every 3rd frame only and interpolate the tracks in between:
+    # detector = VideoTrafficDetector(confidence=0.25, detect_every=3)
+    # Or let scene motion decide (static scenes are checked twice a second, busy ones up to 5 times):
+    # detector = VideoTrafficDetector(confidence=0.25, adaptive_sampling=True)
+    
+    # For live/RTSP sources, decode on its own thread and always detect on the freshest frame
+    # (streams and cameras default to DROP_OLDEST, files to BLOCK):
+    # detector.process_video("rtsp://camera.local/stream", pipelined=True)
+    
     # To save processed video, uncomment:
     # output_path = os.path.join(data_dir, "processed_indian_traffic.mp4")
     # detector.process_video(video_path, output_path)
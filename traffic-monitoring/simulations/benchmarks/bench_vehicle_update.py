@@ -0,0 +1,160 @@
+"""
+Per-tick cost of TrafficSimulator.update_vehicles: dict-per-vehicle lists vs NumPy lane arrays
+
+Every lane is filled with a queue packed between its entry and its stop
+line (the previous version drops anything off screen, so the whole queue
+has to be visible, closer than the headway: it crawls forward as at a busy
+junction) and the same queues are moved with the previous dict-based
+update_vehicles and with the structure-of-arrays LaneVehicles. Every 50th
+vehicle is an ambulance.
+
+Usage:
+    python benchmarks/bench_vehicle_update.py [--vehicles 100 1000 10000 20000] [--ticks 30]
+"""
+import argparse
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+
+SIMULATIONS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SIMULATIONS_DIR)
+
+from traffic_simulator import TrafficSimulator
+from vehicle_state import LaneVehicles
+
+def dict_update_vehicles(self):
+    """The previous update_vehicles, one Python dict and pygame.Rect per vehicle"""
+    for lane_id, lane in self.lanes.items():
+        for i, vehicle in enumerate(lane['vehicles']):
+            # Skip if this vehicle is being processed for removal
+            if vehicle.get('remove', False):
+                continue
+
+            # Check if vehicle should stop at red light
+            should_stop = False
+            stop_line = self.stop_lines[lane_id]
+
+            if lane['signal'] == 'red' and not vehicle['entered_intersection']:
+                if lane['direction'] == 'down' and vehicle['rect'].bottom >= stop_line.top:
+                    should_stop = True
+                elif lane['direction'] == 'up' and vehicle['rect'].top <= stop_line.bottom:
+                    should_stop = True
+                elif lane['direction'] == 'left' and vehicle['rect'].left <= stop_line.right:
+                    should_stop = True
+                elif lane['direction'] == 'right' and vehicle['rect'].right >= stop_line.left:
+                    should_stop = True
+
+            # Check for vehicle ahead
+            if i > 0 and not should_stop:
+                vehicle_ahead = lane['vehicles'][i-1]
+                min_distance = 30 if vehicle['is_emergency'] else 20
+
+                if lane['direction'] == 'down':
+                    if vehicle_ahead['rect'].bottom - vehicle['rect'].bottom < min_distance:
+                        should_stop = True
+                elif lane['direction'] == 'up':
+                    if vehicle['rect'].top - vehicle_ahead['rect'].top < min_distance:
+                        should_stop = True
+                elif lane['direction'] == 'left':
+                    if vehicle['rect'].left - vehicle_ahead['rect'].left < min_distance:
+                        should_stop = True
+                elif lane['direction'] == 'right':
+                    if vehicle_ahead['rect'].right - vehicle['rect'].right < min_distance:
+                        should_stop = True
+
+            # Update position if not stopped
+            if not should_stop:
+                step = vehicle['speed'] * self.speed_scale
+                if lane['direction'] == 'down':
+                    vehicle['rect'].y += step
+                elif lane['direction'] == 'up':
+                    vehicle['rect'].y -= step
+                elif lane['direction'] == 'left':
+                    vehicle['rect'].x -= step
+                elif lane['direction'] == 'right':
+                    vehicle['rect'].x += step
+
+                # Mark as entered intersection
+                if not vehicle['entered_intersection'] and self.intersection_rect.colliderect(vehicle['rect']):
+                    vehicle['entered_intersection'] = True
+                    if vehicle['is_emergency']:
+                        self.performance_data['emergency_clearance'].append(self.sim_time - vehicle['spawn_time'])
+            else:
+                vehicle['wait_time'] += self.dt
+
+            # Check if vehicle exited screen
+            if (vehicle['rect'].top > self.HEIGHT + 50 or
+                vehicle['rect'].bottom < -50 or
+                vehicle['rect'].left > self.WIDTH + 50 or
+                vehicle['rect'].right < -50):
+                vehicle['remove'] = True
+                self.performance_data['vehicles_exited'] += 1
+                self.performance_data['exited_wait_time'] += vehicle['wait_time']
+
+        # Remove vehicles marked for deletion
+        lane['vehicles'] = [v for v in lane['vehicles'] if not v.get('remove', False)]
+
+
+def fill_lanes(sim, total):
+    """Queue total vehicles over the lanes, from the stop line back to the entry; lanes 1 and 3 are red"""
+    per_lane = total // len(sim.lanes)
+    for lane_id, lane in sim.lanes.items():
+        lane['signal'] = 'red' if lane_id % 2 else 'green'
+        vehicles = LaneVehicles(lane['direction'], lane['rect'], sim.stop_lines[lane_id],
+                                sim.intersection_rect, sim.WIDTH, sim.HEIGHT)
+        for i in range(per_lane):
+            is_emergency = i % 50 == 49
+            width, height = sim.vehicle_sizes['ambulance' if is_emergency else 'car']
+            vehicles.append(2.0 + (i % 4) * 0.5, height, width, is_emergency, 0.0)
+        vehicles.front[:] = np.linspace(vehicles.stop_position, vehicles.spawn_position + 40, per_lane)
+        lane['vehicles'] = vehicles
+
+
+def dict_lanes(sim):
+    """The same queues as lists of vehicle dicts"""
+    lanes = {}
+    for lane_id, lane in sim.lanes.items():
+        state = lane['vehicles']
+        vehicles = []
+        for (rect, is_emergency), speed in zip(state.rects(), state.speed.tolist()):
+            vehicles.append({'rect': rect, 'speed': speed, 'is_emergency': is_emergency,
+                             'wait_time': 0, 'entered_intersection': False, 'spawn_time': 0.0})
+        lanes[lane_id] = dict(lane, vehicles=vehicles)
+    return lanes
+
+
+def time_ticks(update, ticks):
+    start = time.perf_counter()
+    for _ in range(ticks):
+        update()
+    return (time.perf_counter() - start) / ticks * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vehicles", type=int, nargs='+', default=[100, 1000, 10000, 20000])
+    parser.add_argument("--ticks", type=int, default=30)
+    args = parser.parse_args()
+
+    print(f"{'vehicles':>9} {'dict ms/tick':>13} {'numpy ms/tick':>14} {'speedup':>8}")
+    for total in args.vehicles:
+        sim = TrafficSimulator(headless=True, seed=0, log_path=None)
+        fill_lanes(sim, total)
+        legacy = SimpleNamespace(
+            lanes=dict_lanes(sim), stop_lines=sim.stop_lines, intersection_rect=sim.intersection_rect,
+            WIDTH=sim.WIDTH, HEIGHT=sim.HEIGHT, speed_scale=sim.speed_scale, dt=sim.dt, sim_time=0.0,
+            performance_data={'emergency_clearance': [], 'vehicles_exited': 0, 'exited_wait_time': 0.0})
+
+        dict_ms = time_ticks(lambda: dict_update_vehicles(legacy), args.ticks)
+        numpy_ms = time_ticks(sim.update_vehicles, args.ticks)
+        sim.close()
+        print(f"{total:>9} {dict_ms:>13.3f} {numpy_ms:>14.3f} {dict_ms / numpy_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
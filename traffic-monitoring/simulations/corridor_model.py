@@ -0,0 +1,304 @@
+"""
+Cell-transmission model of a signalised corridor and an ambulance driving along it
+
+The corridor is cut into cells of equal length holding a traffic density;
+every tick the flow between neighbouring cells is the smaller of what the
+upstream cell can send and what the downstream cell can take (triangular
+fundamental diagram), and zero across a signal that is red. Signals run a
+fixed cycle with a green-wave offset each. Several runs are simulated side
+by side as rows of the same arrays, each with its own ambulance dispatch
+time, so one call gives a distribution of clearance times over the cycle.
+
+The ambulance drives at AMBULANCE_MAX_SPEED slowed down in proportion to
+the traffic speed of its cell (but at least AMBULANCE_MIN_SPEED, as
+traffic makes way), stops at red lights for up to
+RED_CROSSING_DELAY seconds before crossing carefully. Pre-emption either
+holds every signal within preempt_distance ahead green, or hands the
+signals to a PreemptionPlanner, which switches each one at the latest time
+its queue can still clear before the ambulance arrives.
+
+Usage:
+    python corridor_model.py [--signals 200] [--spacing 400] [--inflow 1400]
+                             [--offsets wave|zero|random] [--runs 16]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from preemption_planner import PreemptionPlanner
+
+AMBULANCE_MIN_SPEED = 3.0   # m/s through queued traffic
+AMBULANCE_MAX_SPEED = 20.0  # m/s on an empty road
+RED_CROSSING_DELAY = 6.0    # Seconds an ambulance waits at a red light before crossing it
+
+
+class CorridorModel:
+    """
+    Vectorized cell-transmission corridor, runs x cells
+
+    Densities and flows are per corridor (all lanes together): vehicles per
+    metre and vehicles per second. The tick is cell_length / free_speed,
+    the longest step for which the model is stable.
+    """
+
+    def __init__(self, n_signals=20, spacing=400.0, cell_length=50.0, lanes=2,
+                 free_speed=13.9, wave_speed=5.0, jam_density=0.13, lane_capacity=0.5,
+                 cycle=90.0, green_split=0.5, offsets='wave', inflow=0.3, runs=1, seed=None):
+        """
+        Args:
+            n_signals: Signals along the corridor, one every spacing metres
+            spacing: Metres between signals (the corridor ends one spacing after the last)
+            cell_length: Metres per cell
+            lanes: Lanes in the direction of travel
+            free_speed: Traffic speed on an empty road (m/s)
+            wave_speed: Speed at which congestion moves back (m/s)
+            jam_density: Vehicles per metre per lane in a stopped queue
+            lane_capacity: Vehicles per second per lane at the best density
+            cycle: Signal cycle (s)
+            green_split: Fraction of the cycle the corridor has green
+            offsets: 'wave' (green starts as traffic at free_speed arrives),
+                'zero', 'random', or an array of seconds per signal
+            inflow: Vehicles per second entering the corridor
+            runs: Corridors simulated side by side
+            seed: Seed for random offsets
+        """
+        self.dx = float(cell_length)
+        self.dt = self.dx / free_speed
+        self.free_speed = free_speed
+        self.wave_speed = wave_speed
+        self.jam_density = jam_density * lanes
+        self.capacity = lane_capacity * lanes
+        self.inflow = inflow
+        self.cycle = cycle
+        self.green_time = green_split * cycle
+        self.runs = runs
+
+        self.signal_positions = spacing * np.arange(1, n_signals + 1)
+        self.length = spacing * (n_signals + 1)
+        n_cells = int(round(self.length / self.dx))
+        self.density = np.zeros((runs, n_cells))
+        # Flow boundary of each signal: index into the runs x (cells + 1) flow array
+        self.signal_boundaries = np.round(self.signal_positions / self.dx).astype(int)
+
+        if isinstance(offsets, str):
+            if offsets == 'wave':
+                offsets = self.signal_positions / free_speed
+            elif offsets == 'zero':
+                offsets = np.zeros(n_signals)
+            elif offsets == 'random':
+                offsets = np.random.default_rng(seed).uniform(0, cycle, n_signals)
+            else:
+                raise ValueError(f"Unknown offsets: {offsets}")
+        self.offsets = np.asarray(offsets, dtype=float) % cycle
+
+        self.time = 0.0
+        self.ticks = 0
+        self.preempt_distance = 0.0
+        self.planner = None
+        # Ambulance of each run
+        self.dispatch_time = np.full(runs, np.inf)
+        self.position = np.zeros(runs)
+        self.red_wait = np.zeros(runs)     # Seconds waited at the current red light
+        self.arrival_time = np.full(runs, np.nan)
+        self.red_stops = np.zeros(runs, dtype=int)
+        self.cross_hold = np.zeros(runs)   # Seconds of cross-street green taken by pre-emption
+        self._held = np.zeros((runs, n_signals), dtype=bool)
+        self._flow = np.zeros((runs, n_cells + 1))
+
+    def dispatch(self, times, preempt_distance=0.0, planner=None):
+        """
+        Send an ambulance down every run's corridor
+
+        Args:
+            times: Dispatch time of each run (scalar or one per run)
+            preempt_distance: Metres ahead of the ambulance in which signals
+                are held green (0: no pre-emption)
+            planner: PreemptionPlanner deciding when each signal ahead turns
+                green instead (overrides preempt_distance)
+        """
+        self.dispatch_time[:] = times
+        self.preempt_distance = preempt_distance
+        self.planner = planner
+        self._held[:] = False
+        self.cross_hold[:] = 0.0
+        self.position[:] = 0.0
+        self.red_wait[:] = 0.0
+        self.arrival_time[:] = np.nan
+        self.red_stops[:] = 0
+
+    def active(self):
+        """Runs whose ambulance is on the corridor"""
+        return (self.time >= self.dispatch_time) & np.isnan(self.arrival_time)
+
+    def signal_green(self):
+        """Mask of the signals showing green on their normal plan"""
+        return ((self.time - self.offsets) % self.cycle) < self.green_time
+
+    def queue_lengths(self):
+        """runs x signals vehicles queued (in congested cells) on the approach to every signal"""
+        critical = self.capacity / self.free_speed
+        queued = np.where(self.density > critical, self.density, 0.0) * self.dx
+        starts = np.concatenate(([0], self.signal_boundaries[:-1]))
+        return np.add.reduceat(queued[:, :self.signal_boundaries[-1]], starts, axis=1)
+
+    def preemption_hold(self, active):
+        """runs x signals mask of the signals held green for an ambulance, or None"""
+        ahead = self.signal_positions >= self.position[:, None]
+        if self.planner is not None:
+            plan = self.planner.plan(self.time, self.position, AMBULANCE_MAX_SPEED,
+                                     self.signal_positions, self.queue_lengths())
+            # Once switched, a signal stays green until the ambulance is through
+            self._held = (self._held | plan.holding(self.time)) & ahead & active[:, None]
+            return self._held
+        if self.preempt_distance > 0:
+            within = self.signal_positions - self.position[:, None] <= self.preempt_distance
+            return ahead & within & active[:, None]
+        return None
+
+    def traffic_speed(self, density):
+        """Speed of traffic at the given densities (m/s)"""
+        speed = np.full(density.shape, self.free_speed)
+        queued = density > 1e-9
+        speed[queued] = np.minimum(self.free_speed,
+                                   self.wave_speed * (self.jam_density / density[queued] - 1))
+        return np.maximum(speed, 0.0)
+
+    def step(self):
+        """Advance traffic and ambulances by one tick"""
+        density = self.density
+        active = self.active()
+        green = np.broadcast_to(self.signal_green(), (self.runs, len(self.offsets)))
+        hold = self.preemption_hold(active) if active.any() else None
+        if hold is not None:
+            self.cross_hold += (hold & ~green).sum(axis=1) * self.dt
+            green = green | hold
+
+        send = np.minimum(self.free_speed * density, self.capacity)
+        receive = np.minimum(self.capacity, self.wave_speed * (self.jam_density - density))
+        flow = self._flow
+        flow[:, 0] = np.minimum(self.inflow, receive[:, 0])
+        np.minimum(send[:, :-1], receive[:, 1:], out=flow[:, 1:-1])
+        flow[:, -1] = send[:, -1]
+        flow[:, self.signal_boundaries] *= green
+        density += (self.dt / self.dx) * (flow[:, :-1] - flow[:, 1:])
+
+        if active.any():
+            self._move_ambulances(active, green)
+        self.ticks += 1
+        self.time = self.ticks * self.dt
+
+    def _move_ambulances(self, active, green):
+        runs = np.flatnonzero(active)
+        position = self.position[runs]
+        cells = np.minimum((position / self.dx).astype(int), self.density.shape[1] - 1)
+        speed = AMBULANCE_MAX_SPEED / self.free_speed * self.traffic_speed(self.density[runs, cells])
+        speed = np.maximum(speed, AMBULANCE_MIN_SPEED)
+        target = position + speed * self.dt
+
+        # Next signal of each ambulance and whether it would pass it on red this tick
+        next_signal = np.searchsorted(self.signal_positions, position, side='right')
+        has_signal = next_signal < len(self.signal_positions)
+        index = np.minimum(next_signal, len(self.signal_positions) - 1)
+        signal_position = self.signal_positions[index]
+        red = has_signal & ~green[runs, index] & (target >= signal_position)
+        held = red & (self.red_wait[runs] < RED_CROSSING_DELAY)
+
+        self.red_stops[runs[held & (self.red_wait[runs] == 0)]] += 1
+        self.red_wait[runs[held]] += self.dt
+        self.red_wait[runs[~held]] = 0.0
+        position = np.where(held, signal_position - 1e-6, target)
+        self.position[runs] = position
+
+        arrived = position >= self.length
+        self.arrival_time[runs[arrived]] = self.time + self.dt
+
+    def run(self, until):
+        """Step until simulated time until, or until every dispatched ambulance has arrived"""
+        while self.time < until:
+            self.step()
+            if np.isfinite(self.dispatch_time).all() and not np.isnan(self.arrival_time).any():
+                break
+
+    def clearance_times(self):
+        """Seconds from dispatch to the end of the corridor of each run (NaN if not arrived)"""
+        return self.arrival_time - self.dispatch_time
+
+
+def estimate_clearance(params, runs=16, warmup=None, preempt_distance=600.0, limit=None):
+    """
+    Clearance times with and without pre-emption on identical traffic
+
+    Ambulances are dispatched after warmup seconds (default: the longer of
+    two cycles and the time traffic takes to fill the corridor), spread
+    evenly over one signal cycle. Modes: no pre-emption, every signal within
+    preempt_distance held green, and the ETA planner.
+
+    Returns:
+        Dictionary of mode -> dictionary of clearance (s per run), red_stops
+        and cross_hold (s per run), sim_seconds and wall_seconds
+    """
+    results = {}
+    for mode in ('no pre-emption', 'distance', 'eta planner'):
+        model = CorridorModel(runs=runs, **params)
+        if warmup is None:
+            warmup = max(2 * model.cycle, model.length / model.free_speed)
+        dispatch_times = warmup + model.cycle * np.arange(runs) / runs
+        if mode == 'distance':
+            model.dispatch(dispatch_times, preempt_distance)
+        elif mode == 'eta planner':
+            # One tick of margin: the ambulance may cross at any point within a tick
+            planner = PreemptionPlanner(saturation_headway=1 / model.capacity, margin=model.dt)
+            model.dispatch(dispatch_times, planner=planner)
+        else:
+            model.dispatch(dispatch_times)
+        if limit is None:
+            limit = warmup + model.cycle + 20 * model.length / AMBULANCE_MIN_SPEED
+        start = time.perf_counter()
+        model.run(limit)
+        results[mode] = {
+            'clearance': model.clearance_times(),
+            'red_stops': model.red_stops.copy(),
+            'cross_hold': model.cross_hold.copy(),
+            'sim_seconds': model.time,
+            'wall_seconds': time.perf_counter() - start,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--signals", type=int, default=200)
+    parser.add_argument("--spacing", type=float, default=400.0, help="Metres between signals")
+    parser.add_argument("--lanes", type=int, default=2)
+    parser.add_argument("--inflow", type=float, default=1400.0, help="Vehicles per hour entering the corridor")
+    parser.add_argument("--cycle", type=float, default=90.0)
+    parser.add_argument("--green-split", type=float, default=0.5)
+    parser.add_argument("--offsets", default='wave', choices=['wave', 'zero', 'random'])
+    parser.add_argument("--preempt-distance", type=float, default=600.0, help="Metres")
+    parser.add_argument("--runs", type=int, default=16, help="Dispatch times spread over one cycle")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    params = dict(n_signals=args.signals, spacing=args.spacing, lanes=args.lanes, inflow=args.inflow / 3600,
+                  cycle=args.cycle, green_split=args.green_split, offsets=args.offsets, seed=args.seed)
+    results = estimate_clearance(params, runs=args.runs, preempt_distance=args.preempt_distance)
+
+    length_km = args.spacing * (args.signals + 1) / 1000
+    print(f"{args.signals} signals over {length_km:.1f} km, {args.inflow:.0f} veh/h, "
+          f"{args.offsets} offsets, {args.runs} runs\n")
+    print(f"{'mode':<16} {'mean s':>8} {'p50 s':>8} {'p95 s':>8} {'max s':>8} {'red stops':>10} "
+          f"{'cross hold s':>13} {'x real time':>12}")
+    for mode, result in results.items():
+        clearance = result['clearance']
+        done = clearance[~np.isnan(clearance)]
+        if not len(done):
+            print(f"{mode:<16} no ambulance reached the end")
+            continue
+        print(f"{mode:<16} {done.mean():>8.0f} {np.percentile(done, 50):>8.0f} {np.percentile(done, 95):>8.0f} "
+              f"{done.max():>8.0f} {result['red_stops'].mean():>10.1f} {result['cross_hold'].mean():>13.0f} "
+              f"{result['sim_seconds'] / result['wall_seconds']:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
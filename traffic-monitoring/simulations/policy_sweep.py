@@ -0,0 +1,143 @@
+"""
+Signal timing policy sweep over many headless TrafficSimulator runs
+
+Every combination of the timing parameters (green time = BASE_TIME +
+TIME_PER_VEHICLE * queued vehicles, clamped to MIN/MAX) and arrival rates
+is simulated for several seeds in a process pool, and the runs are averaged
+into one table per arrival rate, best average wait first. Arrival rates
+are offered rates: a vehicle is not spawned while its lane entry is blocked,
+so compare policies on the spawned column as well as on the wait.
+
+The default grid contains both formulas in use today: the simulator's
+10 + 3n and the detection backend's 15 + 0.5n (LaneData.calculate_green_time).
+
+Usage:
+    python policy_sweep.py [--base-time 10 15] [--time-per-vehicle 0.5 1 3]
+                           [--arrival-rate 1500 3000] [--seeds 3] [--duration 3600]
+                           [--workers 4] [--output sweep.csv]
+"""
+import argparse
+import csv
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from traffic_simulator import TrafficSimulator
+
+POLICY_FIELDS = ['BASE_TIME', 'TIME_PER_VEHICLE', 'MIN_GREEN_TIME', 'MAX_GREEN_TIME']
+RESULT_FIELDS = ['avg_wait_time', 'throughput_per_hour', 'avg_emergency_clearance', 'total_vehicles']
+
+
+def simulate(policy, arrival_rate, seed, duration, dt=1/30):
+    """
+    One headless run (executed in a worker process)
+
+    Args:
+        policy: Dictionary of POLICY_FIELDS values
+        arrival_rate: Offered vehicles per hour over all lanes
+        seed: Seed of the run
+        duration: Simulated seconds
+
+    Returns:
+        The simulator's summary()
+    """
+    params = dict(policy, SPAWN_INTERVAL=3600.0 / arrival_rate)
+    simulator = TrafficSimulator(headless=True, dt=dt, seed=seed, log_path=None, params=params)
+    try:
+        return simulator.run_headless(duration)
+    finally:
+        simulator.close()
+
+
+def policy_grid(base_times, times_per_vehicle, min_greens, max_greens):
+    """All combinations of the timing parameters (those with MIN > MAX are skipped)"""
+    policies = []
+    for values in itertools.product(base_times, times_per_vehicle, min_greens, max_greens):
+        policy = dict(zip(POLICY_FIELDS, values))
+        if policy['MIN_GREEN_TIME'] <= policy['MAX_GREEN_TIME']:
+            policies.append(policy)
+    return policies
+
+
+def run_sweep(policies, arrival_rates, seeds, duration, workers=None):
+    """
+    Simulate every policy at every arrival rate for every seed
+
+    Every (policy, rate) pair uses the same seeds, so policies are compared
+    on the same random traffic.
+
+    Returns:
+        List of result rows: the policy, arrival_rate, runs and the mean of
+        every RESULT_FIELDS value over the seeds
+    """
+    jobs = list(itertools.product(range(len(policies)), arrival_rates, seeds))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        summaries = executor.map(simulate, [policies[i] for i, _, _ in jobs], [rate for _, rate, _ in jobs],
+                                 [seed for _, _, seed in jobs], [duration] * len(jobs),
+                                 chunksize=max(1, len(jobs) // (4 * (workers or os.cpu_count() or 1))))
+        runs = {}  # (policy index, rate) -> summaries
+        for (index, rate, _), summary in zip(jobs, summaries):
+            runs.setdefault((index, rate), []).append(summary)
+
+    rows = []
+    for (index, rate), summaries in runs.items():
+        row = dict(policies[index], arrival_rate=rate, runs=len(summaries))
+        for field in RESULT_FIELDS:
+            row[field] = sum(summary[field] for summary in summaries) / len(summaries)
+        rows.append(row)
+    rows.sort(key=lambda row: (row['arrival_rate'], row['avg_wait_time']))
+    return rows
+
+
+def print_table(rows):
+    header = (f"{'arrivals/h':>10} {'base':>5} {'per veh':>7} {'min':>4} {'max':>4} {'runs':>4} "
+              f"{'avg wait s':>10} {'thru/h':>7} {'clear s':>7} {'spawned':>7}")
+    print(header)
+    print('-' * len(header))
+    for row in rows:
+        print(f"{row['arrival_rate']:>10g} {row['BASE_TIME']:>5g} {row['TIME_PER_VEHICLE']:>7g} "
+              f"{row['MIN_GREEN_TIME']:>4g} {row['MAX_GREEN_TIME']:>4g} {row['runs']:>4} "
+              f"{row['avg_wait_time']:>10.1f} {row['throughput_per_hour']:>7.0f} "
+              f"{row['avg_emergency_clearance']:>7.1f} {row['total_vehicles']:>7.0f}")
+
+
+def write_csv(rows, path):
+    fields = ['arrival_rate'] + POLICY_FIELDS + ['runs'] + RESULT_FIELDS
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-time", type=float, nargs='+', default=[10, 15])
+    parser.add_argument("--time-per-vehicle", type=float, nargs='+', default=[0.5, 1, 3])
+    parser.add_argument("--min-green", type=float, nargs='+', default=[10])
+    parser.add_argument("--max-green", type=float, nargs='+', default=[60])
+    parser.add_argument("--arrival-rate", type=float, nargs='+', default=[1500, 3000],
+                        help="Offered vehicles per hour over all lanes")
+    parser.add_argument("--seeds", type=int, default=3, help="Runs per policy and arrival rate")
+    parser.add_argument("--duration", type=float, default=3600, help="Simulated seconds per run")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--output", default=None, help="Also write the table to this CSV file")
+    args = parser.parse_args()
+
+    policies = policy_grid(args.base_time, args.time_per_vehicle, args.min_green, args.max_green)
+    total_runs = len(policies) * len(args.arrival_rate) * args.seeds
+    print(f"Simulating {len(policies)} policies x {len(args.arrival_rate)} arrival rates x "
+          f"{args.seeds} seeds = {total_runs} runs of {args.duration:.0f}s")
+
+    start = time.perf_counter()
+    rows = run_sweep(policies, args.arrival_rate, range(args.seeds), args.duration, args.workers)
+    print(f"Done in {time.perf_counter() - start:.1f}s\n")
+
+    print_table(rows)
+    if args.output:
+        write_csv(rows, args.output)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,12 @@ import pygame
 import math
 import random
 from collections import deque
+from preemption_planner import PreemptionPlanner
 
 class AmbulanceCorridorSim:
+    FPS = 30
+    REPLAN_INTERVAL = 0.5  # Seconds between pre-emption plans
+    
     def __init__(self):
         pygame.init()
         self.width, self.height = 1200, 600
@@ -14,13 +18,22 @@ class AmbulanceCorridorSim:
         self.hospital = pygame.Rect(1000, 250, 100, 100)
         self.ambulance = {"pos": [100, 300], "speed": 5, "active": False}
         
-        # Traffic lights (x_pos, green_time, original_time)
+        # Traffic lights (x_pos, green_time, original_time, held green for the ambulance)
         self.lights = [
             {"rect": pygame.Rect(300, 250, 30, 100), "green": 60, "original": 60},
             {"rect": pygame.Rect(500, 250, 30, 100), "green": 45, "original": 45}, 
             {"rect": pygame.Rect(700, 250, 30, 100), "green": 30, "original": 30},
             {"rect": pygame.Rect(900, 250, 30, 100), "green": 15, "original": 15}
         ]
+        for light in self.lights:
+            light.update(held=False, label=f"{light['original']}s", last_discharge=0.0, held_time=0.0)
+        
+        # Pre-emption on ambulance ETA (headways scaled to this compressed corridor)
+        self.planner = PreemptionPlanner(saturation_headway=0.3, lost_time=0.3, margin=0.2, passage_time=0.2)
+        self.plan = None
+        self.last_plan_time = -self.REPLAN_INTERVAL
+        self.time = 0.0
+        self.dispatch_time = 0.0
         
         # Traffic queue at each light
         self.queues = [deque(maxlen=8) for _ in range(4)]
@@ -36,20 +49,34 @@ class AmbulanceCorridorSim:
                 self.queues[i].append(1)
     
     def update_ambulance(self):
-        """Move ambulance and trigger light adjustments"""
-        if self.ambulance["active"]:
-            self.ambulance["pos"][0] += self.ambulance["speed"]
-            
-            # Dynamic light adjustment based on distance
-            for i, light in enumerate(self.lights):
-                dist = light["rect"].x - self.ambulance["pos"][0]
-                if 0 < dist < 400:  # Within 400px
-                    # Progressive time reduction formula
-                    light["green"] = max(10, light["original"] * (1 - (i+1)*0.25))
-                    
-                    # Clear traffic queue
-                    if random.random() < 0.3:
-                        self.queues[i].pop() if self.queues[i] else None
+        """Move ambulance and pre-empt the lights ahead of it at their latest safe switch time"""
+        if not self.ambulance["active"]:
+            return
+        self.ambulance["pos"][0] += self.ambulance["speed"]
+        front = self.ambulance["pos"][0] + 50
+        
+        # Re-plan all lights at once from the ETA and the current queues
+        if self.time - self.last_plan_time >= self.REPLAN_INTERVAL:
+            self.plan = self.planner.plan(
+                self.time, front, self.ambulance["speed"] * self.FPS,
+                [light["rect"].x for light in self.lights], [len(queue) for queue in self.queues])
+            self.last_plan_time = self.time
+        holding = self.plan.holding(self.time)
+        
+        for i, light in enumerate(self.lights):
+            # Once switched, hold green until the ambulance is through
+            light["held"] = (light["held"] or bool(holding[i])) and self.ambulance["pos"][0] <= light["rect"].right
+            if light["held"]:
+                light["held_time"] += 1 / self.FPS
+                light["label"] = "HOLD"
+                # Queued vehicles leave one per saturation headway
+                if self.queues[i] and self.time - light["last_discharge"] >= self.planner.saturation_headway:
+                    self.queues[i].popleft()
+                    light["last_discharge"] = self.time
+            elif light["rect"].x >= front:
+                light["label"] = f"in {self.plan.switch_time[i] - self.time:.1f}s"
+            else:
+                light["label"] = f"{light['original']}s"
     
     def draw(self):
         """Render simulation"""
@@ -75,9 +102,8 @@ class AmbulanceCorridorSim:
             # Light pole
             pygame.draw.rect(self.screen, (0, 0, 0), light["rect"])
             
-            # Signal (green if ambulance is approaching)
-            color = (0, 255, 0) if (self.ambulance["active"] and 
-                                   light["rect"].x > self.ambulance["pos"][0]) else (255, 0, 0)
+            # Signal (green while held for the ambulance)
+            color = (0, 255, 0) if light["held"] else (255, 0, 0)
             pygame.draw.circle(self.screen, color, 
                              (light["rect"].x+15, light["rect"].y+30), 10)
             
@@ -87,7 +113,7 @@ class AmbulanceCorridorSim:
                                (light["rect"].x-50-j*20, 300, 15, 25))
             
             # Display adjusted timing
-            text = self.font.render(f"{light['green']}s", True, (0, 0, 0))
+            text = self.font.render(light["label"], True, (0, 0, 0))
             self.screen.blit(text, (light["rect"].x-20, light["rect"].y-30))
         
         # Legend
@@ -95,7 +121,7 @@ class AmbulanceCorridorSim:
             "Red/Green: Traffic Signals",
             "Blue Boxes: Waiting Vehicles",
             "Red Box: Ambulance (SPACE to activate)",
-            "Progressive Time Reduction: 60s → 45s → 30s → 15s"
+            "Lights switch at ETA minus queue discharge time"
         ]
         for i, text in enumerate(legend):
             surf = self.font.render(text, True, (0, 0, 0))
@@ -113,17 +139,22 @@ class AmbulanceCorridorSim:
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_SPACE and not self.ambulance["active"]:
                         self.ambulance["active"] = True
+                        self.dispatch_time = self.time
+                        self.last_plan_time = -self.REPLAN_INTERVAL
             
             self.spawn_vehicles()
             self.update_ambulance()
             self.draw()
-            self.clock.tick(30)
+            self.clock.tick(self.FPS)
+            self.time += 1 / self.FPS
             
             # Reset after ambulance reaches hospital
             if self.ambulance["pos"][0] > self.width:
+                held = ", ".join(f"{light['held_time']:.1f}s" for light in self.lights)
+                print(f"Ambulance through in {self.time - self.dispatch_time:.1f}s, lights held green: {held}")
                 self.ambulance = {"pos": [100, 300], "speed": 5, "active": False}
                 for light in self.lights:
-                    light["green"] = light["original"]
+                    light.update(held=False, label=f"{light['original']}s", held_time=0.0)
         
         pygame.quit()
 
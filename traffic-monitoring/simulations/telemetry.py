@@ -0,0 +1,225 @@
+"""
+Batched, columnar telemetry files
+
+TelemetryWriter collects rows of fixed-type columns in preallocated NumPy
+arrays and hands every full chunk to a background thread, which appends it
+to a Parquet file (one row group per chunk) or, when pyarrow is not
+installed, writes it as a numbered .npz file next to the requested path.
+read_telemetry() loads either back as NumPy columns.
+
+Usage (convert a log to CSV):
+    python telemetry.py traffic_data.parquet --csv traffic_data.csv
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import queue
+import threading
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Chunks are written as .npz files when pyarrow is not installed
+    pa = pq = None
+
+
+def npz_root(path):
+    """Common prefix of the .npz chunk files written for path"""
+    root, ext = os.path.splitext(path)
+    return root if ext in ('.parquet', '.npz') else path
+
+
+def npz_chunk_files(path):
+    """The .npz chunk files written for path, in order"""
+    return sorted(glob.glob(glob.escape(npz_root(path)) + '.[0-9][0-9][0-9][0-9][0-9].npz'))
+
+
+class TelemetryWriter:
+    """
+    Append-only log of rows, written in chunks off the calling thread
+
+    Rows go into one of a few preallocated chunk buffers; when a buffer is
+    full it is queued for the writer thread and the next free one is used.
+    If the disk falls behind, append_rows() blocks until a buffer is free
+    instead of growing memory.
+
+    Example:
+        writer = TelemetryWriter('run.parquet', {'time': np.float64, 'lane': np.int8})
+        if writer.sample():
+            writer.append_rows(4, time=12.5, lane=[1, 2, 3, 4])
+        writer.close()
+    """
+
+    def __init__(self, path, columns, chunk_rows=8192, sample_every=1, metadata=None, buffers=3):
+        """
+        Args:
+            path: Output file; .parquet with pyarrow, otherwise <path without
+                extension>.00000.npz, .00001.npz, ... An existing log at
+                path (file or chunks) is replaced
+            columns: Dictionary of column name -> NumPy dtype
+            chunk_rows: Rows per chunk (Parquet row group / .npz file)
+            sample_every: sample() is True once every this many calls
+            metadata: Dictionary of strings stored with the data
+            buffers: Chunk buffers in rotation (filling + queued + being written)
+        """
+        self.path = path
+        self.format = 'parquet' if pq is not None else 'npz'
+        self.columns = dict(columns)
+        self.chunk_rows = chunk_rows
+        self.sample_every = max(1, sample_every)
+        self.metadata = dict(metadata or {})
+        self.rows_written = 0
+        self.chunks_written = 0
+        self._calls = 0
+        self._error = None
+
+        # A new run replaces the old log; stale chunks would otherwise be read back with it
+        for old in npz_chunk_files(path) + ([path] if os.path.isfile(path) else []):
+            os.remove(old)
+
+        self._free = queue.Queue()
+        for _ in range(max(2, buffers) - 1):
+            self._free.put(self._new_buffer())
+        self._buffer = self._new_buffer()
+        self._count = 0
+        self._full = queue.Queue()  # (buffer, rows) chunks for the writer thread, None to stop
+        self._parquet = None
+        self._thread = threading.Thread(target=self._writer_main, name="telemetry-writer", daemon=True)
+        self._thread.start()
+
+    def _new_buffer(self):
+        return {name: np.zeros(self.chunk_rows, dtype=dtype) for name, dtype in self.columns.items()}
+
+    def sample(self):
+        """Whether the current call should be logged (every sample_every-th call is)"""
+        due = self._calls % self.sample_every == 0
+        self._calls += 1
+        return due
+
+    def append_rows(self, n, **values):
+        """
+        Add n rows
+
+        Args:
+            n: Number of rows (at most chunk_rows)
+            values: One value per column, a scalar (repeated) or a sequence of n
+        """
+        if self._error is not None:
+            raise self._error
+        if self._count + n > self.chunk_rows:
+            self._submit()
+        buffer, start = self._buffer, self._count
+        for name, column in buffer.items():
+            column[start:start + n] = values[name]
+        self._count += n
+        if self._count == self.chunk_rows:
+            self._submit()
+
+    def flush(self):
+        """Queue the rows collected so far (they are written asynchronously)"""
+        if self._count:
+            self._submit()
+
+    def _submit(self):
+        self._full.put((self._buffer, self._count))
+        self._buffer = self._free.get()  # Blocks while every spare buffer is queued
+        self._count = 0
+
+    def close(self):
+        """Write the remaining rows and wait for the writer thread"""
+        if self._thread is None:
+            return
+        self.flush()
+        self._full.put(None)
+        self._thread.join()
+        self._thread = None
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _writer_main(self):
+        try:
+            while True:
+                item = self._full.get()
+                if item is None:
+                    break
+                buffer, rows = item
+                if self._error is None:
+                    try:
+                        self._write_chunk({name: column[:rows] for name, column in buffer.items()})
+                        self.rows_written += rows
+                        self.chunks_written += 1
+                    except Exception as e:
+                        print(f"Error writing telemetry to {self.path}: {e}")
+                        self._error = e
+                self._free.put(buffer)
+        finally:
+            if self._parquet is not None:
+                self._parquet.close()
+
+    def _write_chunk(self, chunk):
+        if self.format == 'parquet':
+            table = pa.table(chunk)
+            if self._parquet is None:
+                schema = table.schema.with_metadata({k: str(v) for k, v in self.metadata.items()})
+                self._parquet = pq.ParquetWriter(self.path, schema)
+            self._parquet.write_table(table.replace_schema_metadata(self._parquet.schema.metadata))
+        else:
+            np.savez(f"{npz_root(self.path)}.{self.chunks_written:05d}.npz",
+                     __metadata__=json.dumps(self.metadata), **chunk)
+
+
+def read_telemetry(path):
+    """
+    Load a log written by TelemetryWriter
+
+    Returns:
+        (columns, metadata): dictionary of column name -> NumPy array, and the
+        metadata strings
+    """
+    if pq is not None and os.path.exists(path):
+        table = pq.read_table(path)
+        metadata = {k.decode(): v.decode() for k, v in (table.schema.metadata or {}).items()}
+        return {name: table.column(name).to_numpy() for name in table.column_names}, metadata
+
+    files = npz_chunk_files(path)
+    if not files:
+        raise FileNotFoundError(f"No telemetry found for {path}")
+    chunks, metadata = [], {}
+    for file in files:
+        with np.load(file) as data:
+            metadata = json.loads(str(data['__metadata__']))
+            chunks.append({name: data[name] for name in data.files if name != '__metadata__'})
+    return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}, metadata
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="Telemetry file given to the writer")
+    parser.add_argument("--csv", default=None, help="Write the rows to this CSV file")
+    args = parser.parse_args()
+
+    columns, metadata = read_telemetry(args.path)
+    rows = len(next(iter(columns.values()), []))
+    print(f"{rows} rows, columns: {', '.join(columns)}")
+    for key, value in metadata.items():
+        print(f"  {key}: {value}")
+    if args.csv:
+        with open(args.csv, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            writer.writerows(zip(*(column.tolist() for column in columns.values())))
+        print(f"Wrote {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
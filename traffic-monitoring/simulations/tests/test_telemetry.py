@@ -0,0 +1,31 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telemetry import TelemetryWriter, read_telemetry
+
+COLUMNS = {'time': np.float64, 'lane': np.int8}
+
+
+def write_run(path, times, chunk_rows=8):
+    with TelemetryWriter(path, COLUMNS, chunk_rows=chunk_rows) as writer:
+        for t in times:
+            writer.append_rows(1, time=t, lane=0)
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "run.parquet")
+    write_run(path, range(20))
+    columns, _ = read_telemetry(path)
+    assert columns['time'].tolist() == list(range(20))
+
+
+def test_new_run_replaces_old_chunks(tmp_path):
+    path = str(tmp_path / "run.parquet")
+    write_run(path, range(20))       # Three chunks of 8 rows
+    write_run(path, range(100, 105))  # One chunk
+    columns, _ = read_telemetry(path)
+    assert columns['time'].tolist() == [100, 101, 102, 103, 104]
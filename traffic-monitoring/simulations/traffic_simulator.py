@@ -1,15 +1,49 @@
+import argparse
 import pygame
 import random
 import time
-import csv
 from datetime import datetime
+import numpy as np
+from telemetry import TelemetryWriter
+from vehicle_state import LaneVehicles
 
 class TrafficSimulator:
-    def __init__(self):
-        pygame.init()
+    TELEMETRY_COLUMNS = {
+        'time': np.float64,  # Simulated seconds since the 'start' in the metadata
+        'lane': np.int8,
+        'vehicle_count': np.int32,
+        'signal_state': np.int8,  # Index into SIGNAL_STATES
+        'signal_time': np.float32,
+        'has_emergency': np.bool_,
+        'green_time_assigned': np.float32,
+        'emergency_handled': np.bool_,
+        'wait_time': np.float32,
+    }
+    SIGNAL_STATES = ['red', 'yellow', 'green']
+    
+    def __init__(self, headless=False, dt=1/30, seed=None, log_path='traffic_data.parquet', log_every=1, params=None):
+        """
+        Args:
+            headless: Run without a window; use run_headless() to simulate as
+                fast as possible
+            dt: Simulated seconds per tick (vehicle speeds are per 1/30 s tick
+                and are scaled to it)
+            seed: Seed of the simulation's random generator, for repeatable runs
+            log_path: Telemetry file for the per-tick lane log (Parquet, or
+                numbered .npz chunks without pyarrow), None to disable
+            log_every: Ticks between logged rows
+            params: Overrides of the simulation parameters below, e.g.
+                {'BASE_TIME': 15, 'TIME_PER_VEHICLE': 0.5, 'SPAWN_INTERVAL': 0.8}
+        """
+        self.headless = headless
+        self.dt = dt
+        self.speed_scale = dt * 30  # Vehicle speeds are pixels per 1/30 s
+        self.rng = random.Random(seed)
         self.WIDTH, self.HEIGHT = 1000, 800
-        self.screen = pygame.display.set_mode((self.WIDTH, self.HEIGHT))
-        pygame.display.set_caption("SignalX AI Traffic Control - Enhanced")
+        if not headless:
+            pygame.init()
+            self.screen = pygame.display.set_mode((self.WIDTH, self.HEIGHT))
+            pygame.display.set_caption("SignalX AI Traffic Control - Enhanced")
         
         # Colors and fonts
         self.BG_COLOR = (40, 40, 40)
@@ -18,8 +52,16 @@ class TrafficSimulator:
         self.CAR_COLORS = [(0, 120, 255), (0, 180, 60), (180, 120, 0)]
         self.AMBULANCE_COLOR = (255, 40, 40)
         self.SIGNAL_COLORS = {'red': (200, 0, 0), 'yellow': (230, 230, 0), 'green': (0, 180, 0)}
-        self.font = pygame.font.SysFont('Arial', 18)
-        self.alert_font = pygame.font.SysFont('Arial', 32, bold=True)
+        if not headless:
+            self.font = pygame.font.SysFont('Arial', 18)
+            self.alert_font = pygame.font.SysFont('Arial', 32, bold=True)
+        
+        # Simulated clock: seconds since the start, advanced by dt every tick
+        self.sim_time = 0.0
+        self.ticks = 0
+        self.start_datetime = datetime.now()
+        self.last_spawn_time = 0.0
+        self.last_emergency_spawn = 0.0
         
         # Simulation parameters
         self.BASE_TIME = 10
@@ -27,6 +69,13 @@ class TrafficSimulator:
         self.MIN_GREEN_TIME = 10
         self.MAX_GREEN_TIME = 60
         self.EMERGENCY_DURATION = 20  # seconds
+        self.SPAWN_INTERVAL = 1.2  # seconds between regular vehicles
+        self.EMERGENCY_INTERVAL = 15  # seconds between emergency spawn attempts
+        self.EMERGENCY_PROBABILITY = 0.3
+        for name, value in (params or {}).items():
+            if not name.isupper() or not hasattr(self, name):
+                raise ValueError(f"Unknown simulation parameter: {name}")
+            setattr(self, name, value)
         
         # Intersection layout with buffer zones
         self.intersection_rect = pygame.Rect(400, 300, 200, 200)
@@ -48,6 +97,10 @@ class TrafficSimulator:
             4: {'rect': pygame.Rect(0, 350, 350, 100), 'direction': 'right', 'signal': 'green', 
                 'time_left': self.BASE_TIME, 'vehicles': [], 'next_capture': self.BASE_TIME - 5}
         }
+        # Vehicle state of every lane in NumPy arrays (see vehicle_state.LaneVehicles)
+        for lane_id, lane in self.lanes.items():
+            lane['vehicles'] = LaneVehicles(lane['direction'], lane['rect'], self.stop_lines[lane_id],
+                                            self.intersection_rect, self.WIDTH, self.HEIGHT)
         
         # Emergency and performance tracking
         self.emergency_mode = False
@@ -55,17 +108,24 @@ class TrafficSimulator:
             'total_vehicles': 0,
             'emergencies_handled': 0,
             'avg_wait_time': 0,
-            'throughput': []
+            'throughput': [],
+            'vehicles_exited': 0,
+            'exited_wait_time': 0.0,  # Summed wait of the vehicles that left
+            'emergency_clearance': []  # Seconds from spawn to entering the intersection
         }
         
         # Data logging
-        self.setup_data_logging()
+        self.telemetry = None
+        if log_path is not None:
+            self.setup_data_logging(log_path, log_every)
         
-        # Pre-load vehicle shapes
-        self.vehicle_shapes = {
-            'car': self.create_vehicle_shape(60, 30, False),
-            'ambulance': self.create_vehicle_shape(70, 35, True)
-        }
+        # Vehicle sizes (width, height) and, with a display, pre-loaded shapes
+        self.vehicle_sizes = {'car': (60, 30), 'ambulance': (70, 35)}
+        if not headless:
+            self.vehicle_shapes = {
+                'car': self.create_vehicle_shape(60, 30, False),
+                'ambulance': self.create_vehicle_shape(70, 35, True)
+            }
     
     def create_vehicle_shape(self, width, height, is_ambulance):
         """Create different shaped vehicles"""
@@ -83,15 +143,10 @@ class TrafficSimulator:
             pygame.draw.rect(shape, (200, 200, 255), (35, 5, 20, 15))
         return shape
     
-    def setup_data_logging(self):
-        """Initialize data collection"""
-        self.log_file = open('traffic_data.csv', 'w')
-        self.log_writer = csv.writer(self.log_file)
-        self.log_writer.writerow([
-            'timestamp', 'lane', 'vehicle_count', 'signal_state', 
-            'signal_time', 'has_emergency', 'green_time_assigned',
-            'emergency_handled', 'wait_time'
-        ])
+    def setup_data_logging(self, log_path='traffic_data.parquet', log_every=1):
+        """Initialize data collection (one row per lane per logged tick, time in simulated seconds)"""
+        self.telemetry = TelemetryWriter(log_path, self.TELEMETRY_COLUMNS, sample_every=log_every,
+                                         metadata={'start': self.start_datetime.isoformat(), 'dt': self.dt})
     
     def calculate_green_time(self, lane_id):
         """Adaptive timing formula with constraints"""
@@ -103,45 +158,18 @@ class TrafficSimulator:
         """Add a new vehicle with collision avoidance"""
         lane = self.lanes[lane_id]
         
-        # Check for space before spawning
-        if lane['vehicles']:
-            last_vehicle = lane['vehicles'][-1]
-            min_distance = 120 if is_emergency else 80
-            
-            if lane['direction'] in ['down', 'up']:
-                if abs(last_vehicle['rect'].y - (0 if lane['direction'] == 'down' else self.HEIGHT)) < min_distance:
-                    return
-            else:
-                if abs(last_vehicle['rect'].x - (0 if lane['direction'] == 'right' else self.WIDTH)) < min_distance:
-                    return
+        vehicles = lane['vehicles']
         
-        # Create vehicle
-        vehicle_type = 'ambulance' if is_emergency else 'car'
-        vehicle = {
-            'rect': None,
-            'speed': random.uniform(2, 3.5),
-            'is_emergency': is_emergency,
-            'type': vehicle_type,
-            'wait_time': 0,
-            'entered_intersection': False
-        }
+        # Check for space before spawning: the last vehicle must have driven clear of the entry
+        distance = vehicles.entry_distance()
+        min_distance = 120 if is_emergency else 80
+        if distance is not None and distance < min_distance:
+            return
         
-        # Position based on lane direction
-        shape = self.vehicle_shapes[vehicle_type]
-        if lane['direction'] == 'down':
-            vehicle['rect'] = pygame.Rect(lane['rect'].x + 20, -shape.get_height(), 
-                                        shape.get_width(), shape.get_height())
-        elif lane['direction'] == 'up':
-            vehicle['rect'] = pygame.Rect(lane['rect'].x + 20, self.HEIGHT, 
-                                        shape.get_width(), shape.get_height())
-        elif lane['direction'] == 'left':
-            vehicle['rect'] = pygame.Rect(self.WIDTH, lane['rect'].y + 20, 
-                                        shape.get_height(), shape.get_width())
-        else:  # right
-            vehicle['rect'] = pygame.Rect(-shape.get_height(), lane['rect'].y + 20, 
-                                        shape.get_height(), shape.get_width())
-        
-        lane['vehicles'].append(vehicle)
+        # Create vehicle at the lane entry (size along, across the lane)
+        vehicle_type = 'ambulance' if is_emergency else 'car'
+        width, height = self.vehicle_sizes[vehicle_type]
+        vehicles.append(self.rng.uniform(2, 3.5), height, width, is_emergency, self.sim_time)
         self.performance_data['total_vehicles'] += 1
         
         # Handle emergency
@@ -151,87 +179,28 @@ class TrafficSimulator:
             self.lanes[lane_id]['next_capture'] = 0  # Immediate detection
             
             # Visual alert
-            self.emergency_start_time = time.time()
+            self.emergency_start_time = self.sim_time
             # Uncomment for sound: pygame.mixer.Sound('sounds/siren.mp3').play()
     
     def update_vehicles(self):
-        """Move vehicles with proper stopping and collision avoidance"""
-        current_time = time.time()
-        
-        for lane_id, lane in self.lanes.items():
-            for i, vehicle in enumerate(lane['vehicles']):
-                # Skip if this vehicle is being processed for removal
-                if vehicle.get('remove', False):
-                    continue
-                
-                # Check if vehicle should stop at red light
-                should_stop = False
-                stop_line = self.stop_lines[lane_id]
-                
-                if lane['signal'] == 'red' and not vehicle['entered_intersection']:
-                    if lane['direction'] == 'down' and vehicle['rect'].bottom >= stop_line.top:
-                        should_stop = True
-                    elif lane['direction'] == 'up' and vehicle['rect'].top <= stop_line.bottom:
-                        should_stop = True
-                    elif lane['direction'] == 'left' and vehicle['rect'].left <= stop_line.right:
-                        should_stop = True
-                    elif lane['direction'] == 'right' and vehicle['rect'].right >= stop_line.left:
-                        should_stop = True
-                
-                # Check for vehicle ahead
-                if i > 0 and not should_stop:
-                    vehicle_ahead = lane['vehicles'][i-1]
-                    min_distance = 30 if vehicle['is_emergency'] else 20
-                    
-                    if lane['direction'] == 'down':
-                        if vehicle_ahead['rect'].bottom - vehicle['rect'].bottom < min_distance:
-                            should_stop = True
-                    elif lane['direction'] == 'up':
-                        if vehicle['rect'].top - vehicle_ahead['rect'].top < min_distance:
-                            should_stop = True
-                    elif lane['direction'] == 'left':
-                        if vehicle['rect'].left - vehicle_ahead['rect'].left < min_distance:
-                            should_stop = True
-                    elif lane['direction'] == 'right':
-                        if vehicle_ahead['rect'].right - vehicle['rect'].right < min_distance:
-                            should_stop = True
-                
-                # Update position if not stopped
-                if not should_stop:
-                    if lane['direction'] == 'down':
-                        vehicle['rect'].y += vehicle['speed']
-                    elif lane['direction'] == 'up':
-                        vehicle['rect'].y -= vehicle['speed']
-                    elif lane['direction'] == 'left':
-                        vehicle['rect'].x -= vehicle['speed']
-                    elif lane['direction'] == 'right':
-                        vehicle['rect'].x += vehicle['speed']
-                    
-                    # Mark as entered intersection
-                    if not vehicle['entered_intersection'] and self.intersection_rect.colliderect(vehicle['rect']):
-                        vehicle['entered_intersection'] = True
-                else:
-                    vehicle['wait_time'] += 1/30  # Increment wait time (assuming 30 FPS)
-                
-                # Check if vehicle exited screen
-                if (vehicle['rect'].top > self.HEIGHT + 50 or 
-                    vehicle['rect'].bottom < -50 or 
-                    vehicle['rect'].left > self.WIDTH + 50 or 
-                    vehicle['rect'].right < -50):
-                    vehicle['remove'] = True
-        
-            # Remove vehicles marked for deletion
-            lane['vehicles'] = [v for v in lane['vehicles'] if not v.get('remove', False)]
+        """Move vehicles with proper stopping and collision avoidance (vectorized per lane)"""
+        data = self.performance_data
+        for lane in self.lanes.values():
+            exited, exited_wait, clearance = lane['vehicles'].update(
+                lane['signal'], self.speed_scale, self.dt, self.sim_time)
+            data['vehicles_exited'] += exited
+            data['exited_wait_time'] += exited_wait
+            data['emergency_clearance'].extend(clearance)
     
     def update_signals(self):
         """Update traffic signals with your AI logic"""
-        current_time = time.time()
+        current_time = self.sim_time
         
         # Emergency override handling
         if self.emergency_mode:
             if current_time - self.emergency_start_time < self.EMERGENCY_DURATION:
                 for lane_id, lane in self.lanes.items():
-                    has_emergency = any(v['is_emergency'] for v in lane['vehicles'])
+                    has_emergency = lane['vehicles'].emergencies > 0
                     if has_emergency:
                         lane['signal'] = 'green'
                         lane['time_left'] = self.EMERGENCY_DURATION - (current_time - self.emergency_start_time)
@@ -242,16 +211,20 @@ class TrafficSimulator:
                 return
             else:
                 self.emergency_mode = False
+                # The priority lane may have been set red once its ambulance left
+                if not any(lane['signal'] in ('green', 'yellow') for lane in self.lanes.values()):
+                    self.give_green_to_busiest_lane()
         
         # Normal adaptive signal control
         for lane_id, lane in self.lanes.items():
             if lane['signal'] == 'green':
-                lane['time_left'] -= 1/30  # Decrement by frame time
+                lane['time_left'] -= self.dt  # Decrement by the simulated tick
                 
                 # Check if time to capture next lane (5 seconds before end)
                 if lane['time_left'] <= 5 and lane['next_capture'] == 0:
                     next_lane = (lane_id % 4) + 1
-                    print(f"AI Camera capturing Lane {next_lane}...")
+                    if not self.headless:
+                        print(f"AI Camera capturing Lane {next_lane}...")
                     lane['next_capture'] = 1  # Mark as captured
                 
                 # Time's up for this green signal
@@ -260,17 +233,19 @@ class TrafficSimulator:
                     lane['time_left'] = 3  # 3 seconds of yellow
                     lane['next_capture'] = 0
             elif lane['signal'] == 'yellow':
-                lane['time_left'] -= 1/30
+                lane['time_left'] -= self.dt
                 if lane['time_left'] <= 0:
                     lane['signal'] = 'red'
-                    
-                    # Switch to lane with most vehicles
-                    next_lane = max(self.lanes.keys(), 
-                                  key=lambda x: len(self.lanes[x]['vehicles']))
-                    self.lanes[next_lane]['signal'] = 'green'
-                    green_time = self.calculate_green_time(next_lane)
-                    self.lanes[next_lane]['time_left'] = green_time
-                    self.lanes[next_lane]['next_capture'] = green_time - 5 if green_time > 5 else 0
+                    self.give_green_to_busiest_lane()
+    
+    def give_green_to_busiest_lane(self):
+        """Switch to lane with most vehicles"""
+        next_lane = max(self.lanes.keys(), 
+                      key=lambda x: len(self.lanes[x]['vehicles']))
+        self.lanes[next_lane]['signal'] = 'green'
+        green_time = self.calculate_green_time(next_lane)
+        self.lanes[next_lane]['time_left'] = green_time
+        self.lanes[next_lane]['next_capture'] = green_time - 5 if green_time > 5 else 0
     
     def draw(self):
         """Draw the complete simulation with enhanced visuals"""
@@ -300,21 +275,22 @@ class TrafficSimulator:
         
         # Draw vehicles with proper shapes and labels
         for lane_id, lane in self.lanes.items():
-            for vehicle in lane['vehicles']:
+            for rect, is_emergency in lane['vehicles'].rects():
+                vehicle_type = 'ambulance' if is_emergency else 'car'
                 # Rotate vehicle based on direction
                 if lane['direction'] in ['left', 'right']:
-                    vehicle_surface = pygame.transform.rotate(self.vehicle_shapes[vehicle['type']], 
+                    vehicle_surface = pygame.transform.rotate(self.vehicle_shapes[vehicle_type], 
                                                             90 if lane['direction'] == 'left' else 270)
                 else:
-                    vehicle_surface = pygame.transform.rotate(self.vehicle_shapes[vehicle['type']], 
+                    vehicle_surface = pygame.transform.rotate(self.vehicle_shapes[vehicle_type], 
                                                             180 if lane['direction'] == 'up' else 0)
                 
-                self.screen.blit(vehicle_surface, vehicle['rect'].topleft)
+                self.screen.blit(vehicle_surface, rect.topleft)
                 
                 # Label emergency vehicles
-                if vehicle['is_emergency']:
+                if is_emergency:
                     label = self.font.render("AMBULANCE", True, (255, 255, 255))
-                    self.screen.blit(label, (vehicle['rect'].x - 10, vehicle['rect'].y - 20))
+                    self.screen.blit(label, (rect.x - 10, rect.y - 20))
         
         # Draw traffic signals with info
         signal_positions = {
@@ -363,51 +339,99 @@ class TrafficSimulator:
     
     def log_data(self):
         """Log traffic data for analysis"""
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')
+        counts, signals, times_left, emergencies, green_times, waits = [], [], [], [], [], []
         for lane_id, lane in self.lanes.items():
-            has_emergency = any(v['is_emergency'] for v in lane['vehicles'])
-            avg_wait = sum(v['wait_time'] for v in lane['vehicles']) / max(1, len(lane['vehicles']))
-            
-            self.log_writer.writerow([
-                timestamp,
-                lane_id,
-                len(lane['vehicles']),
-                lane['signal'],
-                lane['time_left'],
-                has_emergency,
-                self.calculate_green_time(lane_id) if lane['signal'] == 'green' else 0,
-                self.emergency_mode,
-                avg_wait
-            ])
-        
-        # Update performance data
-        total_wait = sum(v['wait_time'] for lane in self.lanes.values() for v in lane['vehicles'])
+            vehicles = lane['vehicles']
+            counts.append(len(vehicles))
+            signals.append(self.SIGNAL_STATES.index(lane['signal']))
+            times_left.append(lane['time_left'])
+            emergencies.append(vehicles.emergencies > 0)
+            green_times.append(self.calculate_green_time(lane_id) if lane['signal'] == 'green' else 0)
+            waits.append(vehicles.wait.sum() / max(1, len(vehicles)))
+        
+        self.telemetry.append_rows(
+            len(self.lanes),
+            time=self.sim_time,
+            lane=list(self.lanes),
+            vehicle_count=counts,
+            signal_state=signals,
+            signal_time=times_left,
+            has_emergency=emergencies,
+            green_time_assigned=green_times,
+            emergency_handled=self.emergency_mode,
+            wait_time=waits,
+        )
+    
+    def update_performance(self):
+        """Average wait of the vehicles currently on the roads"""
+        total_wait = sum(float(lane['vehicles'].wait.sum()) for lane in self.lanes.values())
         total_vehicles = sum(len(lane['vehicles']) for lane in self.lanes.values())
         self.performance_data['avg_wait_time'] = total_wait / max(1, total_vehicles)
     
+    def step(self):
+        """Advance the simulation by one tick of dt simulated seconds"""
+        # Spawn regular vehicles
+        if self.sim_time - self.last_spawn_time > self.SPAWN_INTERVAL:
+            lane_id = self.rng.choice(list(self.lanes.keys()))
+            self.spawn_vehicle(lane_id)
+            self.last_spawn_time = self.sim_time
+        
+        # Spawn emergency vehicles less frequently
+        if self.sim_time - self.last_emergency_spawn > self.EMERGENCY_INTERVAL:
+            if self.rng.random() < self.EMERGENCY_PROBABILITY:
+                lane_id = self.rng.choice(list(self.lanes.keys()))
+                self.spawn_vehicle(lane_id, True)
+                self.last_emergency_spawn = self.sim_time
+        
+        # Update simulation
+        self.update_vehicles()
+        self.update_signals()
+        if self.telemetry is not None and self.telemetry.sample():
+            self.log_data()
+        self.update_performance()
+        
+        self.ticks += 1
+        self.sim_time = self.ticks * self.dt  # No drift from summing dt
+    
+    def run_headless(self, duration):
+        """
+        Simulate duration seconds as fast as possible, without a display
+        
+        Returns:
+            summary() of the run
+        """
+        end_tick = self.ticks + int(round(duration / self.dt))
+        while self.ticks < end_tick:
+            self.step()
+        return self.summary()
+    
+    def summary(self):
+        """Performance of the run so far"""
+        data = self.performance_data
+        exited = data['vehicles_exited']
+        clearance = data['emergency_clearance']
+        return {
+            'sim_time': self.sim_time,
+            'ticks': self.ticks,
+            'total_vehicles': data['total_vehicles'],
+            'vehicles_exited': exited,
+            'throughput_per_hour': exited / self.sim_time * 3600 if self.sim_time else 0.0,
+            'avg_wait_time': data['exited_wait_time'] / exited if exited else 0.0,
+            'emergencies': data['emergencies_handled'],
+            'avg_emergency_clearance': sum(clearance) / len(clearance) if clearance else 0.0,
+        }
+    
+    def close(self):
+        if self.telemetry is not None:
+            self.telemetry.close()
+            self.telemetry = None
+    
     def run(self):
         """Main simulation loop"""
         clock = pygame.time.Clock()
         running = True
-        last_spawn_time = time.time()
-        last_emergency_spawn = time.time()
         
         while running:
-            current_time = time.time()
-            
-            # Spawn regular vehicles
-            if current_time - last_spawn_time > 1.2:  # Every 1.2 seconds
-                lane_id = random.choice(list(self.lanes.keys()))
-                self.spawn_vehicle(lane_id)
-                last_spawn_time = current_time
-            
-            # Spawn emergency vehicles less frequently
-            if current_time - last_emergency_spawn > 15:  # Every 15 seconds
-                if random.random() < 0.3:  # 30% chance
-                    lane_id = random.choice(list(self.lanes.keys()))
-                    self.spawn_vehicle(lane_id, True)
-                    last_emergency_spawn = current_time
-            
             # Handle events
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
@@ -415,7 +439,7 @@ class TrafficSimulator:
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_SPACE:
                         # Manual emergency for demo
-                        lane_id = random.choice(list(self.lanes.keys()))
+                        lane_id = self.rng.choice(list(self.lanes.keys()))
                         self.spawn_vehicle(lane_id, True)
                     elif event.key == pygame.K_p:
                         # Pause simulation
@@ -427,16 +451,41 @@ class TrafficSimulator:
                             pygame.time.wait(100)
             
             # Update simulation
-            self.update_vehicles()
-            self.update_signals()
-            self.log_data()
+            self.step()
             self.draw()
             
             clock.tick(30)  # Maintain 30 FPS
         
-        self.log_file.close()
+        self.close()
         pygame.quit()
 
+def main():
+    parser = argparse.ArgumentParser(description="SignalX traffic simulator")
+    parser.add_argument("--headless", action="store_true", help="Simulate without a window, as fast as possible")
+    parser.add_argument("--duration", type=float, default=3600, help="Simulated seconds (headless)")
+    parser.add_argument("--dt", type=float, default=1/30, help="Simulated seconds per tick")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--log", default="traffic_data.parquet",
+                        help="Telemetry path (.npz chunks without pyarrow, '' to disable)")
+    parser.add_argument("--log-every", type=int, default=1, help="Ticks between logged rows")
+    args = parser.parse_args()
+    
+    simulator = TrafficSimulator(headless=args.headless, dt=args.dt, seed=args.seed,
+                                 log_path=args.log or None, log_every=args.log_every)
+    if not args.headless:
+        simulator.run()
+        return
+    
+    start = time.perf_counter()
+    try:
+        summary = simulator.run_headless(args.duration)
+    finally:
+        simulator.close()
+    elapsed = time.perf_counter() - start
+    print(f"Simulated {summary['sim_time']:.0f}s in {elapsed:.1f}s "
+          f"({summary['ticks'] / elapsed:.0f} ticks/s, {summary['sim_time'] / elapsed:.0f}x real time)")
+    for key, value in summary.items():
+        print(f"  {key}: {value:.2f}" if isinstance(value, float) else f"  {key}: {value}")
+
 if __name__ == "__main__":
-    simulator = TrafficSimulator()
-    simulator.run() 
\ No newline at end of file
+    main()
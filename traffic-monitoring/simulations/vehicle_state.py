@@ -0,0 +1,197 @@
+import numpy as np
+import pygame
+
+# Headway kept behind the vehicle ahead (pixels)
+MIN_GAP = 20
+EMERGENCY_MIN_GAP = 30
+
+
+class LaneVehicles:
+    """
+    Structure-of-arrays state of the vehicles on one lane, head of the queue first
+
+    Every lane is reduced to one travel axis: a vehicle's position is the
+    coordinate of its front bumper along the direction of travel (y for
+    down, -y for up, x for right, -x for left), so positions grow as vehicles
+    drive and stopping, headway, intersection entry and leaving the screen are
+    comparisons on whole arrays. Vehicles never overtake, so the ones leaving
+    are always a prefix of the arrays.
+
+    The arrays reproduce the per-vehicle pygame.Rect model exactly: positions
+    are whole pixels rounded as Rect rounds them, every vehicle checks its
+    headway against where the vehicle ahead is after its own move in the same
+    tick, and a new vehicle waits on the top/left edge of the last one.
+    """
+
+    FIELDS = {
+        'front': np.float64,      # Front bumper position along the travel axis
+        'length': np.float32,     # Extent along the travel axis
+        'across': np.float32,     # Extent across the lane
+        'speed': np.float32,      # Pixels per 1/30 s tick
+        'min_gap': np.float32,    # Headway kept behind the vehicle ahead
+        'wait': np.float64,       # Seconds spent stopped
+        'spawn_time': np.float64,
+        'emergency': np.bool_,
+        'entered': np.bool_,      # Has reached the intersection
+    }
+
+    def __init__(self, direction, lane_rect, stop_line, intersection_rect, width, height, capacity=64):
+        """
+        Args:
+            direction: 'down', 'up', 'left' or 'right'
+            lane_rect: pygame.Rect of the approach road
+            stop_line: pygame.Rect of the lane's stop line
+            intersection_rect: pygame.Rect of the intersection
+            width, height: Size of the simulated area
+        """
+        self.direction = direction
+        vertical = direction in ('down', 'up')
+        self.vertical = vertical
+        self.sign = 1 if direction in ('down', 'right') else -1
+        size = height if vertical else width
+        # Fixed coordinate across the lane (vehicles drive 20 px in from the lane edge)
+        self.lane_offset = (lane_rect.x if vertical else lane_rect.y) + 20
+
+        def near(rect):
+            return rect.top if vertical else rect.left
+
+        def far(rect):
+            return rect.bottom if vertical else rect.right
+
+        if self.sign > 0:
+            self.stop_position = near(stop_line)             # Stop once the front reaches the line
+            self.entry_position = near(intersection_rect)    # Entered once the front passes the edge
+            self.exit_position = size + 50                   # Removed once the back is 50 px off screen
+            self.spawn_position = 0
+        else:
+            self.stop_position = -far(stop_line)
+            self.entry_position = -far(intersection_rect)
+            self.exit_position = 50
+            self.spawn_position = -size
+
+        self.count = 0
+        self.emergencies = 0  # Emergency vehicles on the lane
+        self._arrays = {name: np.zeros(capacity, dtype=dtype) for name, dtype in self.FIELDS.items()}
+
+    def __len__(self):
+        return self.count
+
+    def __getattr__(self, name):
+        # Field views trimmed to the vehicles present, e.g. lane.wait
+        arrays = self.__dict__.get('_arrays')
+        if arrays is not None and name in arrays:
+            return arrays[name][:self.count]
+        raise AttributeError(name)
+
+    def entry_distance(self):
+        """
+        How far the last vehicle has moved clear of the spawn point, or None
+
+        Measured on its top/left edge, as the Rect model did: the back bumper
+        on down/right lanes, the front bumper on up/left lanes.
+        """
+        if not self.count:
+            return None
+        i = self.count - 1
+        edge = self._arrays['front'][i]
+        if self.sign > 0:
+            edge -= self._arrays['length'][i]
+            return abs(edge)
+        return abs(edge - self.spawn_position)
+
+    def append(self, speed, length, across, is_emergency, spawn_time):
+        """Add a vehicle at the spawn point, behind everyone else"""
+        if self.count == len(self._arrays['front']):
+            for name, array in self._arrays.items():
+                grown = np.zeros(2 * len(array), dtype=array.dtype)
+                grown[:self.count] = array[:self.count]
+                self._arrays[name] = grown
+        i = self.count
+        min_gap = EMERGENCY_MIN_GAP if is_emergency else MIN_GAP
+        values = (self.spawn_position, length, across, speed, min_gap, 0.0, spawn_time, is_emergency, False)
+        for array, value in zip(self._arrays.values(), values):
+            array[i] = value
+        self.count += 1
+        self.emergencies += bool(is_emergency)
+
+    def remove_head(self, n):
+        """Drop the first n vehicles"""
+        if n:
+            if self.emergencies:
+                self.emergencies -= int(self._arrays['emergency'][:n].sum())
+            for array in self._arrays.values():
+                array[:self.count - n] = array[n:self.count]
+            self.count -= n
+
+    def update(self, signal, speed_scale, dt, sim_time):
+        """
+        Move the lane one tick
+
+        Vehicles stop at a red light before entering the intersection and keep
+        their headway behind the vehicle ahead, at its position after its own
+        move this tick (vehicles are moved head of the queue first).
+
+        Returns:
+            (exited_count, exited_wait_sum, emergency_clearance_times)
+        """
+        n = self.count
+        if not n:
+            return 0, 0.0, ()
+        arrays = self._arrays
+        front, length, wait = arrays['front'][:n], arrays['length'][:n], arrays['wait'][:n]
+        entered = arrays['entered'][:n]
+
+        # Stopped at a red light before the intersection
+        if signal == 'red':
+            free = (front < self.stop_position) | entered
+        else:
+            free = np.ones(n, dtype=bool)
+
+        # Where each vehicle ends up if it moves, in whole pixels rounded half up on screen
+        step = arrays['speed'][:n] * np.float64(speed_scale)
+        moved = np.floor(front + step + 0.5) if self.sign > 0 else np.ceil(front + step - 0.5)
+
+        # Headway behind the vehicle ahead after its move: a vehicle moves if the gap
+        # is clear with the one ahead standing still, or clear only once it has moved
+        # and it did move. Resolved in one pass: each vehicle inherits the decision of
+        # the nearest vehicle ahead that does not depend on its own leader.
+        min_gap = arrays['min_gap'][1:n]
+        clear = np.ones(n, dtype=bool)
+        clear[1:] = (front[:-1] - front[1:]) >= min_gap
+        clear_if_ahead_moves = np.zeros(n, dtype=bool)
+        clear_if_ahead_moves[1:] = (moved[:-1] - front[1:]) >= min_gap
+        decided = free & clear
+        inherits = free & ~clear & clear_if_ahead_moves
+        last_decided = np.maximum.accumulate(np.where(decided | ~inherits, np.arange(n), 0))
+        move = decided[last_decided]
+
+        stop = ~move
+        front[move] = moved[move]
+        wait += stop * dt
+
+        newly_entered = move & ~entered & (front > self.entry_position)
+        entered |= newly_entered
+        clearance = ()
+        if self.emergencies:
+            clearance = (sim_time - arrays['spawn_time'][:n][newly_entered & arrays['emergency'][:n]]).tolist()
+
+        # Leading vehicles whose back is off screen
+        exited, exited_wait = 0, 0.0
+        if front[0] - length[0] > self.exit_position:
+            off_screen = front - length > self.exit_position
+            exited = int(np.argmin(off_screen)) if not off_screen.all() else n
+            exited_wait = float(wait[:exited].sum())
+            self.remove_head(exited)
+        return exited, exited_wait, clearance
+
+    def rects(self):
+        """pygame.Rect and emergency flag of every vehicle, for drawing"""
+        rects = []
+        for front, length, across, emergency in zip(self.front.tolist(), self.length.tolist(),
+                                                    self.across.tolist(), self.emergency.tolist()):
+            start = front - length if self.sign > 0 else -front  # Top or left edge
+            if self.vertical:
+                rects.append((pygame.Rect(self.lane_offset, start, across, length), emergency))
+            else:
+                rects.append((pygame.Rect(start, self.lane_offset, length, across), emergency))
+        return rects